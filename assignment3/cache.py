@@ -0,0 +1,310 @@
+"""
+cache - content-addressed cache for simulation and design results
+
+@cached
+def abrm(rf, g=None, x=None, y=None):
+    ...
+
+Results are keyed on a hash of the function name, the bytes, dtype and
+shape of every input array, and the remaining parameters. They are kept
+in an in-memory LRU tier with a byte budget, and optionally in an on-disk
+tier of .npz files with size-based eviction, so that results survive a
+kernel restart.
+
+Caching is off unless turned on with cache_config(enabled=True) or the
+environment variable MRI_CACHE=1, so that a process does not hold on to
+results it never asked to keep.
+
+cache_config(max_bytes, disk_dir, disk_max_bytes, enabled)
+cache_stats()
+cache_clear()
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+import numpy as np
+
+_config = {
+    'enabled': os.environ.get('MRI_CACHE', '0') not in ('', '0'),
+    'max_bytes': 256 * 2**20,
+    'disk_dir': None,
+    'disk_max_bytes': 2 * 2**30,
+}
+
+_memory = OrderedDict()
+_memory_bytes = 0
+_lock = threading.Lock()
+_stats = {}
+
+
+def cache_config(max_bytes=None, disk_dir=None, disk_max_bytes=None, enabled=None):
+    """
+    Configure the cache.
+
+    Parameters:
+    -----------
+    max_bytes : int, optional
+        Byte budget of the in-memory tier (default 256 MB)
+    disk_dir : str, optional
+        Directory for the on-disk tier. An empty string disables it.
+    disk_max_bytes : int, optional
+        Byte budget of the on-disk tier (default 2 GB)
+    enabled : bool, optional
+        Turn caching on or off
+
+    Returns:
+    --------
+    config : dict
+        The current configuration
+    """
+    if max_bytes is not None:
+        _config['max_bytes'] = int(max_bytes)
+    if disk_dir is not None:
+        _config['disk_dir'] = disk_dir or None
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+    if disk_max_bytes is not None:
+        _config['disk_max_bytes'] = int(disk_max_bytes)
+    if enabled is not None:
+        _config['enabled'] = bool(enabled)
+
+    with _lock:
+        _evict_memory()
+
+    return dict(_config)
+
+
+def cache_stats():
+    """
+    Return hit/miss statistics, in total and per cached function.
+
+    Returns:
+    --------
+    stats : dict
+        'hits', 'disk_hits', 'misses', 'evictions', 'bytes', 'entries'
+        and 'functions', a dict of per-function counters
+    """
+    with _lock:
+        functions = {name: dict(s) for name, s in _stats.items()}
+        total = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        for s in functions.values():
+            for key in total:
+                total[key] += s[key]
+        total['bytes'] = _memory_bytes
+        total['entries'] = len(_memory)
+        total['functions'] = functions
+
+    return total
+
+
+def cache_clear(disk=False):
+    """
+    Empty the in-memory tier, reset the statistics, and optionally empty
+    the on-disk tier.
+    """
+    global _memory_bytes
+
+    with _lock:
+        _memory.clear()
+        _memory_bytes = 0
+        _stats.clear()
+
+    if disk and _config['disk_dir']:
+        for name in os.listdir(_config['disk_dir']):
+            if name.endswith('.npz'):
+                os.remove(os.path.join(_config['disk_dir'], name))
+
+
+def cached(func):
+    """
+    Decorator that caches the results of func, which must return an array,
+    a scalar, or a tuple of these.
+    """
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _config['enabled']:
+            return func(*args, **kwargs)
+
+        key = _make_key(name, args, kwargs)
+
+        result = _lookup(name, key)
+        if result is not None:
+            return result
+
+        result = func(*args, **kwargs)
+        _store(name, key, result)
+
+        return result
+
+    wrapper.uncached = func
+    return wrapper
+
+
+def _count(name, field, n=1):
+    s = _stats.setdefault(name, {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0})
+    s[field] += n
+
+
+def _hash_value(h, value):
+    # Feed one argument into the hash, recursing into containers
+    if isinstance(value, np.ndarray) or (hasattr(value, '__array__') and not np.isscalar(value)):
+        value = np.ascontiguousarray(value)
+        h.update(f"ndarray{value.dtype.str}{value.shape}".encode())
+        if value.dtype.hasobject:
+            h.update(repr(value.tolist()).encode())
+        else:
+            h.update(value.view(np.uint8).reshape(-1).data if value.size else b'')
+    elif isinstance(value, (list, tuple)):
+        h.update(f"{type(value).__name__}{len(value)}(".encode())
+        for v in value:
+            _hash_value(h, v)
+        h.update(b')')
+    elif isinstance(value, dict):
+        h.update(b'dict{')
+        for k in sorted(value):
+            h.update(repr(k).encode())
+            _hash_value(h, value[k])
+        h.update(b'}')
+    else:
+        h.update(f"{type(value).__name__}:{value!r};".encode())
+
+
+def _make_key(name, args, kwargs):
+    h = hashlib.blake2b(digest_size=20)
+    h.update(name.encode())
+    _hash_value(h, args)
+    _hash_value(h, kwargs)
+    return h.hexdigest()
+
+
+def _nbytes(result):
+    if isinstance(result, tuple):
+        return sum(_nbytes(r) for r in result)
+    return np.asarray(result).nbytes
+
+
+def _copy(result):
+    # Hand out copies so callers cannot modify cached arrays in place
+    if isinstance(result, tuple):
+        return tuple(_copy(r) for r in result)
+    if isinstance(result, np.ndarray):
+        return result.copy()
+    return result
+
+
+def _evict_memory():
+    global _memory_bytes
+
+    while _memory and _memory_bytes > _config['max_bytes']:
+        old_key, (old_name, old_result, old_bytes) = _memory.popitem(last=False)
+        _memory_bytes -= old_bytes
+        _count(old_name, 'evictions')
+
+
+def _lookup(name, key):
+    with _lock:
+        if key in _memory:
+            _memory.move_to_end(key)
+            _count(name, 'hits')
+            return _copy(_memory[key][1])
+
+    result = _disk_load(key)
+
+    with _lock:
+        if result is not None:
+            _count(name, 'disk_hits')
+            _memory_put(name, key, result)
+            return _copy(result)
+        _count(name, 'misses')
+
+    return None
+
+
+def _memory_put(name, key, result):
+    global _memory_bytes
+
+    nbytes = _nbytes(result)
+    if key in _memory or nbytes > _config['max_bytes']:
+        return
+
+    _memory[key] = (name, _copy(result), nbytes)
+    _memory_bytes += nbytes
+    _evict_memory()
+
+
+def _store(name, key, result):
+    with _lock:
+        _memory_put(name, key, result)
+    _disk_save(key, result)
+
+
+def _disk_path(key):
+    return os.path.join(_config['disk_dir'], key + '.npz')
+
+
+def _disk_load(key):
+    if not _config['disk_dir']:
+        return None
+
+    path = _disk_path(key)
+    try:
+        with np.load(path, allow_pickle=False) as f:
+            kinds = str(f['kinds'])
+            items = [f[f'arr_{i}'] for i in range(len(kinds))]
+    except (OSError, KeyError, ValueError):
+        return None
+
+    # Mark as recently used for the size-based eviction
+    os.utime(path)
+
+    items = [x if k == 'a' else x.item() for k, x in zip(kinds, items)]
+    if kinds.startswith('t'):
+        return tuple(items[1:])
+    return items[0]
+
+
+def _disk_save(key, result):
+    if not _config['disk_dir']:
+        return
+
+    items = list(result) if isinstance(result, tuple) else [result]
+    kinds = ''.join('a' if isinstance(x, np.ndarray) else 's' for x in items)
+    if isinstance(result, tuple):
+        kinds = 't' + kinds
+        items = [0] + items
+
+    arrays = {f'arr_{i}': np.asarray(x) for i, x in enumerate(items)}
+    path = _disk_path(key)
+    tmp = path + '.tmp.npz'
+    np.savez(tmp, kinds=np.asarray(kinds), **arrays)
+    os.replace(tmp, path)
+
+    _evict_disk()
+
+
+def _evict_disk():
+    entries = []
+    for name in os.listdir(_config['disk_dir']):
+        if name.endswith('.npz') and not name.endswith('.tmp.npz'):
+            path = os.path.join(_config['disk_dir'], name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum(e[1] for e in entries)
+    for mtime, size, path in sorted(entries):
+        if total <= _config['disk_max_bytes']:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
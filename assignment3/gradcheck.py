@@ -0,0 +1,116 @@
+import numpy as np
+from scipy.signal import lfilter
+
+
+def gradcheck(g, dt, gmax, smax, pns_limit=None, tau=0.36, per_axis=False):
+    """
+    Check many gradient waveforms against amplitude, slew rate and
+    peripheral nerve stimulation limits in one pass.
+
+    Parameters:
+    -----------
+    g : array_like
+        gradient waveforms in G/cm, (nwave, nt, naxis), or complex
+        (nwave, nt) for 2D waveforms gx + 1j*gy. A single waveform may
+        be given as (nt,), real for one axis or complex.
+    dt : float
+        sample time, ms
+    gmax : float
+        maximum gradient, G/cm
+    smax : float
+        maximum slew rate, (G/cm)/ms
+    pns_limit : float, optional
+        slew rate, in (G/cm)/ms, that held for much longer than tau
+        reaches the stimulation threshold. No PNS check if not given.
+    tau : float, optional
+        time constant of the nerve response (chronaxie), ms
+    per_axis : bool, optional
+        limit each axis separately, as for independent gradient amplifiers,
+        rather than the magnitude of the gradient vector
+
+    Returns:
+    --------
+    result : dict of ndarray, one entry per waveform
+        'ok' - all limits met
+        'g', 's', 'pns' - peak gradient, slew rate and PNS level, the last
+            as a fraction of threshold
+        'g_margin', 's_margin', 'pns_margin' - 1 - peak/limit, negative
+            where a limit is exceeded
+
+    The PNS model is an exponential filter of the slew rate of each axis,
+    r[n] = a*r[n-1] + (1-a)*s[n] with a = exp(-dt/tau), which is the
+    convolution with exp(-t/tau)/tau done as a first order recursive
+    filter along time. A constant slew rate s gives r = s, so pns_limit is
+    the threshold for long ramps, while short ramps are filtered down.
+    The axes are combined as the root sum of squares.
+    """
+
+    g = np.asarray(g)
+    if np.iscomplexobj(g):
+        # (nt,) or (nwave, nt) complex to (nwave, nt, 2)
+        g = np.stack([g.real, g.imag], axis=-1).reshape(-1, g.shape[-1], 2)
+    g = np.asarray(g, dtype=float)
+    if g.ndim == 1:
+        g = g[None, :, None]
+    elif g.ndim == 2:
+        g = g[..., None]
+
+    s = np.diff(g, axis=1) / dt
+
+    def peak(w):
+        mag = np.abs(w) if per_axis else np.sqrt(np.sum(w * w, axis=-1))
+        return mag.reshape(len(w), -1).max(axis=1)
+
+    result = {
+        'g': peak(g),
+        's': peak(s),
+    }
+    result['g_margin'] = 1 - result['g'] / gmax
+    result['s_margin'] = 1 - result['s'] / smax
+    ok = (result['g_margin'] >= 0) & (result['s_margin'] >= 0)
+
+    if pns_limit is not None:
+        a = np.exp(-dt / tau)
+        r = lfilter([1 - a], [1, -a], s, axis=1)
+        result['pns'] = peak(r) / pns_limit
+        result['pns_margin'] = 1 - result['pns']
+        ok &= result['pns_margin'] >= 0
+
+    result['ok'] = ok
+    return result
+
+
+# Example usage and test
+if __name__ == "__main__":
+    import time
+
+    # Trapezoids on three axes with random ramps and amplitudes
+    rng = np.random.default_rng(0)
+    nwave, nt, dt = 5000, 1000, 4e-3
+    t = np.arange(nt) * dt
+    ramp = rng.uniform(0.1, 0.5, (nwave, 1, 3))
+    amp = rng.uniform(-4, 4, (nwave, 1, 3))
+    width = 2.0
+    g = amp * np.clip(np.minimum(t[None, :, None], width - t[None, :, None]) / ramp, 0, 1)
+
+    print("Testing gradcheck:")
+    t0 = time.time()
+    res = gradcheck(g, dt, gmax=5.0, smax=15.0, pns_limit=12.0, tau=0.36)
+    elapsed = time.time() - t0
+    print(f"{nwave} waveforms of {nt} x 3 samples in {elapsed * 1e3:.1f} ms "
+          f"({nwave / elapsed:.0f} per second)")
+    print(f"Pass: {np.sum(res['ok'])}, amplitude fails: {np.sum(res['g_margin'] < 0)}, "
+          f"slew fails: {np.sum(res['s_margin'] < 0)}, PNS fails: {np.sum(res['pns_margin'] < 0)}")
+
+    # Compare with the plain slew rate and with the convolution
+    i = 0
+    s = np.diff(g[i], axis=0) / dt
+    print(f"Slew peak matches: {np.isclose(res['s'][i], np.max(np.linalg.norm(s, axis=1)))}")
+    a = np.exp(-dt / 0.36)
+    kernel = (1 - a) * a**np.arange(nt)
+    r = np.stack([np.convolve(s[:, j], kernel)[:nt - 1] for j in range(3)], axis=1)
+    print(f"PNS matches convolution: {np.isclose(res['pns'][i], np.max(np.linalg.norm(r, axis=1)) / 12.0)}")
+
+    # A long ramp at the PNS limit is right at threshold
+    ramp_g = np.minimum(np.arange(2000) * dt * 12.0, 20.0)
+    print(f"Long ramp PNS level: {gradcheck(ramp_g, dt, 25.0, 15.0, pns_limit=12.0)['pns'][0]:.3f}")
@@ -1,20 +1,32 @@
+import itertools
+
 import numpy as np
 
-def ktog(k, dt):
+GAMMA = 4.257  # kHz/G
+
+
+def ktog(k, dt, axis=-1, gamma=GAMMA, out=None):
     """
     Convert k-space trajectory to gradient waveform.
     
     Parameters:
     -----------
     k : array_like
-        k-space trajectory
-    dt : float
-        time step (sampling interval)
+        k-space trajectory, or many of them with time along axis
+    dt : float or array_like
+        time step (sampling interval), or the nt - 1 intervals between
+        samples for a non-uniform raster
+    axis : int, optional
+        time axis of k
+    gamma : float, optional
+        gyromagnetic ratio in kHz/G
+    out : ndarray, optional
+        array of the shape of the result to write the gradient into
     
     Returns:
     --------
     g : ndarray
-        gradient waveform
+        gradient waveform, one sample shorter than k along axis
     
     The conversion uses the relationship: g = diff(k) / (4.257 * dt)
     where 4.257 is the gyromagnetic ratio for water in kHz/G
@@ -22,13 +34,104 @@ def ktog(k, dt):
     
     # Convert to numpy array
     k = np.asarray(k)
+    if not np.issubdtype(k.dtype, np.inexact):
+        k = k.astype(float)
+    axis = axis % k.ndim
     
-    # Compute gradient from k-space trajectory
-    g = np.diff(k) / (4.257 * dt)
+    # Compute gradient from k-space trajectory, in place in out
+    hi = [slice(None)] * k.ndim
+    lo = [slice(None)] * k.ndim
+    hi[axis] = slice(1, None)
+    lo[axis] = slice(None, -1)
+    g = np.subtract(k[tuple(hi)], k[tuple(lo)], out=out)
+    g /= gamma * _along(dt, axis, k.ndim)
     
     return g
 
 
+def ktog_stream(chunks, dt, axis=-1, gamma=GAMMA):
+    """
+    Convert a trajectory arriving in chunks along axis, yielding the
+    gradient of each chunk. The difference across each chunk boundary is
+    included, so the yielded gradients concatenate to ktog of the whole
+    trajectory.
+    
+    Parameters:
+    -----------
+    chunks : iterable of array_like
+        consecutive pieces of the trajectory along axis
+    dt : float or iterable of array_like
+        time step, or for a non-uniform raster the intervals of each chunk
+        in turn, one before each of its samples. The first chunk has one
+        fewer, its first sample having none before it. A scalar for a
+        chunk is the interval before each of its samples. dt must have
+        exactly one entry per chunk; a numeric array of intervals for the
+        whole trajectory is rejected with a ValueError.
+    """
+    for chunk, step in _joined(chunks, dt, axis, 1):
+        yield ktog(chunk, step, axis, gamma)
+
+
+def _joined(chunks, dt, axis, keep):
+    # Each chunk of a stream with the last keep samples before it, and
+    # its time step: dt for a uniform raster, otherwise the intervals of
+    # the carried and the new samples. Chunks too short for a result are
+    # carried whole into the next.
+    if isinstance(dt, np.ndarray) and dt.ndim > 0 and dt.dtype != object:
+        # The intervals of the whole trajectory rather than one entry per
+        # chunk, which would be read as a scalar for each chunk
+        raise ValueError("dt for a stream must be a scalar or have one entry per chunk, "
+                         f"not an array of shape {dt.shape}")
+    try:
+        steps = itertools.repeat(float(dt))
+        uniform = True
+    except TypeError:
+        steps = iter(dt)
+        uniform = False
+    
+    last, last_dt = None, np.empty(0)
+    for chunk in chunks:
+        chunk = np.asarray(chunk)
+        step = next(steps, None)
+        if step is None:
+            raise ValueError("dt has fewer entries than there are chunks")
+        
+        nnew = chunk.shape[axis] - (last is None)
+        if last is not None:
+            chunk = np.concatenate([last, chunk], axis=axis)
+        if not uniform:
+            step = np.asarray(step, dtype=float)
+            if step.ndim == 0:
+                step = np.full(max(nnew, 0), step)
+            if len(step) != max(nnew, 0):
+                raise ValueError(f"chunk has {max(nnew, 0)} new intervals, "
+                                 f"but {len(step)} were given in dt")
+            step = np.concatenate([last_dt, step])
+        
+        n = chunk.shape[axis]
+        if n <= keep:
+            if n:
+                last, last_dt = chunk, step
+            continue
+        yield chunk, step
+        last = np.take(chunk, range(n - keep, n), axis=axis)
+        if not uniform:
+            last_dt = step[len(step) - (keep - 1):]
+    
+    if not uniform and next(steps, None) is not None:
+        raise ValueError("dt has more entries than there are chunks")
+
+
+def _along(dt, axis, ndim):
+    # A scalar dt, or per interval dt shaped to broadcast along axis
+    dt = np.asarray(dt, dtype=float)
+    if dt.ndim == 0:
+        return dt
+    shape = [1] * ndim
+    shape[axis] = -1
+    return dt.reshape(shape)
+
+
 # Example usage and test
 if __name__ == "__main__":
     # Test with a simple k-space trajectory
@@ -52,4 +155,25 @@ if __name__ == "__main__":
     g2 = ktog(k, 0.05)
     print(f"Gradient with dt=0.05: {g2}")
     print(f"Max gradient: {np.max(np.abs(g2)):.3f} G/cm")
+    
+    # Many trajectories along axis 0, non-uniform raster, streaming
+    kk = np.stack([k, 2 * k, -k], axis=1)
+    g3 = ktog(kk, dt, axis=0)
+    print(f"\nAlong axis 0: {g3.shape}, matches: {np.allclose(g3[:, 1], ktog(2 * k, dt))}")
+    dts = np.full(len(k) - 1, dt)
+    buf = np.empty(len(k) - 1)
+    print(f"Per-sample dt into out: {np.allclose(ktog(k, dts, out=buf), g)}")
+    streamed = np.concatenate(list(ktog_stream([k[:3], k[3:4], k[4:]], dt)))
+    print(f"Streamed matches: {np.allclose(streamed, g)}")
+    dts = np.linspace(0.05, 0.15, len(k) - 1)
+    streamed = np.concatenate(list(ktog_stream([k[:3], k[3:4], k[4:]], [dts[:2], dts[2:3], dts[3:]])))
+    print(f"Streamed with per-chunk intervals matches: {np.allclose(streamed, ktog(k, dts))}")
+    
+    # dt entries that do not match the chunks
+    for bad in [dts, [dts[:2], dts[2:3]], [dts[:2], dts[2:3], dts[3:], dts[3:]]]:
+        try:
+            list(ktog_stream([k[:3], k[3:4], k[4:]], bad))
+            print("No error raised")
+        except ValueError as e:
+            print(f"ValueError: {e}")
 
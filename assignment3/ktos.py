@@ -1,38 +1,80 @@
 import numpy as np
+from ktog import ktog, GAMMA, _along, _joined
 
-def ktos(k, dt):
+
+def ktos(k, dt, axis=-1, gamma=GAMMA, out=None):
     """
     Convert k-space trajectory to slew rate (gradient derivative).
     
     Parameters:
     -----------
     k : array_like
-        k-space trajectory
-    dt : float
-        time step (sampling interval)
+        k-space trajectory, or many of them with time along axis
+    dt : float or array_like
+        time step (sampling interval), or the nt - 1 intervals between
+        samples for a non-uniform raster
+    axis : int, optional
+        time axis of k
+    gamma : float, optional
+        gyromagnetic ratio in kHz/G
+    out : ndarray, optional
+        array of the shape of the result to write the slew rate into
     
     Returns:
     --------
     s : ndarray
-        slew rate (gradient derivative)
+        slew rate (gradient derivative), two samples shorter than k
+        along axis
     
     The conversion uses the relationship: s = diff(diff(k) / (dt * 4.257)) / dt
-    where 4.257 is the gyromagnetic ratio for water in kHz/G
+    where 4.257 is the gyromagnetic ratio for water in kHz/G. On a
+    non-uniform raster each gradient sample is taken at the middle of its
+    interval, so the slew rate divides by the mean of adjacent intervals.
     """
     
     # Convert to numpy array
     k = np.asarray(k)
+    if not np.issubdtype(k.dtype, np.inexact):
+        k = k.astype(float)
+    axis = axis % k.ndim
     
-    # Compute slew rate from k-space trajectory
     # First compute gradient: g = diff(k) / (dt * 4.257)
-    g = np.diff(k) / (dt * 4.257)
+    g = ktog(k, dt, axis, gamma)
     
-    # Then compute slew rate: s = diff(g) / dt
-    s = np.diff(g) / dt
+    # Then compute slew rate: s = diff(g) / dt, in place in out
+    hi = [slice(None)] * k.ndim
+    lo = [slice(None)] * k.ndim
+    hi[axis] = slice(1, None)
+    lo[axis] = slice(None, -1)
+    s = np.subtract(g[tuple(hi)], g[tuple(lo)], out=out)
+    dt = np.asarray(dt, dtype=float)
+    if dt.ndim:
+        dt = 0.5 * (dt[1:] + dt[:-1])
+    s /= _along(dt, axis, k.ndim)
     
     return s
 
 
+def ktos_stream(chunks, dt, axis=-1, gamma=GAMMA):
+    """
+    Convert a trajectory arriving in chunks along axis, yielding the slew
+    rate of each chunk. The last two samples of each chunk are carried
+    into the next, so the yielded slew rates concatenate to ktos of the
+    whole trajectory.
+    
+    Parameters:
+    -----------
+    chunks : iterable of array_like
+        consecutive pieces of the trajectory along axis
+    dt : float or iterable of array_like
+        time step, or the intervals of each chunk in turn, as for
+        ktog_stream. The interval between the two carried samples is
+        carried with them.
+    """
+    for chunk, step in _joined(chunks, dt, axis, 2):
+        yield ktos(chunk, step, axis, gamma)
+
+
 # Example usage and test
 if __name__ == "__main__":
     # Test with a simple k-space trajectory
@@ -64,4 +106,17 @@ if __name__ == "__main__":
     s_manual = np.diff(g) / dt
     print(f"Slew rate from ktog + diff: {s_manual}")
     print(f"Results match: {np.allclose(s, s_manual)}")
+    
+    # Many trajectories along axis 0, non-uniform raster, streaming
+    kk = np.stack([k, 2 * k, -k], axis=1)
+    s3 = ktos(kk, dt, axis=0)
+    print(f"\nAlong axis 0: {s3.shape}, matches: {np.allclose(s3[:, 1], ktos(2 * k, dt))}")
+    dts = np.full(len(k) - 1, dt)
+    buf = np.empty(len(k) - 2)
+    print(f"Per-sample dt into out: {np.allclose(ktos(k, dts, out=buf), s)}")
+    streamed = np.concatenate(list(ktos_stream([k[:3], k[3:4], k[4:]], dt)))
+    print(f"Streamed matches: {np.allclose(streamed, s)}")
+    dts = np.linspace(0.05, 0.15, len(k) - 1)
+    streamed = np.concatenate(list(ktos_stream([k[:3], k[3:4], k[4:]], [dts[:2], dts[2:3], dts[3:]])))
+    print(f"Streamed with per-chunk intervals matches: {np.allclose(streamed, ktos(k, dts))}")
 
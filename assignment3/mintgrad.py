@@ -0,0 +1,254 @@
+import math
+
+import numpy as np
+from scipy.interpolate import CubicSpline, PPoly
+
+GAMMA = 4.257  # kHz/G
+OVERSAMPLE = 4
+
+
+def mintgrad(k, gmax, smax, dt=4e-3, n=None, g0=0.0, gfin=None):
+    """
+    Time-optimal gradient waveforms for k-space trajectories, under
+    gradient amplitude and slew rate limits.
+
+    Parameters:
+    -----------
+    k : array_like
+        k-space trajectory in cycles/cm. Complex for 2D trajectories,
+        shape (n,) or (ninterleaves, n), or real with the spatial axes
+        last, shape (n, d) or (ninterleaves, n, d).
+    gmax : float
+        maximum gradient, G/cm
+    smax : float
+        maximum slew rate, (G/cm)/ms
+    dt : float, optional
+        sample time of the output, ms. The duration is rounded up to a
+        whole number of samples, slowing the waveform slightly.
+    n : int, optional
+        number of output samples instead, with dt the duration / (n - 1)
+    g0 : float, optional
+        gradient magnitude at the start, G/cm
+    gfin : float, optional
+        gradient magnitude at the end, G/cm. By default it is free.
+        Interleaves that finish before the longest one end at rest
+        whatever gfin is.
+
+    Returns:
+    --------
+    k : ndarray
+        new k-space trajectory, with the time samples along the same axis
+        as the input. Interleaves that finish early come to rest and
+        are held at their last point.
+    g : ndarray
+        gradient, diff(k) / (gamma * dt), as ktog
+    s : ndarray
+        slew rate, diff(g) / dt, as ktos
+    dt : float
+        sample time, ms
+
+    A cubic spline through the points is sampled finely, and the path
+    through these samples gives the arc length and the curvature kappa.
+    Turns of more than a right angle between samples are cusps, taken
+    from rest. The speed along
+    the curve, v = gamma*|g|, is limited to gamma*gmax and, since the
+    normal acceleration is kappa*v^2, to sqrt(gamma*smax/kappa). A forward
+    pass from the start accelerates as fast as the slew rate left over
+    from the normal acceleration allows, and a backward pass from the end
+    decelerates the same way, the speed being the smaller of the two.
+    Both passes step along the curve, and are vectorized over interleaves.
+    The time of each arc length step follows from the speed, and the
+    trajectory is resampled uniformly in time.
+
+    After Lustig et al, A fast method for designing time-optimal gradient
+    waveforms for arbitrary k-space trajectories, IEEE TMI 2008.
+    """
+
+    k = np.asarray(k)
+    complex_k = np.iscomplexobj(k)
+
+    # Points as (ninterleaves, n, d) real vectors
+    if complex_k:
+        single = k.ndim == 1
+        kv = np.atleast_2d(k)
+        kv = np.stack([kv.real, kv.imag], axis=-1)
+    else:
+        kv = k.astype(float)
+        if kv.ndim == 1:
+            kv = kv[:, None]
+        single = kv.ndim == 2
+        if single:
+            kv = kv[None]
+
+    nint, npts, _ = kv.shape
+    if npts < 2:
+        raise ValueError("k must have at least 2 points")
+
+    # Steps along the curve, OVERSAMPLE per segment of the input, so that
+    # the steps are as fine as the input where it turns most sharply
+    ns = OVERSAMPLE * (npts - 1) + 1
+    splines = []
+    sgrid = np.empty((nint, ns))
+    kappa = np.empty((nint, ns))
+    cusp = np.zeros((nint, ns), dtype=bool)
+    ds = np.empty((nint, ns - 1))
+    for i in range(nint):
+        chord = np.concatenate([[0], np.cumsum(np.linalg.norm(np.diff(kv[i], axis=0), axis=1))])
+        keep = np.concatenate([[True], np.diff(chord) > 0])
+        spline = _spline(chord[keep], kv[i][keep])
+        sgrid[i] = np.interp(np.arange(ns) / OVERSAMPLE, np.arange(npts), chord)
+        splines.append(spline)
+
+        # Curvature as the turning angle of the tangent per unit length,
+        # which also covers a trajectory turning back on itself
+        seg = np.diff(spline(sgrid[i]), axis=0)
+        ds[i] = np.linalg.norm(seg, axis=1)
+        tangent = seg / np.maximum(ds[i], 1e-15)[:, None]
+        theta = np.arccos(np.clip(np.sum(tangent[1:] * tangent[:-1], axis=1), -1, 1))
+        kappa[i, 1:-1] = theta / np.maximum(0.5 * (ds[i, 1:] + ds[i, :-1]), 1e-15)
+        cusp[i, 1:-1] = theta > np.pi / 2
+        kappa[i, 0] = kappa[i, 1]
+        kappa[i, -1] = kappa[i, -2]
+
+    vg = GAMMA * gmax
+    sa = GAMMA * smax
+    umax = np.minimum(vg**2, sa / np.maximum(kappa, 1e-12))
+    # Turning by more than a right angle between steps is a cusp, which
+    # can only be taken from rest
+    umax[cusp] = 0
+
+    # Forward pass in squared speed, then backward
+    u0 = np.minimum((GAMMA * g0)**2, umax[:, 0])
+    uf = _pass(u0, umax, kappa, ds, sa)
+    uend = uf[:, -1] if gfin is None else np.minimum(uf[:, -1], (GAMMA * gfin)**2)
+
+    # Interleaves that finish before the longest one are held at their
+    # last point, so they come to rest there; stopping lengthens them, and
+    # may leave others finishing early, until every one is either the
+    # longest or at rest
+    rest = np.zeros(nint, dtype=bool)
+    while True:
+        u = _pass(np.where(rest, 0.0, uend), uf[:, ::-1], kappa[:, ::-1], ds[:, ::-1], sa)[:, ::-1]
+
+        # Time of each arc length step, at the mean speed across it
+        v = np.sqrt(u)
+        tstep = 2 * ds / np.maximum(v[:, 1:] + v[:, :-1], 1e-12)
+        t = np.concatenate([np.zeros((nint, 1)), np.cumsum(tstep, axis=1)], axis=1)
+        duration = t[:, -1].max()
+
+        early = (t[:, -1] < duration * (1 - 1e-9)) & ~rest
+        if not np.any(early):
+            break
+        rest |= early
+
+    if n is not None:
+        dt = duration / (n - 1)
+        nt = n
+    else:
+        # Enough samples to reach the end, the trajectory being slowed by
+        # less than one sample so that the last one lands on the end point
+        nt = max(int(np.ceil(duration / dt - 1e-9)) + 1, 2)
+    tout = np.linspace(0, duration, nt)
+
+    knew = np.empty((nint, nt, kv.shape[-1]))
+    for i in range(nint):
+        # Constant acceleration within each step
+        j = np.clip(np.searchsorted(t[i], tout, side='right') - 1, 0, ns - 2)
+        tau = np.minimum(tout - t[i, j], tstep[i, j])
+        acc = (u[i, j+1] - u[i, j]) / np.maximum(2 * ds[i, j], 1e-15)
+        frac = (v[i, j] * tau + 0.5 * acc * tau**2) / np.maximum(ds[i, j], 1e-15)
+        frac = np.clip(frac, 0, 1)
+        knew[i] = splines[i](sgrid[i, j] + frac * (sgrid[i, j+1] - sgrid[i, j]))
+
+    if complex_k:
+        knew = knew[..., 0] + 1j * knew[..., 1]
+    elif k.ndim == 1:
+        knew = knew[..., 0]
+    if single:
+        knew = knew[0]
+
+    # Time along the second to last axis for real vectors
+    taxis = -2 if (not complex_k and k.ndim > 1) else -1
+    g = np.diff(knew, axis=taxis) / (GAMMA * dt)
+    s = np.diff(g, axis=taxis) / dt
+
+    return knew, g, s, dt
+
+
+def _spline(chord, points):
+    # Cubic spline through points against chord length, in separate
+    # pieces between the cusps of the input, where it turns back by more
+    # than a right angle, so that the spline passes through the cusps
+    # rather than ringing around them
+    seg = np.diff(points, axis=0)
+    turn = np.sum(seg[1:] * seg[:-1], axis=1) < 0
+    ends = np.concatenate([[0], np.flatnonzero(turn) + 1, [len(points) - 1]])
+
+    pieces = [CubicSpline(chord[a:b + 1], points[a:b + 1], axis=0)
+              for a, b in zip(ends[:-1], ends[1:])]
+    if len(pieces) == 1:
+        return pieces[0]
+    c = np.concatenate([p.c for p in pieces], axis=1)
+    x = np.concatenate([pieces[0].x] + [p.x[1:] for p in pieces[1:]])
+    return PPoly(c, x)
+
+
+def _pass(u0, umax, kappa, ds, sa):
+    # u[j+1] = min(umax[j+1], u[j] + 2*ds[j]*a), with a the slew rate left
+    # for tangential acceleration at squared speed u[j] and curvature
+    # kappa[j]. a is then taken again at the faster end, u[j+1], where the
+    # normal acceleration is larger, so that the slew rate holds across
+    # the whole step. The recursion runs over steps and is vectorized over
+    # rows; a single row is stepped with floats, which is much faster than
+    # numpy calls on arrays of one element.
+    nint, ns = umax.shape
+    if nint == 1:
+        um, kap, d = umax[0].tolist(), kappa[0].tolist(), ds[0].tolist()
+        u = [float(u0[0])] * ns
+        sa2 = sa * sa
+        for j in range(ns - 1):
+            ku = kap[j] * u[j]
+            a = math.sqrt(sa2 - ku * ku) if ku < sa else 0.0
+            ku = kap[j] * min(um[j+1], u[j] + 2 * d[j] * a)
+            a = math.sqrt(sa2 - ku * ku) if ku < sa else 0.0
+            u[j+1] = min(um[j+1], u[j] + 2 * d[j] * a)
+        return np.array([u])
+
+    um, kap, d = umax.T.copy(), kappa.T.copy(), ds.T.copy()
+    u = np.empty((ns, nint))
+    u[0] = u0
+    for j in range(ns - 1):
+        a = np.sqrt(np.maximum(sa**2 - (kap[j] * u[j])**2, 0))
+        ku = kap[j] * np.minimum(um[j+1], u[j] + 2 * d[j] * a)
+        a = np.sqrt(np.maximum(sa**2 - ku**2, 0))
+        np.minimum(um[j+1], u[j] + 2 * d[j] * a, out=u[j+1])
+    return u.T
+
+
+# Example usage and test
+if __name__ == "__main__":
+    # Constant density spiral, 16 interleaves
+    nint = 16
+    t = np.linspace(0, 1, 4000)
+    kmax = 5.0  # cycles/cm
+    k = kmax * t * np.exp(2j * np.pi * 16 * t)
+    k = k[None, :] * np.exp(2j * np.pi * np.arange(nint) / nint)[:, None]
+    gmax = 4.0  # G/cm
+    smax = 15.0  # (G/cm)/ms
+
+    print("Testing mintgrad function:")
+    print(f"Spiral: {nint} interleaves of {k.shape[1]} points")
+
+    nk, g, s, dt = mintgrad(k, gmax, smax)
+    print(f"Output shape: {nk.shape}, dt = {dt} ms, duration {dt * (nk.shape[1] - 1):.3f} ms")
+    print(f"Max gradient: {np.max(np.abs(g)):.3f} G/cm (limit {gmax})")
+    print(f"Max slew rate: {np.max(np.abs(s)):.3f} (G/cm)/ms (limit {smax})")
+    print(f"End point error: {np.max(np.abs(nk[:, -1] - k[:, -1])):.2e}")
+
+    nk1, g1, s1, dt1 = mintgrad(k[0], gmax, smax)
+    print(f"Single interleave matches batch: {np.allclose(nk1, nk[0])}")
+
+    # Real 3D trajectory
+    k3 = np.stack([np.cos(2 * np.pi * t), np.sin(2 * np.pi * t), t], axis=-1)
+    nk3, g3, s3, dt3 = mintgrad(k3, gmax, smax)
+    print(f"3D output shape: {nk3.shape}, max slew rate {np.max(np.linalg.norm(s3, axis=-1)):.3f}")
@@ -0,0 +1,157 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.special import i0
+
+OVERSAMP = 2.0
+WIDTH = 4
+
+
+def pipedcf(k, fov=None, niter=10, tol=1e-3, workers=None):
+    """
+    Iterative density compensation of Pipe and Menon.
+
+    Parameters:
+    -----------
+    k : array_like
+        k-space points, (n, d) for d = 2 or 3, cycles/cm
+    fov : float, optional
+        field of view, cm, which sets the grid spacing to 1/(OVERSAMP*fov)
+        and the kernel to WIDTH grid cells across. By default 1/fov is
+        twice the mean spacing of the points over their bounding box.
+    niter : int, optional
+        maximum number of iterations
+    tol : float, optional
+        stop when C*w is within tol of 1 at every point
+    workers : int, optional
+        threads for the sparse products, default the number of cores
+
+    Returns:
+    --------
+    w : ndarray
+        (n,) weights, in the units of k^d. For Nyquist sampling these are
+        close to the Voronoi cell areas (volumes in 3D).
+
+    The weights are iterated as w <- w / (C*w), starting from ones, where
+    C is the convolution of the points with a kernel of unit integral.
+    C = G*G' for the sparse matrix G that interpolates from a Cartesian
+    grid onto the points with a separable Kaiser-Bessel kernel, so each
+    iteration is two sparse matrix products. The rows of G are split
+    into blocks that are multiplied in threads, scipy's sparse products
+    running without the GIL. The weights converge in a handful of
+    iterations. Unlike Voronoi cells they are finite at the edge of
+    k-space and are shared between repeated points.
+
+    After Pipe and Menon, Sampling density compensation in MRI: rationale
+    and an iterative numerical solution, MRM 1999.
+    """
+    k = np.asarray(k, dtype=float)
+    n, d = k.shape
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    lo = k.min(axis=0)
+    extent = np.maximum(k.max(axis=0) - lo, 1e-12)
+    if fov is None:
+        # Twice the mean spacing of the points, allowing for the gaps
+        # between the turns of spirals and the ends of spokes
+        fov = 0.5 * (n / np.prod(extent))**(1.0 / d)
+    h = 1.0 / (OVERSAMP * fov)
+
+    G = _interp_matrix((k - lo) / h, h, d)
+
+    # Row blocks, one per thread
+    nblocks = max(1, min(workers, n // 10000))
+    edges = np.linspace(0, n, nblocks + 1).astype(int)
+    blocks = [(G[a:b], G[a:b].T.tocsr(), a, b) for a, b in zip(edges[:-1], edges[1:])]
+    pool = ThreadPoolExecutor(max_workers=nblocks) if nblocks > 1 else None
+
+    def cw(w):
+        # C*w = G*(G'*w), block by block
+        if pool is None:
+            return G @ (G.T @ w)
+        u = sum(pool.map(lambda blk: blk[1] @ w[blk[2]:blk[3]], blocks))
+        return np.concatenate(list(pool.map(lambda blk: blk[0] @ u, blocks)))
+
+    try:
+        w = np.ones(n)
+        for _ in range(niter):
+            c = cw(w)
+            if np.max(np.abs(c - 1)) < tol:
+                break
+            w /= c
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return w
+
+
+def _kernel(u):
+    # Kaiser-Bessel of WIDTH grid cells at distance u, in cells, with the
+    # shape parameter of Beatty et al, IEEE TMI 2005
+    beta = np.pi * np.sqrt(WIDTH**2 / OVERSAMP**2 * (OVERSAMP - 0.5)**2 - 0.8)
+    x = np.clip(1 - (2 * u / WIDTH)**2, 0, None)
+    return np.where(np.abs(u) < WIDTH / 2, i0(beta * np.sqrt(x)), 0.0)
+
+
+def _interp_matrix(x, h, d):
+    # Sparse matrix of the kernel from grid points to the points x, in grid
+    # units, with a column for each grid point that some point touches. The
+    # kernel is scaled so that the convolution G*G'
+    # has unit integral over k, (integral of kernel)^2 / h^d = 1, the
+    # integral of the separable kernel being that of one axis to the d.
+    n = len(x)
+    # The kernel is zero at the ends, so the sum is the trapezoidal rule
+    u, du = np.linspace(-WIDTH / 2, WIDTH / 2, 2001, retstep=True)
+    integral = np.sum(_kernel(u)) * du * h
+    scale = h**(d / 2) / integral**d
+
+    # Grid indices shifted so that all are within 0..dims-1
+    dims = np.ceil(x.max(axis=0)).astype(int) + 2 * WIDTH
+    base = np.floor(x).astype(int) - WIDTH // 2 + 1
+    offsets = np.stack(np.meshgrid(*[np.arange(WIDTH)] * d, indexing='ij'), axis=-1).reshape(-1, d)
+
+    # Grid point and kernel value of each point and offset, (n, WIDTH^d)
+    cols = np.zeros((n, len(offsets)), dtype=np.int64)
+    vals = np.full((n, len(offsets)), scale)
+    for axis in range(d):
+        g = base[:, axis:axis + 1] + offsets[None, :, axis]
+        cols = cols * dims[axis] + (g + WIDTH)
+        vals *= _kernel(x[:, axis:axis + 1] - g)
+
+    # Only the grid points in use, which for 3D trajectories are a small
+    # part of the bounding box
+    used, cols = np.unique(cols.ravel(), return_inverse=True)
+    rows = np.repeat(np.arange(n), len(offsets))
+    return sp.csr_matrix((vals.ravel(), (rows, cols.ravel())),
+                         shape=(n, len(used)))
+
+
+# Example usage and test
+if __name__ == "__main__":
+    import time
+    from voronoidens import voronoidens
+
+    # Spiral, 8 interleaves of 8 turns, sampled at Nyquist for a 12.8 cm
+    # FOV
+    nint, nt = 8, 4000
+    t = np.linspace(0, 1, nt)
+    kmax = 5.0
+    k = kmax * t * np.exp(2j * np.pi * 8 * t)
+    k = (k[None, :] * np.exp(2j * np.pi * np.arange(nint) / nint)[:, None]).ravel()
+    pts = np.column_stack([k.real, k.imag])
+
+    print("Testing pipedcf function:")
+    t0 = time.time()
+    w = pipedcf(pts, fov=12.8)
+    print(f"{len(pts)} points in {time.time() - t0:.2f} s, all finite: {np.all(np.isfinite(w))}")
+
+    # Compared with the Voronoi areas, away from the center and the edge
+    area = voronoidens(k.real, k.imag)
+    r = np.abs(k)
+    sel = (r > 1) & (r < 4) & np.isfinite(area)
+    print(f"Median ratio to Voronoi areas: {np.median(w[sel] / area[sel]):.3f}")
+    print(f"Total weight {np.sum(w):.2f}, disc area {np.pi * kmax**2:.2f}")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test suite for the batch gradient limit check:
+- gradcheck.py (amplitude, slew rate and PNS limits)
+"""
+
+import numpy as np
+from gradcheck import gradcheck
+
+
+def trapezoid(amp, ramp, dt, nt, width=2.0):
+    t = np.arange(nt) * dt
+    return amp * np.clip(np.minimum(t, width - t) / ramp, 0, 1)
+
+
+def test_shapes():
+    """Test the single, complex and batched forms of the input"""
+    print("=" * 60)
+    print("Testing gradcheck input shapes")
+    print("=" * 60)
+
+    dt, nt = 4e-3, 600
+    gmax, smax = 5.0, 15.0
+
+    # Test 1: One real waveform, one axis
+    g = trapezoid(3.0, 0.25, dt, nt)
+    res = gradcheck(g, dt, gmax, smax)
+    print(f"Test 1 - Real 1D:")
+    print(f"Waveforms: {len(res['ok'])} (expected 1)")
+    print(f"Peak gradient: {res['g'][0]:.3f} G/cm (expected 3.000)")
+    print(f"Peak slew rate: {res['s'][0]:.3f} (G/cm)/ms (expected {3.0 / 0.25:.3f})")
+    print(f"Within limits: {res['ok'][0]}")
+    print()
+
+    # Test 2: One complex waveform is a single 2D waveform, not nt
+    # waveforms of two samples
+    gc = trapezoid(3.0, 0.25, dt, nt) * np.exp(1j * np.pi / 3)
+    resc = gradcheck(gc, dt, gmax, smax)
+    print(f"Test 2 - Complex 1D:")
+    print(f"Waveforms: {len(resc['ok'])} (expected 1)")
+    print(f"Same peaks as the real waveform: "
+          f"{np.allclose(resc['g'], res['g']) and np.allclose(resc['s'], res['s'])}")
+    print()
+
+    # Test 3: A batch, complex (nwave, nt) against real (nwave, nt, 2),
+    # with one waveform over each limit
+    amp = np.array([3.0, 6.0, 3.0])
+    ramp = np.array([0.25, 0.5, 0.1])
+    gb = trapezoid(amp[:, None], ramp[:, None], dt, nt) * np.exp(1j * np.pi / 4)
+    resb = gradcheck(gb, dt, gmax, smax)
+    resv = gradcheck(np.stack([gb.real, gb.imag], axis=-1), dt, gmax, smax)
+    print(f"Test 3 - Batch:")
+    print(f"Pass: {resb['ok']} (expected [True False False])")
+    print(f"Amplitude fails: {resb['g_margin'] < 0}, slew fails: {resb['s_margin'] < 0}")
+    print(f"Complex matches real axes: "
+          f"{all(np.allclose(resb[key], resv[key]) for key in ('g', 's'))}")
+    per_axis = gradcheck(np.stack([gb.real, gb.imag], axis=-1), dt, gmax, smax, per_axis=True)
+    print(f"Per axis peak is the magnitude over sqrt(2): "
+          f"{np.allclose(per_axis['g'], resb['g'] / np.sqrt(2))}")
+    print()
+
+
+def test_pns():
+    """Test the PNS filter against long and short ramps"""
+    print("=" * 60)
+    print("Testing gradcheck PNS model")
+    print("=" * 60)
+
+    dt = 4e-3
+
+    # Test 1: A ramp much longer than tau reaches the PNS limit
+    g = np.minimum(np.arange(2000) * dt * 12.0, 20.0)
+    res = gradcheck(g, dt, 25.0, 15.0, pns_limit=12.0, tau=0.36)
+    print(f"Test 1 - Long ramp:")
+    print(f"PNS level: {res['pns'][0]:.3f} (expected close to 1)")
+    print()
+
+    # Test 2: A short ramp at the same slew rate is filtered down
+    g = np.minimum(np.arange(200) * dt * 12.0, 1.2)
+    res = gradcheck(g, dt, 25.0, 15.0, pns_limit=12.0, tau=0.36)
+    print(f"Test 2 - Short ramp of 0.1 ms:")
+    print(f"PNS level: {res['pns'][0]:.3f} (expected 1 - exp(-0.1/0.36) = "
+          f"{1 - np.exp(-0.1 / 0.36):.3f})")
+    print()
+
+    # Test 3: Matches the convolution with exp(-t/tau)/tau, for noisy
+    # ramps below and above the PNS limit
+    rng = np.random.default_rng(0)
+    slew = np.array([[10.0], [14.0]]) + rng.standard_normal((2, 500)) + 1j * rng.standard_normal((2, 500))
+    gc = np.cumsum(slew, axis=1) * dt
+    res = gradcheck(gc, dt, 25.0, 1e3, pns_limit=12.0, tau=0.36)
+    a = np.exp(-dt / 0.36)
+    kernel = (1 - a) * a**np.arange(500)
+    s = np.diff(gc, axis=1) / dt
+    r = np.array([np.convolve(w, kernel)[:499] for w in s])
+    print(f"Test 3 - Convolution:")
+    print(f"PNS matches convolution: {np.allclose(res['pns'], np.max(np.abs(r), axis=1) / 12.0)}")
+    print(f"PNS fails: {res['pns_margin'] < 0} (expected [False True])")
+    print()
+
+
+if __name__ == "__main__":
+    test_shapes()
+    test_pns()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test suite for the rotated interleaves of one trajectory:
+- interleaves.py (Interleaves, designed once with mintgrad)
+"""
+
+import numpy as np
+import interleaves
+from interleaves import Interleaves
+from mintgrad import mintgrad
+from ktog import ktog
+from ktos import ktos
+
+
+def base_spiral(nt=2000, kmax=5.0, nturns=8):
+    t = np.linspace(0, 1, nt)
+    return kmax * t * np.exp(2j * np.pi * nturns * t)
+
+
+def test_interleaves():
+    """Test the rotated interleaves against separately designed ones"""
+    print("=" * 60)
+    print("Testing Interleaves (rotated copies of one design)")
+    print("=" * 60)
+
+    gmax = 4.0  # G/cm
+    smax = 15.0  # (G/cm)/ms
+    nint = 8
+    base = base_spiral()
+
+    # Test 1: The base is designed once, however the interleaves are used
+    calls = []
+
+    def counted(*args, **kwargs):
+        calls.append(args)
+        return mintgrad(*args, **kwargs)
+
+    interleaves.mintgrad = counted
+    try:
+        il = Interleaves(base, nint, gmax, smax)
+        k, g, s = il.k, il.g, il.s
+        rows = [il[m] for m in range(nint)] + list(il) + [il[1:3], il.k]
+    finally:
+        interleaves.mintgrad = mintgrad
+    print(f"Test 1 - One design:")
+    print(f"mintgrad calls: {len(calls)} (expected 1)")
+    print(f"Stack kept between uses: {il.k is k}")
+    print(f"Shapes: k {k.shape}, g {g.shape}, s {s.shape}")
+    print()
+
+    # Test 2: Every interleave matches its own mintgrad design
+    err = 0.0
+    same_length = True
+    for m in range(nint):
+        km, gm, sm, dtm = mintgrad(il.rotations[m] * base, gmax, smax)
+        same_length &= len(km) == il.nt and dtm == il.dt
+        if len(km) == il.nt:
+            err = max(err, np.max(np.abs(km - il[m])), np.max(np.abs(gm - il.g[m])))
+    print(f"Test 2 - Separate designs:")
+    print(f"Same length and dt: {same_length}")
+    print(f"Max difference in k and g: {err:.1e}")
+    print(f"Rotated interleaves match separate designs: {same_length and err < 1e-6}")
+    print()
+
+    # Test 3: The stack agrees with ktog and ktos, and within the limits
+    print(f"Test 3 - Gradients of the stack:")
+    print(f"g matches ktog: {np.allclose(ktog(il.k, il.dt), il.g)}")
+    print(f"s matches ktos: {np.allclose(ktos(il.k, il.dt), il.s)}")
+    print(f"Indexing and iteration match the stack: "
+          f"{all(np.allclose(r, il.k[m % nint]) for m, r in enumerate(rows[:2 * nint]))}")
+    print(f"Max gradient: {np.max(np.abs(il.g)):.3f} G/cm (limit: {gmax})")
+    print(f"Max slew rate: {np.max(np.abs(il.s)):.3f} (G/cm)/ms (limit: {smax})")
+    print()
+
+    # Test 4: Density compensation of all interleaves together
+    area = il.density()
+    print(f"Test 4 - Density:")
+    print(f"Density shape: {area.shape} (expected {(nint, il.nt)})")
+    # The cells of the outermost samples are open, and infinite
+    closed = np.isfinite(area).all(axis=0)
+    print(f"Closed cells per interleave: {np.sum(closed)} of {il.nt}")
+    print(f"Same density on every interleave: {np.allclose(area[:, closed], area[0, closed])}")
+    print()
+
+
+def test_errors():
+    """Test the checks on the base trajectory"""
+    print("=" * 60)
+    print("Testing Interleaves argument checks")
+    print("=" * 60)
+
+    base = base_spiral(nt=200)
+    cases = {
+        'real base': lambda: Interleaves(base.real, 4),
+        '2D base': lambda: Interleaves(base[None], 4),
+        'no nint or angles': lambda: Interleaves(base),
+        'gmax without smax': lambda: Interleaves(base, 4, gmax=4.0),
+    }
+    for i, (name, make) in enumerate(cases.items()):
+        try:
+            make()
+            print(f"Test {i + 1} - {name}: no error raised")
+        except ValueError as e:
+            print(f"Test {i + 1} - {name}: ValueError: {e}")
+    print()
+
+
+if __name__ == "__main__":
+    test_interleaves()
+    test_errors()
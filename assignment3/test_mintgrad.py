@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test suite for the time-optimal gradient design:
+- mintgrad.py (time-optimal gradients under amplitude and slew limits)
+- csg.py, which resamples the mintgrad result to the input length
+"""
+
+import numpy as np
+from mintgrad import mintgrad
+from csg import csg
+from ktog import ktog
+from ktos import ktos
+
+
+def spiral(nint=1, nt=4000, kmax=5.0, nturns=16):
+    t = np.linspace(0, 1, nt)
+    k = kmax * t * np.exp(2j * np.pi * nturns * t)
+    return k[None, :] * np.exp(2j * np.pi * np.arange(nint) / nint)[:, None]
+
+
+def test_mintgrad():
+    """Test the mintgrad function on spirals and a 3D trajectory"""
+    print("=" * 60)
+    print("Testing mintgrad function (time-optimal gradients)")
+    print("=" * 60)
+
+    gmax = 4.0  # G/cm
+    smax = 15.0  # (G/cm)/ms
+
+    # Test 1: The end point is reached on a whole sample
+    k = spiral(nint=4)
+    nk, g, s, dt = mintgrad(k, gmax, smax)
+
+    print(f"Test 1 - End point:")
+    print(f"Output shape: {nk.shape}, dt = {dt} ms")
+    print(f"End point error: {np.max(np.abs(nk[:, -1] - k[:, -1])):.2e}")
+    print(f"End point reached: {np.allclose(nk[:, -1], k[:, -1])}")
+    print(f"Start point kept: {np.allclose(nk[:, 0], k[:, 0])}")
+    print()
+
+    # Test 2: The limits hold, and are reached
+    print(f"Test 2 - Limits:")
+    print(f"Max gradient: {np.max(np.abs(g)):.3f} G/cm (limit: {gmax})")
+    print(f"Max slew rate: {np.max(np.abs(s)):.3f} (G/cm)/ms (limit: {smax})")
+    print(f"Gradient constraint satisfied: {np.max(np.abs(g)) <= gmax * 1.001}")
+    print(f"Slew rate constraint satisfied: {np.max(np.abs(s)) <= smax * 1.001}")
+    print(f"Gradient and slew rate match ktog and ktos: "
+          f"{np.allclose(g, ktog(nk, dt, axis=1)) and np.allclose(s, ktos(nk, dt, axis=1))}")
+    print()
+
+    # Test 3: Given a number of samples instead of dt
+    nk3, g3, s3, dt3 = mintgrad(k[0], gmax, smax, n=1000)
+    print(f"Test 3 - Number of samples:")
+    print(f"Output length: {len(nk3)} (expected 1000), dt = {dt3:.6f} ms")
+    print(f"Same duration as with dt: {np.isclose(dt3 * 999, dt * (nk.shape[1] - 1), rtol=1e-3)}")
+    print(f"End point reached: {np.isclose(nk3[-1], k[0, -1])}")
+    print()
+
+    # Test 4: Single interleave matches the batch
+    nk4, _, _, _ = mintgrad(k[1], gmax, smax)
+    print(f"Test 4 - Single interleave:")
+    print(f"Matches batch: {np.allclose(nk4, nk[1])}")
+    print()
+
+    # Test 5: Real 3D trajectory, whose duration is not a whole number of
+    # samples
+    t = np.linspace(0, 1, 4000)
+    k5 = np.stack([np.cos(2 * np.pi * t), np.sin(2 * np.pi * t), t], axis=-1)
+    nk5, g5, s5, dt5 = mintgrad(k5, gmax, smax, dt=0.01)
+    print(f"Test 5 - 3D helix:")
+    print(f"Output shape: {nk5.shape}")
+    print(f"End point reached: {np.allclose(nk5[-1], k5[-1])}")
+    print(f"Max slew rate: {np.max(np.linalg.norm(s5, axis=-1)):.3f} (G/cm)/ms (limit: {smax})")
+    print()
+
+    # Test 6: A batch of different lengths, where the shorter interleave
+    # comes to rest before it is held at its end point
+    k6 = np.concatenate([spiral(nt=2000, nturns=8), spiral(nt=2000, nturns=16)])
+    nk6, g6, s6, dt6 = mintgrad(k6, gmax, smax)
+    slew = np.max(np.abs(np.diff(g6, axis=1)), axis=1) / dt6
+    print(f"Test 6 - Batch of unequal lengths:")
+    print(f"Max slew rate of each interleave: {np.round(slew, 3)} (G/cm)/ms (limit: {smax})")
+    print(f"Slew rate constraint satisfied by every interleave: {np.all(slew <= smax * 1.001)}")
+    print(f"Shorter interleave held at rest: {np.abs(g6[0, -1]) < 1e-6}")
+    print(f"End points reached: {np.allclose(nk6[:, -1], k6[:, -1])}")
+    print()
+
+
+def test_csg():
+    """Test that csg, which routes through mintgrad, ends on the trajectory"""
+    print("=" * 60)
+    print("Testing csg function (constraint-satisfying gradient)")
+    print("=" * 60)
+
+    k = spiral(nt=2000)[0]
+    nk, dt = csg(k, 4.0, 15.0)
+
+    print(f"Test 1 - Spiral:")
+    print(f"Output length: {len(nk)} (expected {len(k)}), dt = {dt:.6f} ms")
+    print(f"End point reached: {np.isclose(nk[-1], k[-1])}")
+    print(f"Max gradient: {np.max(np.abs(ktog(nk, dt))):.3f} G/cm (limit: 4.0)")
+    print(f"Max slew rate: {np.max(np.abs(ktos(nk, dt))):.3f} (G/cm)/ms (limit: 15.0)")
+    print()
+
+
+if __name__ == "__main__":
+    test_mintgrad()
+    test_csg()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test suite for the closed form trajectories:
+- trajectories.py (spiral, vdspiral, rosette, radial, epi, cones)
+"""
+
+import numpy as np
+from trajectories import spiral, vdspiral, rosette, radial, epi, cones
+from ktog import ktog
+
+
+def midpoint_error(k, g, dt):
+    # The analytic gradient averaged over each interval against ktog,
+    # relative to the largest gradient
+    gm = 0.5 * (g[:, 1:] + g[:, :-1])
+    gn = ktog(k, dt, axis=1)
+    return np.max(np.abs(gm - gn)) / np.max(np.abs(gn))
+
+
+def test_gradients():
+    """Test the analytic gradients against ktog of the trajectories"""
+    print("=" * 60)
+    print("Testing analytic gradients against ktog")
+    print("=" * 60)
+
+    # Smooth trajectories, sampled finely enough that the midpoint rule is
+    # accurate to well under a percent
+    dt = 10.0 / 3999
+    cases = {
+        'spiral': spiral(5.0, 16, 4000, nint=4, T=10.0),
+        'spiral inward': spiral(5.0, 16, 4000, T=10.0, inward=True),
+        'vdspiral': vdspiral(5.0, 16, 4000, nint=4, T=10.0, alpha=1.5),
+        'vdspiral alpha=3': vdspiral(5.0, 16, 4000, T=10.0, alpha=3.0),
+        'rosette': rosette(5.0, 8, 7, 4000, nint=3, T=10.0),
+        'cones': cones(5.0, 8, np.pi / 4, 4000, nint=4, T=10.0),
+    }
+    for i, (name, (k, g)) in enumerate(cases.items()):
+        err = midpoint_error(k, g, dt)
+        print(f"Test {i + 1} - {name}:")
+        print(f"k shape: {k.shape}, max |g|: {np.max(np.abs(g)):.3f} G/cm")
+        print(f"Max difference from ktog: {err:.1e}")
+        print(f"Gradient matches ktog: {err < 1e-3}")
+        print()
+
+    # Constant gradients are exact
+    k, g = radial(5.0, 32, 256, T=2.0)
+    print(f"Test {len(cases) + 1} - radial:")
+    print(f"Gradient matches ktog: {np.allclose(g[:, 1:], ktog(k, 2.0 / 255, axis=1))}")
+    print()
+
+    # epi within each line, away from the turns where the gradient jumps
+    k, g = epi(5.0, 16, 4096, nint=2, T=10.0)
+    gn = ktog(k, 10.0 / 4095, axis=1)
+    same = np.isclose(g[:, 1:], g[:, :-1])
+    print(f"Test {len(cases) + 2} - epi:")
+    print(f"Gradient matches ktog along the lines: {np.allclose(gn[same], g[:, 1:][same])}")
+    print()
+
+
+def test_vdspiral_alpha():
+    """Test the variable density exponent at the center"""
+    print("=" * 60)
+    print("Testing vdspiral exponent")
+    print("=" * 60)
+
+    # Test 1: alpha = 1 is the spiral
+    k1, g1 = vdspiral(5.0, 8, 100, alpha=1.0)
+    k2, g2 = spiral(5.0, 8, 100)
+    print(f"Test 1 - alpha = 1:")
+    print(f"Matches spiral: {np.allclose(k1, k2) and np.allclose(g1, g2)}")
+    print()
+
+    # Test 2: The gradient at the center is finite for alpha >= 1
+    _, g = vdspiral(5.0, 8, 100, alpha=1.5)
+    print(f"Test 2 - alpha = 1.5:")
+    print(f"Gradient finite: {np.all(np.isfinite(g))}, at the center: {abs(g[0, 0]):.3f} G/cm")
+    print()
+
+    # Test 3: alpha < 1 would need an infinite gradient at the center
+    print(f"Test 3 - alpha = 0.5:")
+    try:
+        vdspiral(5.0, 8, 100, alpha=0.5)
+        print("No error raised")
+    except ValueError as e:
+        print(f"ValueError: {e}")
+    print()
+
+
+if __name__ == "__main__":
+    test_gradients()
+    test_vdspiral_alpha()
@@ -0,0 +1,256 @@
+import numpy as np
+from cache import cached
+from ktog import GAMMA
+
+# Closed form k-space trajectories with their analytic gradients.
+#
+# Every generator samples nt points over a duration T in ms and returns
+#   k - cycles/cm, complex (nint, nt) for 2D trajectories or real
+#       (nint, nt, 3) for 3D ones
+#   g - G/cm, dk/dt / gamma at the same samples
+# Interleaves are rotations of the first, exp(2j*pi*m/nint), so a whole
+# family is one broadcast expression with no per-sample Python. With the
+# cache turned on (cache_config(enabled=True)) results are kept per
+# parameter set, so design sweeps that revisit a trajectory do not
+# rebuild it. The natural parametrization is not
+# constrained; pass k through csg or mintgrad to meet gradient limits.
+
+
+def _tau(nt, T, inward=False):
+    # Normalized time 0..1 and the time scale d(tau)/dt
+    tau = np.linspace(0, 1, nt)
+    if inward:
+        return 1 - tau, -1.0 / T
+    return tau, 1.0 / T
+
+
+def _rotations(nint):
+    return np.exp(2j * np.pi * np.arange(nint) / nint)[:, None]
+
+
+@cached
+def spiral(kmax, nturns, nt, nint=1, T=1.0, inward=False):
+    """
+    Archimedean spiral, k = kmax*tau*exp(2j*pi*nturns*tau).
+
+    Parameters:
+    -----------
+    kmax : float
+        maximum k, cycles/cm
+    nturns : float
+        turns per interleave
+    nt : int
+        samples per interleave
+    nint : int, optional
+        number of interleaves
+    T : float, optional
+        duration, ms
+    inward : bool, optional
+        traverse from kmax to the center, tau = 1 - t/T, as for
+        excitation
+
+    Returns:
+    --------
+    k : ndarray
+        (nint, nt) complex trajectory, cycles/cm
+    g : ndarray
+        (nint, nt) complex gradient, G/cm
+    """
+    return vdspiral(kmax, nturns, nt, nint, T, 1.0, inward)
+
+
+@cached
+def vdspiral(kmax, nturns, nt, nint=1, T=1.0, alpha=2.0, inward=False):
+    """
+    Variable density spiral, k = kmax*tau^alpha*exp(2j*pi*nturns*tau).
+    alpha > 1 samples the center more densely, alpha = 1 is spiral.
+    alpha < 1 is rejected, as the gradient would be infinite at the
+    center.
+
+    Parameters and returns are as for spiral.
+    """
+    if alpha < 1:
+        raise ValueError(f"alpha must be at least 1, got {alpha}")
+    tau, rate = _tau(nt, T, inward)
+    w = 2 * np.pi * nturns
+    e = np.exp(1j * w * tau)
+    r = tau**alpha
+    dr = alpha * tau**(alpha - 1) if alpha != 1 else np.ones_like(tau)
+
+    k = kmax * r * e
+    dk = kmax * (dr + 1j * w * r) * e * rate
+
+    rot = _rotations(nint)
+    return rot * k, rot * dk / GAMMA
+
+
+@cached
+def rosette(kmax, f1, f2, nt, nint=1, T=1.0):
+    """
+    Rosette, k = kmax*cos(2*pi*f1*tau)*exp(2j*pi*f2*tau).
+
+    Parameters:
+    -----------
+    kmax : float
+        maximum k, cycles/cm
+    f1, f2 : float
+        radial and angular frequencies, in cycles per trajectory
+    nt, nint, T :
+        as for spiral
+
+    Returns:
+    --------
+    k, g : ndarray
+        as for spiral
+    """
+    tau, rate = _tau(nt, T)
+    w1 = 2 * np.pi * f1
+    w2 = 2 * np.pi * f2
+    e = np.exp(1j * w2 * tau)
+
+    k = kmax * np.cos(w1 * tau) * e
+    dk = kmax * (-w1 * np.sin(w1 * tau) + 1j * w2 * np.cos(w1 * tau)) * e * rate
+
+    rot = _rotations(nint)
+    return rot * k, rot * dk / GAMMA
+
+
+@cached
+def radial(kmax, nspokes, nt, T=1.0, full=True):
+    """
+    Radial spokes at constant gradient.
+
+    Parameters:
+    -----------
+    kmax : float
+        maximum k, cycles/cm
+    nspokes : int
+        number of spokes
+    nt : int
+        samples per spoke
+    T : float, optional
+        duration of a spoke, ms
+    full : bool, optional
+        spokes cross the center from -kmax to kmax, at angles pi*m/nspokes.
+        Otherwise they run out from the center, at angles 2*pi*m/nspokes.
+
+    Returns:
+    --------
+    k, g : ndarray
+        (nspokes, nt) complex trajectory and gradient
+    """
+    tau, rate = _tau(nt, T)
+    m = np.arange(nspokes)[:, None]
+    if full:
+        rot = np.exp(1j * np.pi * m / nspokes)
+        k = kmax * (2 * tau - 1)
+        dk = np.full(nt, 2 * kmax * rate)
+    else:
+        rot = np.exp(2j * np.pi * m / nspokes)
+        k = kmax * tau
+        dk = np.full(nt, kmax * rate)
+    return rot * k, rot * dk / GAMMA
+
+
+@cached
+def epi(kmax, nlines, nt, nint=1, T=1.0):
+    """
+    Zig-zag echo planar trajectory, with a constant phase encode gradient.
+    kx sweeps back and forth between -kmax and kmax nlines times while
+    ky rises steadily from -kmax to kmax. Interleaves are shifted in ky by
+    a fraction of a line.
+
+    Parameters:
+    -----------
+    kmax : float
+        maximum k, cycles/cm
+    nlines : int
+        number of readout lines per interleave
+    nt, nint, T :
+        as for spiral
+
+    Returns:
+    --------
+    k, g : ndarray
+        (nint, nt) complex trajectory and gradient
+    """
+    tau, rate = _tau(nt, T)
+    phase = (tau * nlines) % 2
+    kx = kmax * np.where(phase < 1, 2 * phase - 1, 3 - 2 * phase)
+    dkx = np.where(phase < 1, 1.0, -1.0) * 2 * kmax * nlines * rate
+
+    dky_line = 2 * kmax / nlines
+    shift = dky_line * np.arange(nint)[:, None] / nint
+    ky = -kmax + 2 * kmax * tau + shift
+    dky = 2 * kmax * rate
+
+    k = kx + 1j * ky
+    dk = np.broadcast_to(dkx + 1j * dky, k.shape)
+    return k, dk / GAMMA
+
+
+@cached
+def cones(kmax, nturns, theta, nt, nint=1, T=1.0):
+    """
+    3D cone, a spiral on a cone of half angle theta about kz.
+
+    Parameters:
+    -----------
+    kmax : float
+        maximum |k|, cycles/cm
+    nturns : float
+        turns per interleave
+    theta : float
+        half angle of the cone, radians
+    nt, nint, T :
+        as for spiral, the interleaves being rotated about kz
+
+    Returns:
+    --------
+    k, g : ndarray
+        (nint, nt, 3) real trajectory, cycles/cm, and gradient, G/cm
+    """
+    tau, rate = _tau(nt, T)
+    w = 2 * np.pi * nturns
+    phi = w * tau + 2 * np.pi * np.arange(nint)[:, None] / nint
+    st, ct = np.sin(theta), np.cos(theta)
+
+    k = kmax * tau[..., None] * np.stack(
+        [st * np.cos(phi), st * np.sin(phi), ct * np.ones_like(phi)], axis=-1)
+    dk = kmax * rate * np.stack(
+        [st * (np.cos(phi) - w * tau * np.sin(phi)),
+         st * (np.sin(phi) + w * tau * np.cos(phi)),
+         ct * np.ones_like(phi)], axis=-1)
+    return k, dk / GAMMA
+
+
+# Example usage and test
+if __name__ == "__main__":
+    from ktog import ktog
+
+    print("Testing trajectory generators:")
+    # Each case with its sample time, T / (nt - 1)
+    cases = {
+        'spiral': (lambda: spiral(5.0, 16, 4000, nint=4, T=10.0), 10.0 / 3999),
+        'spiral in': (lambda: spiral(5.0, 16, 4000, T=10.0, inward=True), 10.0 / 3999),
+        'vdspiral': (lambda: vdspiral(5.0, 16, 4000, nint=4, T=10.0, alpha=1.5), 10.0 / 3999),
+        'rosette': (lambda: rosette(5.0, 8, 7, 4000, nint=3, T=10.0), 10.0 / 3999),
+        'radial': (lambda: radial(5.0, 32, 256, T=2.0), 2.0 / 255),
+        'epi': (lambda: epi(5.0, 16, 4096, nint=2, T=10.0), 10.0 / 4095),
+        'cones': (lambda: cones(5.0, 8, np.pi / 4, 4000, nint=4, T=10.0), 10.0 / 3999),
+    }
+    for name, (make, dt) in cases.items():
+        k, g = make()
+        # The analytic gradient at the interval midpoints is close to ktog,
+        # except across the turns of epi, where it jumps
+        gm = 0.5 * (g[:, 1:] + g[:, :-1])
+        gn = ktog(k, dt, axis=1)
+        err = np.median(np.abs(gm - gn)) / np.max(np.abs(gn))
+        print(f"{name:10s} k {k.shape}, max |g| {np.max(np.abs(g)):.3f} G/cm, "
+              f"median difference from ktog {err:.1e}")
+
+    from cache import cache_config
+    cache_config(enabled=True)
+    k1, _ = spiral(5.0, 16, 4000, nint=4, T=10.0)
+    k2, _ = spiral(5.0, 16, 4000, nint=4, T=10.0)
+    print(f"Cached call returns the same trajectory: {np.array_equal(k1, k2)}")
@@ -1,21 +1,55 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
-from scipy.spatial import Voronoi
+from scipy.spatial import ConvexHull, Voronoi, cKDTree
 import matplotlib.pyplot as plt
+from cache import cached
+from pipedcf import pipedcf
 
-def voronoidens(kx, ky):
+@cached
+def voronoidens(kx, ky, kz=None, method='voronoi', ntiles=None, workers=None,
+                kmax=None, batch=100000, fov=None, niter=10):
     """
-    Calculate Voronoi cell areas for k-space trajectory points.
+    Calculate Voronoi cell areas for k-space trajectory points, or cell
+    volumes for 3D trajectories.
     
     Parameters:
     -----------
     kx, ky : array_like
         k-space trajectories (can be 1D or 2D arrays)
+    kz : array_like, optional
+        third coordinate of 3D trajectories, such as cones, stacks of
+        spirals and 3D radial
+    method : str, optional
+        'voronoi' one Voronoi diagram of all the points
+        'tiled' Voronoi diagrams of overlapping tiles of k-space, in a
+            process pool, for millions of points (2D only)
+        'pipe' iterative weights of Pipe and Menon from pipedcf, which
+            are finite at the edge of k-space, in place of cell areas
+    ntiles : int, optional
+        Number of tiles for 'tiled', default one per 50000 points
+    workers : int, optional
+        Processes for 'tiled', threads for 'pipe', default the number of
+        cores
+    kmax : float, optional
+        3D only: clip the cells to a sphere of radius kmax, so that cells
+        at the edge of k-space are finite. By default they are NaN.
+    batch : int, optional
+        3D only: Voronoi faces handled at a time, which bounds the memory
+        of the volume calculation
+    fov : float, optional
+        Field of view in cm for 'pipe', which sets its gridding kernel
+    niter : int, optional
+        Iterations for 'pipe'
         
     Returns:
     --------
     area : ndarray
-        Area of Voronoi cells for each point.
+        Area of Voronoi cells for each point, or volume in 3D.
         If a point doesn't have neighbors, the area is NaN.
+        Points at the same location share the area of their cell.
         Output has the same shape as input arrays.
     """
     
@@ -23,54 +57,332 @@ def voronoidens(kx, ky):
     original_shape = np.array(kx).shape
     
     # Flatten the arrays for processing
-    kx_flat = np.array(kx).flatten()
-    ky_flat = np.array(ky).flatten()
+    coords = [kx, ky] if kz is None else [kx, ky, kz]
+    coords = [np.array(c, dtype=float).flatten() for c in coords]
     
-    # Combine x and y coordinates
-    kxy = np.column_stack([kx_flat, ky_flat])
+    # Combine the coordinates, merging repeated points such as the many
+    # k = 0 samples of spirals, which have a single cell
+    kxy = np.column_stack(coords)
+    unique, inverse, counts = np.unique(kxy, axis=0, return_inverse=True,
+                                        return_counts=True)
+    inverse = inverse.reshape(-1)
+    
+    if method == 'pipe':
+        cell_area = pipedcf(unique, fov, niter, workers=workers)
+    elif kz is not None:
+        if method != 'voronoi':
+            raise ValueError("3D cells need method='voronoi' or 'pipe'")
+        cell_area = _voronoi_volumes(unique, kmax, batch)
+    elif method == 'voronoi':
+        cell_area = _voronoi_areas(unique)
+    elif method == 'tiled':
+        cell_area = _tiled_areas(unique, ntiles, workers)
+    else:
+        raise ValueError("method must be 'voronoi', 'tiled' or 'pipe'")
     
-    # Calculate Voronoi diagram
+    # Share each cell among the points at its location
+    area = cell_area[inverse] / counts[inverse]
+
+    # Reshape to original shape
+    area = area.reshape(original_shape)
+    
+    return area
+
+
+def _voronoi_areas(points):
+    # Cell areas from one Voronoi diagram of all the points
     try:
-        vor = Voronoi(kxy)
+        vor = Voronoi(points)
     except Exception as e:
         print(f"Warning: Voronoi calculation failed: {e}")
         # Return NaN array if Voronoi fails
-        return np.full(original_shape, np.nan)
-    
-    # Initialize area array
-    area = []
-    
-    # Calculate area for each point
-    for j in range(len(kxy)):
-        # Get the vertices of the Voronoi cell for point j
-        region = vor.regions[vor.point_region[j]]
-        
-        # Check if the region is valid (not empty and not infinite)
-        if len(region) == 0 or -1 in region:
-            # Point is on the boundary or has no finite cell
-            area.append(np.nan)
-        else:
-            # Get vertices of the cell
-            vertices = vor.vertices[region]
-            
-            # Calculate area using the shoelace formula
-            # A = 0.5 * |sum(x_i * y_{i+1} - x_{i+1} * y_i)|
-            x = vertices[:, 0]
-            y = vertices[:, 1]
-            
-            # Shoelace formula for polygon area
-            n = len(x)
-            if n < 3:
-                area.append(np.nan)
-            else:
-                # Calculate area using shoelace formula
-                A = 0.5 * abs(sum(x[i] * y[(i + 1) % n] - x[(i + 1) % n] * y[i] 
-                                for i in range(n)))
-                area.append(A)
-    
-    # Convert to numpy array and reshape to original shape
-    area = np.array(area).reshape(original_shape)
+        return np.full(len(points), np.nan)
     
+    # Area of every region, then of the region of each point
+    region_area = _region_areas(vor.vertices, vor.regions)
+    return region_area[vor.point_region]
+
+
+def _voronoi_volumes(points, kmax=None, batch=100000):
+    """
+    Cell volumes from a 3D Voronoi diagram.
+
+    A cell is the convex hull of its vertices, and its volume is the sum
+    over its faces of the pyramids with the point at the apex. Each face
+    (ridge) of the diagram is shared by two points. Its vertices, in
+    order around it, are fanned into triangles, and the volume of each
+    triangle's tetrahedron with each of the two points is added to that
+    point's cell. The faces are taken batch at a time, each batch as
+    flat arrays with no loop over cells. A cell with a face at infinity
+    is unbounded, and NaN.
+
+    With kmax the points beyond kmax/2 are mirrored in the sphere of
+    radius kmax, so that the cells at the edge are closed by faces
+    tangent to the sphere, and vertices outside the sphere are moved in
+    to it along their radius. This clips the cells to the sphere, to the
+    accuracy of the faces.
+    """
+    n = len(points)
+    if kmax is not None:
+        radius = np.linalg.norm(points, axis=1)
+        if np.any(radius > kmax * (1 + 1e-9)):
+            raise ValueError(f"points beyond kmax = {kmax:g}")
+        mirror = (radius > kmax / 2) & (radius < kmax * (1 - 1e-9))
+        ghosts = points[mirror] * ((2 * kmax - radius[mirror]) / radius[mirror])[:, None]
+        allpoints = np.concatenate([points, ghosts])
+    else:
+        allpoints = points
+
+    try:
+        vor = Voronoi(allpoints)
+    except Exception as e:
+        print(f"Warning: Voronoi calculation failed: {e}")
+        return np.full(n, np.nan)
+
+    vertices = vor.vertices
+    if kmax is not None:
+        r = np.linalg.norm(vertices, axis=1)
+        vertices = vertices * (kmax / np.maximum(r, kmax))[:, None]
+
+    # Faces of the cells of the points, not those between ghosts
+    sides = vor.ridge_points
+    faces = np.flatnonzero(sides.min(axis=1) < n)
+
+    volume = np.zeros(n)
+    unbounded = np.zeros(n, dtype=bool)
+    for b0 in range(0, len(faces), batch):
+        sel = faces[b0:b0 + batch]
+        flat, starts, lengths = _flatten_regions([vor.ridge_vertices[f] for f in sel])
+        side = sides[sel]
+
+        # Faces at infinity leave both cells unbounded
+        open_face = np.add.reduceat((flat < 0).astype(np.intp), starts) > 0
+        open_side = side[open_face].ravel()
+        unbounded[open_side[open_side < n]] = True
+
+        # Triangles (v0, vj, vj+1) of each face, j = 1..m-2
+        ntri = np.maximum(lengths - 2, 0)
+        face_of = np.repeat(np.arange(len(sel)), ntri)
+        j = np.arange(len(face_of)) - np.repeat(np.cumsum(ntri) - ntri, ntri) + 1
+        v = vertices[np.where(flat < 0, 0, flat)]
+        v0 = v[starts[face_of]]
+        v1 = v[starts[face_of] + j]
+        v2 = v[starts[face_of] + j + 1]
+
+        for k in (0, 1):
+            owner = side[face_of, k]
+            mine = owner < n
+            p = allpoints[owner[mine]]
+            a, b, c = v0[mine] - p, v1[mine] - p, v2[mine] - p
+            tet = np.abs(np.einsum('ij,ij->i', a, np.cross(b, c))) / 6
+            volume += np.bincount(owner[mine], weights=tet, minlength=n)
+
+    volume[unbounded] = np.nan
+    return volume
+
+
+def _tiled_areas(points, ntiles=None, workers=None):
+    """
+    Cell areas from Voronoi diagrams of overlapping tiles.
+
+    The points are split into tiles of about equal counts, by quantiles of
+    kx and then of ky. Points on the convex hull have unbounded cells.
+    Each tile owns its other points, and its diagram also takes in the
+    points within a halo a few point spacings wide. A vertex v of the
+    local cell of a point p is a vertex of the global cell if no point is
+    nearer to v than p. This holds if the circle about v through p lies
+    within the tile and halo, where all the points are known, and is
+    otherwise checked with a k-d tree of all the points. Cells with all
+    their vertices checked are the global cells. The few cells left, with
+    a vertex that another point is nearer, or unbounded locally, are done
+    again with twice the halo around each of them, until the halo spans
+    all the points.
+    """
+    n = len(points)
+    if ntiles is None:
+        ntiles = max(1, n // 50000)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    nx = max(1, int(round(np.sqrt(ntiles))))
+    ny = max(1, int(np.ceil(ntiles / nx)))
+
+    # Points sorted by kx, so that a tile and halo is a slice and a mask
+    order = np.argsort(points[:, 0], kind='stable')
+    sp = points[order]
+    sx = sp[:, 0]
+    sy = sp[:, 1]
+    lo = sp.min(axis=0)
+    hi = sp.max(axis=0)
+    diameter = np.linalg.norm(hi - lo)
+
+    # Tile edges, with the outer edges past the points
+    xedges = np.quantile(sx, np.linspace(0, 1, nx + 1))
+    xedges[0], xedges[-1] = -np.inf, np.inf
+    xtile = np.clip(np.searchsorted(xedges, sx, side='right') - 1, 0, nx - 1)
+    tile_of = np.empty(n, dtype=np.intp)
+    for i in range(nx):
+        cols = np.flatnonzero(xtile == i)
+        yedges = np.quantile(sy[cols], np.linspace(0, 1, ny + 1))
+        yedges[0], yedges[-1] = -np.inf, np.inf
+        ytile = np.clip(np.searchsorted(yedges, sy[cols], side='right') - 1, 0, ny - 1)
+        tile_of[cols] = i * ny + ytile
+    ntiles = nx * ny
+
+    # Cells of points on the convex hull are unbounded
+    area = np.full(n, np.nan)
+    interior = np.ones(n, dtype=bool)
+    try:
+        interior[ConvexHull(sp).vertices] = False
+    except Exception:
+        pass
+
+    # First round: each tile with the points in a box around it
+    tasks = []
+    for t in range(ntiles):
+        owned = np.flatnonzero(interior & (tile_of == t))
+        if len(owned) == 0:
+            continue
+        # A few times the mean point spacing of the tile
+        extent = np.prod(sp[owned].max(axis=0) - sp[owned].min(axis=0))
+        halo = 4 * np.sqrt(max(extent, 1e-30) / len(owned))
+        x0, y0 = sp[owned].min(axis=0) - halo
+        x1, y1 = sp[owned].max(axis=0) + halo
+        i0 = np.searchsorted(sx, x0, side='left')
+        i1 = np.searchsorted(sx, x1, side='right')
+        near = i0 + np.flatnonzero((sy[i0:i1] >= y0) & (sy[i0:i1] <= y1))
+        # Sides past all the points have nothing beyond them
+        box = np.array([-np.inf if x0 <= lo[0] else x0, np.inf if x1 >= hi[0] else x1,
+                        -np.inf if y0 <= lo[1] else y0, np.inf if y1 >= hi[1] else y1])
+        tasks.append((owned, near, box, halo))
+
+    tree = cKDTree(sp)
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while tasks:
+            args = [(sp[near], np.searchsorted(near, owned)) for owned, near, _, _ in tasks]
+            results = pool.map(_tile_cells, args) if pool is not None else map(_tile_cells, args)
+            retry = []
+            for (owned, near, box, halo), (a, v, r, lengths) in zip(tasks, results):
+                # A vertex is checked if its circle lies in the box, or
+                # else holds no point left out of the diagram
+                inside = ((v[:, 0] - r >= box[0]) & (v[:, 0] + r <= box[1])
+                          & (v[:, 1] - r >= box[2]) & (v[:, 1] + r <= box[3]))
+                check = np.flatnonzero(~inside)
+                known = np.zeros(n, dtype=bool)
+                known[near] = True
+                idx, counts = _flatten_balls(tree.query_ball_point(v[check], r[check] * (1 - 1e-9)))
+                missing = np.repeat(check, counts)[~known[idx]]
+                inside[check] = True
+                inside[missing] = False
+                ok = _all_per_cell(inside, lengths)
+                # Unbounded with a halo spanning all the points
+                ok |= (lengths == 0) & (halo > diameter)
+
+                area[owned[ok]] = a[ok]
+                if np.all(ok):
+                    continue
+
+                # The cells left again, with the points within twice the
+                # halo of each of them
+                left = owned[~ok]
+                balls, _ = _flatten_balls(tree.query_ball_point(sp[left], 2 * halo))
+                retry.append((left, np.unique(np.concatenate([left, balls])),
+                              np.array([np.inf, -np.inf, np.inf, -np.inf]), 2 * halo))
+            tasks = retry
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    out = np.empty(n)
+    out[order] = area
+    return out
+
+
+def _all_per_cell(flags, lengths):
+    # For each cell, whether flags holds at all its vertices, False for
+    # cells without vertices
+    out = np.zeros(len(lengths), dtype=bool)
+    full = lengths > 0
+    if np.any(full):
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])[full]
+        out[full] = np.minimum.reduceat(flags.astype(np.intp), starts) > 0
+    return out
+
+
+def _flatten_balls(balls):
+    # Indices from query_ball_point joined into one array, with the count
+    # of each query
+    counts = np.fromiter(map(len, balls), dtype=np.intp, count=len(balls))
+    idx = np.fromiter(itertools.chain.from_iterable(balls), dtype=np.intp,
+                      count=int(counts.sum()))
+    return idx, counts
+
+
+def _tile_cells(args):
+    # Cell areas of the owned points of a tile, with the vertices of the
+    # bounded cells, their distances from the owned point and the number
+    # of vertices of each cell, 0 if unbounded, for _tiled_areas
+    points, owned = args
+    try:
+        vor = Voronoi(points)
+    except Exception:
+        m = len(owned)
+        return np.full(m, np.nan), np.zeros((0, 2)), np.zeros(0), np.zeros(m, dtype=np.intp)
+
+    regions = [vor.regions[r] for r in vor.point_region[owned]]
+    a = _region_areas(vor.vertices, regions)
+
+    flat, starts, lengths = _flatten_regions(regions)
+    bounded = np.isfinite(a)
+    v = vor.vertices[flat[np.repeat(bounded, lengths)]]
+    lengths = np.where(bounded, lengths, 0)
+    r = np.linalg.norm(v - points[np.repeat(owned, lengths)], axis=1)
+    return a, v, r, lengths
+
+
+def _flatten_regions(regions):
+    # Vertex lists joined into one index array, with the start and length
+    # of each region
+    lengths = np.fromiter(map(len, regions), dtype=np.intp, count=len(regions))
+    flat = np.fromiter(itertools.chain.from_iterable(regions), dtype=np.intp,
+                       count=int(lengths.sum()))
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.intp)
+    return flat, starts, lengths
+
+
+def _region_areas(vertices, regions):
+    """
+    Shoelace areas of the polygons listed in Voronoi.regions, all at once.
+
+    The vertex lists are joined into one index array, with the start of
+    each region in an offset array, and each vertex paired with the next
+    one in its region, wrapping at the end. The cross products of the
+    pairs are summed per region with np.add.reduceat. Regions that are
+    unbounded (contain -1) or have fewer than 3 vertices are NaN.
+    """
+    flat, starts, lengths = _flatten_regions(regions)
+
+    area = np.full(len(regions), np.nan)
+    full = lengths > 0
+    if not np.any(full):
+        return area
+    starts = starts[full]
+    ends = starts + lengths[full]
+
+    # Index of the next vertex in the same region
+    nxt = np.arange(1, len(flat) + 1)
+    nxt[ends - 1] = starts
+
+    unbounded = np.add.reduceat((flat < 0).astype(np.intp), starts) > 0
+    idx = np.where(flat < 0, 0, flat)
+    x = vertices[idx, 0]
+    y = vertices[idx, 1]
+    cross = x * y[nxt] - x[nxt] * y
+
+    a = 0.5 * np.abs(np.add.reduceat(cross, starts))
+    a[unbounded | (lengths[full] < 3)] = np.nan
+    area[full] = a
     return area
 
 
@@ -159,6 +471,37 @@ def test_voronoidens():
     # Calculate Voronoi areas
     area = voronoidens(kx, ky)
     
+    # Tiled diagrams of a longer spiral give the same areas
+    t2 = np.linspace(0, 1, 20000)
+    k2 = 5 * t2 * np.exp(2j * np.pi * 40 * t2)
+    a1 = voronoidens(k2.real, k2.imag)
+    a2 = voronoidens(k2.real, k2.imag, method='tiled', ntiles=9, workers=2)
+    print(f"Tiled areas match: {np.allclose(a1, a2, equal_nan=True)}")
+    
+    # Repeated points share the area of their cell
+    kx3 = np.concatenate([np.zeros(4), kx[1:]])
+    ky3 = np.concatenate([np.zeros(4), ky[1:]])
+    a3 = voronoidens(kx3, ky3)
+    print(f"Repeated points share their cell: {np.allclose(4 * a3[:4], area[0])}")
+    
+    # Pipe-Menon weights are close to the areas away from the edge, and
+    # finite at it
+    w = voronoidens(k2.real, k2.imag, method='pipe')
+    sel = (np.abs(k2) > 1) & (np.abs(k2) < 4)
+    print(f"Pipe-Menon to Voronoi median ratio: {np.median(w[sel] / a1[sel]):.3f}, "
+          f"all finite: {np.all(np.isfinite(w))}")
+    
+    # 3D radial: cell volumes, clipped to the sphere at kmax
+    kmax = 1.0
+    rng = np.random.default_rng(0)
+    dirs = rng.normal(size=(400, 3))
+    dirs /= np.linalg.norm(dirs, axis=1, keepdims=True)
+    r = np.linspace(0, kmax, 32)
+    k3 = (r[None, :, None] * dirs[:, None, :]).reshape(-1, 3)
+    vol = voronoidens(k3[:, 0], k3[:, 1], k3[:, 2], kmax=kmax)
+    print(f"3D radial: {np.sum(np.isnan(vol))} NaN cells, total volume {np.nansum(vol):.4f} "
+          f"(sphere {4 / 3 * np.pi * kmax**3:.4f})")
+    
     # Plot results
     plot_voronoi_diagram(kx, ky, area)
     
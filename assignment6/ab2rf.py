@@ -4,8 +4,8 @@ ab2rf - take two polynomials for alpha and beta, and return an
 
 COMPLEX RF VERSION
 
-rf = ab2rf(a, b)
-  a, b - polynomials for alpha and beta
+rf = ab2rf(a, b, [axis])
+  a, b - polynomials for alpha and beta, or batches of them along axis
   rf - rf waveform that produces alpha and beta under the hard pulse
     approximation.
 
@@ -14,8 +14,15 @@ Converted to Python
 
 import numpy as np
 
+try:
+    from .instrument import instrumented, count
+except ImportError:
+    # Fallback for direct import
+    from instrument import instrumented, count
 
-def ab2rf(ac, bc):
+
+@instrumented
+def ab2rf(ac, bc, axis=-1):
     """
     Take two polynomials for alpha and beta, and return an RF waveform
     that would generate them.
@@ -26,6 +33,9 @@ def ab2rf(ac, bc):
         Alpha polynomial coefficients
     bc : array_like
         Beta polynomial coefficients
+    axis : int, optional
+        Axis of ac and bc holding the coefficients. The pulses of a batch
+        are stepped back together, one vector operation per sample.
     
     Returns:
     --------
@@ -33,17 +43,18 @@ def ab2rf(ac, bc):
         RF waveform that produces alpha and beta under the hard pulse
         approximation.
     """
-    ac = np.asarray(ac, dtype=complex)
-    bc = np.asarray(bc, dtype=complex)
-    n = len(ac)
+    ac = np.moveaxis(np.asarray(ac, dtype=complex), axis, -1)
+    bc = np.moveaxis(np.asarray(bc, dtype=complex), axis, -1)
+    n = ac.shape[-1]
     
-    rf = np.zeros(n, dtype=complex)
+    rf = np.zeros(ac.shape, dtype=complex)
+    count('ab2rf.steps', n)
     j = 1j
     
     # Iterate backwards from n to 1
     for i in range(n-1, -1, -1):
         # Calculate c and s
-        ratio = bc[i] / ac[i]
+        ratio = bc[..., i:i+1] / ac[..., i:i+1]
         c = np.sqrt(1 / (1 + np.abs(ratio)**2))
         s = np.conj(c * ratio)
         
@@ -52,7 +63,7 @@ def ab2rf(ac, bc):
         psi = np.angle(s)
         
         # Calculate RF pulse
-        rf[i] = 2 * (theta * np.cos(psi) + j * theta * np.sin(psi))
+        rf[..., i:i+1] = 2 * (theta * np.cos(psi) + j * theta * np.sin(psi))
         
         # Update polynomials for next iteration
         if i > 0:
@@ -60,8 +71,8 @@ def ab2rf(ac, bc):
             bcn = -np.conj(s) * ac + c * bc
             # MATLAB: ac = acn(2:i) -> Python: ac = acn[1:i+1]
             # MATLAB: bc = bcn(1:i-1) -> Python: bc = bcn[0:i]
-            ac = acn[1:(i+1)]
-            bc = bcn[0:i]
+            ac = acn[..., 1:(i+1)]
+            bc = bcn[..., 0:i]
     
-    return rf
+    return np.moveaxis(rf, -1, axis)
 
@@ -0,0 +1,46 @@
+"""
+ab2se - Computes the crushed spin-echo profile Mxy = i*b^2
+
+mxy = ab2se(a, b)  or  mxy = ab2se(ab)
+  where ab is a concatenated array [a, b]
+
+The refocusing pulse is assumed to be surrounded by crusher gradients,
+so only the b^2 term of the rotation survives averaging over the voxel.
+The initial magnetization is Mxy = i (along y after a 90x excitation).
+
+written by John Pauly, 1992
+(c) Board of Trustees, Leland Stanford Junior University
+Converted to Python
+"""
+
+import numpy as np
+
+
+def ab2se(a, b=None):
+    """
+    Computes the crushed spin-echo profile Mxy = i*b^2
+
+    Parameters:
+    -----------
+    a : array_like
+        Alpha polynomial coefficients
+    b : array_like, optional
+        Beta polynomial coefficients. If None, a is assumed to be
+        a concatenated array [a, b] with shape (..., 2*n)
+
+    Returns:
+    --------
+    mxy : ndarray
+        Spin-echo profile Mxy = i*b^2
+    """
+    if b is None:
+        # a is actually a concatenated [a, b] array
+        a = np.asarray(a)
+        n = a.shape[-1]  # last dimension
+        b = a[..., (n//2):]  # second half
+        a = a[..., :(n//2)]  # first half
+
+    b = np.asarray(b)
+    mxy = 1j * b * b
+
+    return mxy
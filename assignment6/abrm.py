@@ -1,5 +1,16 @@
 import numpy as np
 
+try:
+    from .cache import cached
+    from .instrument import instrumented, span
+except ImportError:
+    # Fallback for direct import
+    from cache import cached
+    from instrument import instrumented, span
+
+
+@instrumented
+@cached
 def abrm(rf, g=None, x=None, y=None):
     """
     [a b] = abrm(rf,[g],[x [,y])
@@ -98,6 +109,8 @@ def abrm(rf, g=None, x=None, y=None):
     return a, b
 
 
+@instrumented
+@cached
 def abrm_vectorized(rf, g=None, x=None, y=None):
     """
     Vectorized version of abrm across spatial positions (x, y) using NumPy broadcasting.
@@ -178,12 +191,88 @@ def abrm_vectorized(rf, g=None, x=None, y=None):
     b = np.zeros((lx, ly), dtype=complex)
 
     # Sequential time-step product, vectorized over (lx, ly)
-    for m in range(nt):
-        avm = av[:, :, m]
-        bvm = bv[:, :, m]
-        a_new = avm * a - np.conj(bvm) * b
-        b_new = bvm * a + np.conj(avm) * b
-        a, b = a_new, b_new
+    with span('abrm_vectorized.loop', nt=nt, npos=lx * ly):
+        for m in range(nt):
+            avm = av[:, :, m]
+            bvm = bv[:, :, m]
+            a_new = avm * a - np.conj(bvm) * b
+            b_new = bvm * a + np.conj(avm) * b
+            a, b = a_new, b_new
+
+    return a, b
+
+
+@instrumented
+def abrm_moving(rf, g, x0, v=0, acc=0, dt=1.0, block=256):
+    """
+    Version of abrm for moving spins, with positions x0 + v*t + acc*t^2/2.
+
+    Parameters:
+    -----------
+    rf : array_like
+        RF scaled so that sum(rf) = flip angle (per time sample)
+    g : array_like
+        Gradient waveform; real(g) interacts with x, imag(g) with y.
+        Scaled such that (gamma/2*pi)*sum(g) = k in cycles/cm
+    x0 : array_like
+        Starting positions (cm). Complex positions x + 1j*y are used
+        for 2D pulses.
+    v : array_like, optional
+        Velocity classes (cm per unit of dt), complex for 2D motion
+    acc : array_like, optional
+        Acceleration, scalar or one per velocity class
+    dt : float, optional
+        Sample time, in the same time unit as v and acc
+    block : int, optional
+        Number of time samples whose rotations are set up at once. Memory
+        use is proportional to len(x0)*len(v)*block.
+
+    Returns:
+    --------
+    a : ndarray
+        Alpha parameter, shape (len(x0), len(v))
+    b : ndarray
+        Beta parameter, same shape as a
+    """
+
+    rf = np.asarray(rf).flatten()
+    g = np.asarray(g).flatten()
+    x0 = np.asarray(x0).flatten()
+    v = np.atleast_1d(np.asarray(v).flatten())
+    acc = np.broadcast_to(np.asarray(acc).flatten(), v.shape)
+
+    nt = len(rf)
+    t = np.arange(nt) * dt
+
+    a = np.ones((len(x0), len(v)), dtype=complex)
+    b = np.zeros((len(x0), len(v)), dtype=complex)
+
+    eps = np.finfo(float).eps
+
+    for m0 in range(0, nt, block):
+        m1 = min(m0 + block, nt)
+        tb = t[m0:m1]
+
+        # Position of each spin at each time sample in the block
+        p = (x0[:, None, None]
+             + v[None, :, None] * tb[None, None, :]
+             + 0.5 * acc[None, :, None] * tb[None, None, :]**2)
+
+        # om = x*real(g) + y*imag(g)
+        om = np.real(p * np.conj(g[None, None, m0:m1]))
+        om = om + (np.abs(om) < eps) * eps
+
+        rfb = rf[None, None, m0:m1]
+        phi = np.sqrt((rfb * np.conj(rfb)).real + om**2)
+
+        s = np.sin(0.5 * phi)
+        av = np.cos(0.5 * phi) - 1j * (om / phi) * s
+        bv = -1j * (rfb / phi) * s
+
+        for m in range(m1 - m0):
+            avm = av[:, :, m]
+            bvm = bv[:, :, m]
+            a, b = avm * a - np.conj(bvm) * b, bvm * a + np.conj(avm) * b
 
     return a, b
 
@@ -3,23 +3,36 @@ b2a - This function takes a b polynomial, and returns the minimum phase,
   minimum power a polynomial
 
 Inputs:
-  bc - beta polynomial coefficients
+  bc - beta polynomial coefficients, or a batch of them along axis
 
 Outputs:
   aca - minimum phase alpha polynomial
 
+The spectra are oversampled by a pad factor. By default this starts at 2
+and is doubled until the energy of the computed alpha past n samples,
+which is aliasing from too little padding, is below tol. If abs(beta)
+reaches 1 it is scaled down, alpha then has zeros on the unit circle and
+no pad removes the tail, so the original factor of 8 is used. A fixed
+factor can be given with pad. A batch of polynomials is transformed
+together, with the pad that suits all of them.
+
 Converted to Python
 """
 
 import numpy as np
 try:
     from .mag2mp import mag2mp
+    from .instrument import instrumented, span, count
+    from .fft_backend import fft
 except ImportError:
     # Fallback for direct import
     from mag2mp import mag2mp
+    from instrument import instrumented, span, count
+    from fft_backend import fft
 
 
-def b2a(bc):
+@instrumented
+def b2a(bc, pad=None, tol=1e-10, max_pad=64, return_pad=False, axis=-1):
     """
     Takes a b polynomial, and returns the minimum phase, minimum power a polynomial.
     
@@ -27,28 +40,70 @@ def b2a(bc):
     -----------
     bc : array_like
         Beta polynomial coefficients
+    pad : int, optional
+        Fixed oversampling factor. By default it is chosen adaptively.
+    tol : float, optional
+        Largest energy of alpha past n samples, relative to its total
+        energy, accepted by the adaptive pad
+    max_pad : int, optional
+        Largest pad factor tried
+    return_pad : bool, optional
+        Also return the pad factor used
+    axis : int, optional
+        Axis of bc holding the coefficients, for a batch of polynomials
     
     Returns:
     --------
     aca : ndarray
         Minimum phase alpha polynomial
+    pad : int, optional
+        Pad factor used
     """
-    bc = np.asarray(bc)
-    n = len(bc)
+    bc = np.moveaxis(np.asarray(bc), axis, -1)
+    n = bc.shape[-1]
+    
+    if pad is not None:
+        aca = _b2a(bc, pad)[0][..., n-1::-1]  # Reverse first n elements
+    else:
+        pad = 2
+        while True:
+            c, scaled = _b2a(bc, pad)
+            if scaled:
+                pad = 8
+                c = _b2a(bc, pad)[0]
+                break
+            e = np.abs(c)**2
+            if np.all(np.sum(e[..., n:], axis=-1) <= tol * np.sum(e, axis=-1)) or pad >= max_pad:
+                break
+            pad *= 2
+        aca = c[..., n-1::-1]
+        count('b2a.pad', pad)
+    
+    aca = np.moveaxis(aca, -1, axis)
+    if return_pad:
+        return aca, pad
+    return aca
+
+
+def _b2a(bc, pad):
+    # All n*pad samples of the fft of the minimum phase alpha, the alpha
+    # polynomial being the first n reversed, and whether beta was scaled.
+    # A batch is along the last axis, and each polynomial is scaled alone.
+    n = bc.shape[-1]
     
-    # Calculate minimum phase alpha
-    bcp = np.zeros(n * 8, dtype=complex)
-    bcp[:n] = bc
-    bf = np.fft.fft(bcp)
-    bfmax = np.max(np.abs(bf))
+    # Zero padded by the transform, with a real transform if bc is real
+    with span('b2a.fft', nfft=n * pad):
+        bf = fft(bc, n * pad)
+    bfmax = np.max(np.abs(bf), axis=-1, keepdims=True)
+    over = bfmax >= 1.0
+    scaled = bool(np.any(over))
     
-    if bfmax >= 1.0:  # PM can result in abs(beta)>1, not physical
+    if scaled:  # PM can result in abs(beta)>1, not physical
         # Scale it so that abs(beta)<1 so that alpha will be analytic
-        bf = bf / (1e-8 + bfmax)
+        bf = np.where(over, bf / (1e-8 + bfmax), bf)
     
-    afa = mag2mp(np.sqrt(1 - bf * np.conj(bf)))
-    aca = np.fft.fft(afa) / (n * 8)
-    aca = aca[n-1::-1]  # Reverse first n elements
+    afa = mag2mp(np.sqrt(1 - np.abs(bf)**2))  # real, for the rfft path
+    with span('b2a.fft', nfft=n * pad):
+        aca = fft(afa) / (n * pad)
     
-    return aca[:n]
-
+    return aca, scaled
@@ -0,0 +1,273 @@
+"""
+benchmark - time every kernel over a matrix of sizes and flag regressions
+
+python benchmark.py [--quick] [--threshold 0.25] [--history bench_history.json]
+                    [--kernels abrm b2a ...] [--no-save]
+
+Each case is timed (best of several repeats, at least min_time seconds in
+total) and its peak Python memory is measured with tracemalloc in a
+separate run. Results are appended to a JSON history file, and each case
+is compared with the median of the last few runs on the same host. A case
+whose time grew by more than the threshold is reported as a regression,
+and the script exits with status 1.
+
+csg and voronoidens are taken from ../assignment3. Cached kernels are
+timed through their uncached versions.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'assignment3'))
+
+from abrm import abrm, abrm_vectorized
+from ab2rf import ab2rf
+from b2a import b2a
+from mag2mp import mag2mp
+from fmp import fmp
+from dzls import dzls
+from dzpm import dzpm
+from dzmp import dzmp
+from csg import csg
+from voronoidens import voronoidens
+
+HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_history.json')
+
+
+def _uncached(f):
+    return getattr(f, 'uncached', f)
+
+
+def _rf(n):
+    t = np.linspace(-2, 2, n)
+    return np.sinc(t) / np.sum(np.sinc(t)) * np.pi / 2
+
+
+def _beta(n):
+    b = _uncached(dzls)(n, 4, 0.01, 0.01)
+    return b * np.sin(np.pi / 4)
+
+
+def _spiral(n):
+    t = np.linspace(0, 1, n)
+    return 5 * (1 - t) * np.exp(1j * 2 * np.pi * 8 * (1 - t))
+
+
+def _setup_abrm(nt, npos):
+    rf, x = _rf(nt), np.linspace(-3, 3, npos)
+    return lambda: _uncached(abrm)(rf, x=x)
+
+
+def _setup_abrm_vectorized(nt, npos):
+    rf, x = _rf(nt), np.linspace(-3, 3, npos)
+    return lambda: _uncached(abrm_vectorized)(rf, x=x)
+
+
+def _setup_b2a(n):
+    b = _beta(n)
+    return lambda: b2a(b)
+
+
+def _setup_ab2rf(n):
+    b = _beta(n)
+    a = b2a(b)
+    return lambda: ab2rf(a, b)
+
+
+def _setup_mag2mp(n):
+    x = np.abs(np.fft.fft(_beta(n), 8 * n)) + 0.1
+    return lambda: mag2mp(x)
+
+
+def _setup_fmp(n):
+    h = _uncached(dzls)(n, 4, 0.01, 0.01)
+    return lambda: fmp(h)
+
+
+def _setup_design(f, n):
+    return lambda: _uncached(f)(n, 4, 0.01, 0.01)
+
+
+def _setup_csg(n):
+    k = _spiral(n)
+    return lambda: _uncached(csg)(k, 4, 15)
+
+
+def _setup_voronoidens(n):
+    k = _spiral(n) + 1e-3 * np.random.default_rng(0).normal(size=n)
+    return lambda: _uncached(voronoidens)(k.real, k.imag)
+
+
+def _cases(quick):
+    """
+    Returns a list of (kernel, size label, samples, setup, args), where
+    setup(*args) returns the zero-argument function to time.
+    """
+    def sizes(small, large):
+        return small[:1] if quick else large
+
+    cases = []
+    for nt, npos in sizes([(64, 16)], [(64, 16), (256, 64)]):
+        cases.append(('abrm', f"nt={nt},npos={npos}", nt * npos, _setup_abrm, (nt, npos)))
+    for nt, npos in sizes([(256, 256)], [(256, 256), (1024, 1024), (4096, 1024)]):
+        cases.append(('abrm_vectorized', f"nt={nt},npos={npos}", nt * npos,
+                      _setup_abrm_vectorized, (nt, npos)))
+    for n in sizes([128], [128, 512, 2048]):
+        cases.append(('b2a', f"n={n}", n, _setup_b2a, (n,)))
+        cases.append(('ab2rf', f"n={n}", n, _setup_ab2rf, (n,)))
+        cases.append(('mag2mp', f"n={8 * n}", 8 * n, _setup_mag2mp, (n,)))
+        cases.append(('fmp', f"n={n - 1}", n, _setup_fmp, (n,)))
+        cases.append(('dzls', f"n={n}", n, _setup_design, (dzls, n)))
+        cases.append(('dzpm', f"n={n}", n, _setup_design, (dzpm, n)))
+    for n in sizes([64], [64, 256, 512]):
+        cases.append(('dzmp', f"n={n}", n, _setup_design, (dzmp, n)))
+    for n in sizes([1024], [1024, 4096, 16384]):
+        cases.append(('csg', f"n={n}", n, _setup_csg, (n,)))
+    for n in sizes([2000], [2000, 20000, 100000]):
+        cases.append(('voronoidens', f"n={n}", n, _setup_voronoidens, (n,)))
+
+    return cases
+
+
+def _time(f, min_time, max_repeat=20):
+    f()  # warm up
+    times = []
+    total = 0.0
+    while (total < min_time or len(times) < 3) and len(times) < max_repeat:
+        t0 = time.perf_counter()
+        f()
+        dt = time.perf_counter() - t0
+        times.append(dt)
+        total += dt
+    return min(times), len(times)
+
+
+def _peak_memory(f):
+    tracemalloc.start()
+    try:
+        f()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run(kernels=None, quick=False, min_time=0.2, verbose=True):
+    """
+    Run the benchmark cases.
+
+    Parameters:
+    -----------
+    kernels : list of str, optional
+        Only run these kernels
+    quick : bool, optional
+        Only run the smallest size of each kernel
+    min_time : float, optional
+        Minimum total time spent timing each case, in seconds
+
+    Returns:
+    --------
+    results : dict
+        Keyed by "kernel[size]", with 'seconds', 'samples_per_s',
+        'peak_bytes' and 'repeats'
+    """
+    results = {}
+    for kernel, size, samples, setup, args in _cases(quick):
+        if kernels and kernel not in kernels:
+            continue
+        f = setup(*args)
+        seconds, repeats = _time(f, min_time)
+        peak = _peak_memory(f)
+        key = f"{kernel}[{size}]"
+        results[key] = {
+            'seconds': seconds,
+            'samples_per_s': samples / seconds,
+            'peak_bytes': peak,
+            'repeats': repeats,
+        }
+        if verbose:
+            print(f"{key:36s} {1e3 * seconds:10.3f} ms {samples / seconds:12.3g} /s "
+                  f"{peak / 2**20:9.2f} MB")
+    return results
+
+
+def load_history(path=HISTORY):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def save_history(results, path=HISTORY):
+    history = load_history(path)
+    history.append({
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'host': platform.node(),
+        'numpy': np.__version__,
+        'results': results,
+    })
+    with open(path, 'w') as f:
+        json.dump(history, f, indent=1)
+
+
+def regressions(results, history, threshold=0.25, window=5):
+    """
+    Compare results with the median of the last `window` runs on this host.
+
+    Returns:
+    --------
+    flagged : list of (key, seconds, baseline seconds, relative change)
+    """
+    host = platform.node()
+    runs = [h['results'] for h in history if h.get('host') == host][-window:]
+
+    flagged = []
+    for key, r in results.items():
+        past = [run[key]['seconds'] for run in runs if key in run]
+        if not past:
+            continue
+        baseline = float(np.median(past))
+        change = r['seconds'] / baseline - 1
+        if change > threshold:
+            flagged.append((key, r['seconds'], baseline, change))
+    return flagged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--quick', action='store_true', help='smallest size of each kernel only')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='relative slowdown flagged as a regression')
+    parser.add_argument('--history', default=HISTORY, help='JSON history file')
+    parser.add_argument('--kernels', nargs='*', help='kernels to run')
+    parser.add_argument('--min-time', type=float, default=0.2)
+    parser.add_argument('--no-save', action='store_true', help='do not append to the history')
+    args = parser.parse_args(argv)
+
+    history = load_history(args.history)
+    results = run(args.kernels, args.quick, args.min_time)
+    flagged = regressions(results, history, args.threshold)
+
+    if not args.no_save:
+        save_history(results, args.history)
+
+    if flagged:
+        print(f"\n{len(flagged)} regression(s) beyond {100 * args.threshold:.0f}%:")
+        for key, seconds, baseline, change in flagged:
+            print(f"  {key:36s} {1e3 * seconds:10.3f} ms vs {1e3 * baseline:10.3f} ms (+{100 * change:.0f}%)")
+        return 1
+
+    print("\nNo regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
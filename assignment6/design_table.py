@@ -0,0 +1,299 @@
+"""
+design_table - persistent table of remez designs for dzpm and dzmp
+
+table_config(path, [enabled], [write_back])
+h = table_get(kind, n, tb, d1, d2)
+table_put(kind, n, tb, d1, d2, h)
+table_build(path, kinds, ns, tbs, d1s, d2s)
+
+A table is a directory holding coeffs.npy, every stored filter
+concatenated into one float64 array that is opened memory-mapped, and
+index.json, which maps each (kind, n, tb, d1, d2) to the offset and length
+of its coefficients. A lookup is a dict access and a slice of the mapped
+array. On a miss the design routine runs remez as before and, with
+write_back, appends the result to the table.
+
+dzpm stores its filter under kind 'dzpm'. dzmp stores the linear phase
+filter it factors, under kind 'dzmp', and still runs fmp on every call.
+
+Writers in several processes, such as the workers of a sweep, share a
+table by taking an exclusive lock on the file 'lock' in its directory. Each
+append re-reads the index under the lock, so no process overwrites the
+entries or coefficients of another. Readers see entries added by other
+processes once they next append or reopen the table. The lock uses
+fcntl, which is not available on Windows, where writers in several
+processes must be avoided.
+
+Designs are only returned for exactly matching parameters. Remez
+coefficients do not vary smoothly enough with tb, d1 and d2 to be
+interpolated between grid points.
+
+The table is off until a path is given, with table_config or the
+environment variable MRI_DESIGN_TABLE. It can be built offline with
+
+python design_table.py <path> --kinds dzpm dzmp --n 64 128 --tb 4 8
+                       --d1 0.01 --d2 0.01
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    # Windows, where there is no locking across processes
+    fcntl = None
+
+_config = {
+    'path': os.environ.get('MRI_DESIGN_TABLE') or None,
+    'enabled': True,
+    'write_back': True,
+}
+
+_table = None
+_lock = threading.Lock()
+
+_INITIAL_CAPACITY = 1 << 16
+
+
+def table_config(path=None, enabled=None, write_back=None):
+    """
+    Configure the design table.
+
+    Parameters:
+    -----------
+    path : str, optional
+        Table directory, created if needed. An empty string turns the
+        table off.
+    enabled : bool, optional
+        Turn lookups on or off
+    write_back : bool, optional
+        Store designs made on a miss
+
+    Returns:
+    --------
+    config : dict
+        The current configuration
+    """
+    global _table
+
+    if path is not None:
+        _config['path'] = path or None
+        with _lock:
+            _table = None
+    if enabled is not None:
+        _config['enabled'] = bool(enabled)
+    if write_back is not None:
+        _config['write_back'] = bool(write_back)
+
+    return dict(_config)
+
+
+def table_key(kind, n, tb, d1, d2):
+    return f"{kind}:{int(n)}:{float(tb):.10g}:{float(d1):.10g}:{float(d2):.10g}"
+
+
+def table_get(kind, n, tb, d1, d2):
+    """
+    Return the stored coefficients for these parameters, or None.
+    """
+    if not (_config['enabled'] and _config['path']):
+        return None
+
+    with _lock:
+        table = _open()
+        entry = table['index'].get(table_key(kind, n, tb, d1, d2))
+        if entry is None:
+            return None
+        offset, length = entry
+        return np.array(table['coeffs'][offset:offset + length])
+
+
+def table_put(kind, n, tb, d1, d2, h):
+    """
+    Append coefficients to the table, if write-back is on.
+    """
+    if not (_config['enabled'] and _config['write_back'] and _config['path']):
+        return
+
+    h = np.asarray(h, dtype=float).reshape(-1)
+    key = table_key(kind, n, tb, d1, d2)
+
+    with _lock, _file_lock(_config['path']):
+        # Another process may have appended since the table was read
+        table = _reload()
+        if key in table['index']:
+            return
+
+        used = table['used']
+        if used + len(h) > len(table['coeffs']):
+            _grow(table, used + len(h))
+
+        table['coeffs'][used:used + len(h)] = h
+        table['coeffs'].flush()
+        table['index'][key] = [used, len(h)]
+        table['used'] = used + len(h)
+        _save_index(table)
+
+
+def table_entries():
+    """
+    Return the keys of all stored designs.
+    """
+    if not _config['path']:
+        return []
+    with _lock:
+        return sorted(_open()['index'])
+
+
+def table_build(path, kinds=('dzpm', 'dzmp'), ns=(), tbs=(), d1s=(), d2s=(), verbose=True):
+    """
+    Design every combination of the parameters and store it in the table
+    at path. Existing entries are kept.
+
+    Returns:
+    --------
+    failed : list of (kind, n, tb, d1, d2, message)
+        Designs for which remez raised an error
+    """
+    try:
+        from .dzpm import dzpm
+        from .dzmp import dzmp
+    except ImportError:
+        # Fallback for direct import
+        from dzpm import dzpm
+        from dzmp import dzmp
+    design = {'dzpm': getattr(dzpm, 'uncached', dzpm), 'dzmp': dzmp}
+
+    previous = dict(_config)
+    table_config(path=path, enabled=True, write_back=True)
+
+    failed = []
+    try:
+        for kind, n, tb, d1, d2 in itertools.product(kinds, ns, tbs, d1s, d2s):
+            try:
+                design[kind](n, tb, d1, d2)
+            except (ValueError, np.linalg.LinAlgError) as e:
+                failed.append((kind, n, tb, d1, d2, str(e)))
+                if verbose:
+                    print(f"{table_key(kind, n, tb, d1, d2)} failed: {e}")
+        if verbose:
+            print(f"{len(table_entries())} designs in {path}")
+    finally:
+        table_config(path=previous['path'] or '', enabled=previous['enabled'],
+                     write_back=previous['write_back'])
+
+    return failed
+
+
+def _paths(path):
+    return os.path.join(path, 'coeffs.npy'), os.path.join(path, 'index.json')
+
+
+@contextmanager
+def _file_lock(path):
+    # Exclusive lock across processes on the table at path
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, 'lock'), 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _open():
+    # The open table, loading it on first use. Called with _lock held.
+    if _table is not None and _table['path'] == _config['path']:
+        return _table
+    with _file_lock(_config['path']):
+        return _reload()
+
+
+def _reload():
+    # Read the table from disk, creating it if there is none. Called with
+    # _lock and the file lock held.
+    global _table
+
+    path = _config['path']
+    coeffs_path, index_path = _paths(path)
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+        coeffs = np.load(coeffs_path, mmap_mode='r+')
+        created = False
+    except (OSError, ValueError):
+        index = {'used': 0, 'entries': {}}
+        coeffs = np.lib.format.open_memmap(coeffs_path, mode='w+', dtype=float,
+                                           shape=(_INITIAL_CAPACITY,))
+        created = True
+
+    _table = {
+        'path': path,
+        'coeffs': coeffs,
+        'index': index['entries'],
+        'used': index['used'],
+    }
+    if created:
+        _save_index(_table)
+    return _table
+
+
+def _grow(table, needed):
+    # Double the capacity of coeffs.npy, copying into a new mapped file
+    coeffs_path, _ = _paths(table['path'])
+    capacity = len(table['coeffs'])
+    while capacity < needed:
+        capacity *= 2
+
+    tmp = coeffs_path + '.tmp.npy'
+    grown = np.lib.format.open_memmap(tmp, mode='w+', dtype=float, shape=(capacity,))
+    grown[:table['used']] = table['coeffs'][:table['used']]
+    grown.flush()
+    del grown
+    table['coeffs'] = None
+    os.replace(tmp, coeffs_path)
+    table['coeffs'] = np.load(coeffs_path, mmap_mode='r+')
+
+
+def _save_index(table):
+    _, index_path = _paths(table['path'])
+    tmp = index_path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'used': table['used'], 'entries': table['index']}, f)
+    os.replace(tmp, index_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('path', help='table directory')
+    parser.add_argument('--kinds', nargs='+', default=['dzpm', 'dzmp'])
+    parser.add_argument('--n', nargs='+', type=int, required=True)
+    parser.add_argument('--tb', nargs='+', type=float, required=True)
+    parser.add_argument('--d1', nargs='+', type=float, required=True)
+    parser.add_argument('--d2', nargs='+', type=float, required=True)
+    args = parser.parse_args(argv)
+
+    # Run as a script this module is __main__, while dzpm and dzmp use the
+    # imported design_table, whose configuration must be the one set
+    try:
+        from .design_table import table_build as build
+    except ImportError:
+        # Fallback for direct import
+        from design_table import table_build as build
+
+    failed = build(args.path, args.kinds, args.n, args.tb, args.d1, args.d2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,22 +10,39 @@ h = dzls(nf, tb, d1, d2)
 
 dzls designs a least squares filter.
 
+With piecewise constant weights the least squares normal equations for
+the full length filter are Toeplitz, with entries that are closed form
+band integrals, so by default they are solved by Levinson recursion in
+O(nf^2) rather than with the dense solve in firls. engine='firls' uses
+firls.
+
+As firls(nf-1, ...) in MATLAB, the filter has nf taps. scipy's firls
+only designs odd lengths, so for an even nf the firls engine solves the
+same normal equations densely, as firls does.
+
 written by John Pauly, Feb 26, 1992
 (c) Leland Stanford Junior University
 Converted to Python
 """
 
 import numpy as np
+from scipy.linalg import solve_toeplitz, toeplitz, lstsq, LinAlgError
 from scipy.signal import firls
 
 try:
     from .dinf import dinf
+    from .cache import cached
+    from .instrument import instrumented, span
 except ImportError:
     # Fallback for direct import
     from dinf import dinf
+    from cache import cached
+    from instrument import instrumented, span
 
 
-def dzls(nf, tb, d1, d2):
+@instrumented
+@cached
+def dzls(nf, tb, d1, d2, engine='toeplitz'):
     """
     Design a least squares filter.
     
@@ -39,6 +56,8 @@ def dzls(nf, tb, d1, d2):
         Pass band ripple
     d2 : float
         Stop band ripple
+    engine : str, optional
+        'toeplitz' (default) or 'firls'
     
     Returns:
     --------
@@ -51,7 +70,42 @@ def dzls(nf, tb, d1, d2):
     m = np.array([1, 1, 0, 0])
     w_weights = np.array([1, d1 / d2])
     
-    h = firls(nf - 1, f, m, w_weights)
+    if engine not in ('toeplitz', 'firls'):
+        raise ValueError("engine must be 'toeplitz' or 'firls'")
+    
+    if engine == 'toeplitz':
+        try:
+            with span('dzls.toeplitz', numtaps=nf):
+                return _toeplitz_ls(nf, f.reshape(-1, 2), m[::2], w_weights)
+        except LinAlgError:
+            # Singular leading minor, firls falls back to lstsq
+            pass
+    
+    with span('dzls.firls', numtaps=nf):
+        if nf % 2:
+            h = firls(nf, f, m, weight=w_weights)
+        else:
+            h = _toeplitz_ls(nf, f.reshape(-1, 2), m[::2], w_weights, dense=True)
     
     return h
 
+
+def _toeplitz_ls(numtaps, bands, desired, weights, dense=False):
+    # Least squares filter for piecewise constant desired response and
+    # weights, bands in units of Nyquist. Minimizing
+    #   sum_b W_b int_band |H(f) - D_b exp(-i pi f M)|^2 df,  M = (numtaps-1)/2
+    # over all numtaps coefficients gives R h = p with
+    #   R[j,k] = r(j-k),  r(t) = sum_b W_b int_band cos(pi t f) df
+    #   p[j] = sum_b W_b D_b int_band cos(pi (j-M) f) df
+    # and int_f1^f2 cos(pi t f) df = f2 sinc(t f2) - f1 sinc(t f1).
+    def band_integrals(t, wd):
+        g = bands[None, :, :] * np.sinc(t[:, None, None] * bands[None, :, :])
+        return (g[:, :, 1] - g[:, :, 0]) @ wd
+    
+    r = band_integrals(np.arange(numtaps, dtype=float), weights)
+    p = band_integrals(np.arange(numtaps) - (numtaps - 1) / 2, weights * desired)
+    
+    if dense:
+        return lstsq(toeplitz(r), p)[0]
+    return solve_toeplitz(r, p)
+
@@ -0,0 +1,183 @@
+"""
+dzmb - design a multiband rf pulse with the SLR algorithm
+
+[rf, x, p] = dzmb(n, tb, nb, sep, [ptype], [ftype], [d1], [d2], [flip])
+
+    nb - number of bands
+    sep - distance between band centers, in slice widths
+    phases - band phases in radians, (nb,) or (ncand, nb). By default
+      the candidates are a quadratic schedule and random phases.
+
+The single band beta polynomial of dzrf is shifted to each band center
+by modulation and the shifted copies are summed, each with its own
+phase. The phases do not change the profile magnitude, since the bands
+do not overlap, but they change the peak B1 a great deal: with equal
+phases every band peaks at the center of the pulse.
+
+All candidate phase schedules are built at once, the multiband beta of
+every candidate being one row of a matrix product, and ranked by the
+peak of |beta|, which is the peak rf in the small tip approximation.
+The best few are then designed together with batched b2a and ab2rf,
+which accounts for the nonlinearity at large flip angles, and the one
+with the lowest peak rf is returned, with its profile from ab2prof.
+
+Positions x are in the units of ab2prof, where a slice is tb wide and
+the bands are centered at (k - (nb-1)/2)*sep*tb.
+"""
+
+import numpy as np
+
+try:
+    from .dzrf import dzbeta
+    from .b2a import b2a
+    from .ab2rf import ab2rf
+    from .ab2prof import ab2prof
+    from .instrument import instrumented, span
+except ImportError:
+    # Fallback for direct import
+    from dzrf import dzbeta
+    from b2a import b2a
+    from ab2rf import ab2rf
+    from ab2prof import ab2prof
+    from instrument import instrumented, span
+
+
+@instrumented
+def dzmb(n, tb, nb, sep, ptype='ex', ftype='ls', d1=0.01, d2=0.01, flip=None,
+         phases=None, ncand=256, keep=8, seed=0, npts=None, return_info=False):
+    """
+    Design a multiband rf pulse with phases chosen for the lowest peak B1.
+
+    Parameters:
+    -----------
+    n : int
+        Number of samples
+    tb : float
+        Time-bandwidth product of each band
+    nb : int
+        Number of bands
+    sep : float
+        Distance between band centers, in slice widths
+    ptype, ftype, d1, d2, flip :
+        As for dzrf
+    phases : array_like, optional
+        Candidate band phases, (nb,) or (ncand, nb)
+    ncand : int, optional
+        Number of candidates when phases is not given
+    keep : int, optional
+        Candidates designed with b2a and ab2rf
+    seed : int, optional
+        Seed of the random candidates
+    npts : int, optional
+        Number of profile positions, as for ab2prof
+    return_info : bool, optional
+        Also return the phases and peaks of the candidates
+
+    Returns:
+    --------
+    rf : ndarray
+        RF waveform, in radians per sample
+    x : ndarray
+        Positions of the profile
+    p : ndarray
+        Predicted profile, as for ab2prof
+    info : dict, optional
+        'phases' of the returned pulse, 'beta', 'candidates' (ncand, nb),
+        their small tip 'peaks', and the 'finalists' with their rf 'b1'
+    """
+    if ptype == 'st':
+        raise ValueError("dzmb designs large tip pulses, use mbbeta for 'st'")
+    if (nb - 1) * sep * tb + tb >= n:
+        raise ValueError(f"{nb} bands {sep} slices apart do not fit in n = {n}, "
+                         f"which needs n > {(nb - 1) * sep * tb + tb:g}")
+
+    if phases is None:
+        phases = candidate_phases(nb, ncand, seed)
+    phases = np.atleast_2d(np.asarray(phases, dtype=float))
+    if phases.shape[1] != nb:
+        raise ValueError(f"phases must have {nb} columns")
+
+    b0 = dzbeta(n, tb, ptype, ftype, d1, d2, flip)
+    beta = mbbeta(b0, tb, sep, phases)
+
+    # Small tip screen of every candidate
+    peaks = np.max(np.abs(beta), axis=1)
+    order = np.argsort(peaks, kind='stable')[:keep]
+
+    # Exact peak rf of the finalists, designed as one batch
+    with span('dzmb.finalists', batch=len(order), n=n):
+        a = b2a(beta[order])
+        rf = ab2rf(a, beta[order])
+    b1 = np.max(np.abs(rf), axis=1)
+    best = int(np.argmin(b1))
+
+    x, p = ab2prof(a[best], beta[order[best]], ptype, npts)
+
+    if return_info:
+        info = {
+            'phases': phases[order[best]],
+            'beta': beta[order[best]],
+            'candidates': phases,
+            'peaks': peaks,
+            'finalists': order,
+            'b1': b1,
+        }
+        return rf[best], x, p, info
+    return rf[best], x, p
+
+
+def mbbeta(b, tb, sep, phases):
+    """
+    Sum of copies of the beta polynomial b shifted to the band centers,
+    for each row of band phases.
+
+    Parameters:
+    -----------
+    b : array_like
+        Single band beta polynomial
+    tb : float
+        Time-bandwidth product, the slice width
+    sep : float
+        Distance between band centers, in slice widths
+    phases : array_like
+        Band phases in radians, (nb,) or (ncand, nb)
+
+    Returns:
+    --------
+    beta : ndarray
+        Multiband beta polynomials, (n,) or (ncand, n)
+    """
+    b = np.asarray(b)
+    n = len(b)
+    phases = np.asarray(phases, dtype=float)
+    nb = phases.shape[-1]
+
+    # Band k is centered at x_k, and multiplying by exp(2j*pi*t*x_k/n)
+    # moves the profile of b from 0 to x_k
+    xk = (np.arange(nb) - (nb - 1) / 2) * sep * tb
+    t = np.arange(n)
+    shifts = np.exp(2j * np.pi * np.outer(xk, t) / n)
+
+    return (np.exp(1j * phases) @ shifts) * b
+
+
+def candidate_phases(nb, ncand=256, seed=0):
+    """
+    Candidate band phases: all zero, a quadratic schedule pi*k^2/nb, which
+    spreads the band peaks evenly over the pulse, and ncand - 2 random
+    schedules.
+
+    Returns:
+    --------
+    phases : ndarray
+        (ncand, nb) phases in radians, the first band at phase 0
+    """
+    k = np.arange(nb)
+    rng = np.random.default_rng(seed)
+    phases = np.empty((max(ncand, 2), nb))
+    phases[0] = 0
+    phases[1] = np.pi * k**2 / nb
+    phases[2:] = rng.uniform(0, 2 * np.pi, (len(phases) - 2, nb))
+    # Only the phases relative to the first band matter
+    phases[2:, 0] = 0
+    return phases
@@ -0,0 +1,315 @@
+"""
+dzminlen - find the shortest SLR pulse that meets a profile specification
+
+[n, rf] = dzminlen(tb, d1, d2, [flip], [ptype], [ftype], [dt], [b1max], [tmax])
+
+The number of samples n is searched for, with tb, the ripples and the
+flip angle fixed. Each candidate is designed with dzrf, and checked with
+the alpha and beta polynomials evaluated by ab2prof, rather than by
+simulating the pulse:
+  - the passband and stopband ripples of the profile are at most
+    (1 + rtol) times d1 and d2. dinf is an empirical fit, and the
+    profiles exceed the nominal ripples: with d1 = d2 = 0.01, 'pm'
+    excitation pulses reach up to 2.8 times them for tb from 2 to 16,
+    'ls' up to 4.6 times, and 'min' up to 3.5 times for tb >= 4 (and
+    10 times at tb = 2). The default rtol=2 covers 'pm' at those
+    ripples; other filter types, or smaller d1 and d2, which are
+    exceeded by more, need a larger rtol.
+  - the peak B1, max|rf|/(2*pi*gamma*dt), is at most b1max
+  - the duration n*dt is at most tmax
+
+The band edges are at (1 -+ w)*tb/2 with w = dinf(d1, d2)/tb, so the
+stopband edge is below Nyquist only if n > tb + dinf, which is the
+starting estimate. The candidates are then bracketed by doubling and
+narrowed by a k-ary search, evaluating k candidates at a time. With
+workers=k > 1 they are evaluated in a process pool of k workers;
+by default k is 1 and they are evaluated one at a time in this
+process.
+
+The search assumes that once an n passes, every longer one does. The
+peak B1 falls with n, but the ripples are not monotonic in n: short
+pulses can be within the ripples when longer ones are not. The n
+returned passes and n - 1 fails, but when a b1max pushes the bracket
+past a failing length a shorter passing n can be missed. With 'pm' at
+the default ripples and rtol every n from the starting estimate up
+passes, and the result is the shortest.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    from .dzrf import dzbeta, ripples, FLIPS
+    from .dinf import dinf
+    from .b2a import b2a
+    from .ab2rf import ab2rf
+    from .ab2prof import ab2prof
+except ImportError:
+    # Fallback for direct import
+    from dzrf import dzbeta, ripples, FLIPS
+    from dinf import dinf
+    from b2a import b2a
+    from ab2rf import ab2rf
+    from ab2prof import ab2prof
+
+GAMMA = 4257.0  # Hz/G
+
+
+def dzminlen(tb, d1=0.01, d2=0.01, flip=None, ptype='ex', ftype='pm', dt=4e-6,
+             b1max=None, tmax=None, nmax=None, rtol=2.0, workers=1,
+             return_info=False):
+    """
+    Find the smallest number of samples for which an SLR pulse meets the
+    ripple, peak B1 and duration limits.
+    
+    Parameters:
+    -----------
+    tb : float
+        Time-bandwidth product
+    d1, d2 : float
+        Passband and stopband ripples of the profile
+    flip : float, optional
+        Flip angle in radians, default from the pulse type
+    ptype : str, optional
+        'ex', 'se', 'inv', 'sat' or 'st'
+    ftype : str, optional
+        'pm', 'ls', 'min', 'max' or 'ms'
+    dt : float, optional
+        Sample spacing in seconds
+    b1max : float, optional
+        Largest peak B1 in Gauss
+    tmax : float, optional
+        Longest duration in seconds
+    nmax : int, optional
+        Largest n tried when tmax is not given, default 16 times the
+        starting estimate or 1024, whichever is larger
+    rtol : float, optional
+        Relative tolerance on the ripples, default 2, which covers the
+        excess of 'pm' profiles at the default ripples
+    workers : int, optional
+        Processes evaluating candidates, default 1. None uses the number
+        of cores.
+    return_info : bool, optional
+        Also return the metrics of every candidate evaluated
+    
+    Returns:
+    --------
+    n : int
+        Number of samples
+    rf : ndarray
+        RF waveform from dzrf(n, ...), n samples in radians per sample
+    info : dict, optional
+        'n0' (starting estimate), 'metrics' (of the result) and
+        'evaluated', a list of metrics dicts sorted by n
+    """
+    if flip is None:
+        flip = FLIPS[ptype]
+    spec = dict(tb=tb, d1=d1, d2=d2, flip=flip, ptype=ptype, ftype=ftype,
+                dt=dt, b1max=b1max, rtol=rtol)
+    
+    # Every filter type designs n samples, so every n is a candidate
+    step = 1
+    
+    n0 = _round_up(tb + _dinf(ptype, ftype, d1, d2, flip), step)
+    n0 = max(n0, 4)
+    if tmax is not None:
+        nhi = int(np.floor(tmax / dt + 1e-9)) // step * step
+    else:
+        nhi = nmax if nmax is not None else max(16 * n0, 1024)
+    if nhi < n0:
+        raise ValueError(f"tmax allows {nhi} samples, fewer than the {n0} needed for tb={tb}")
+    
+    if workers is None:
+        workers = os.cpu_count() or 1
+    k = max(1, workers)
+    
+    evaluated = {}
+    
+    def evaluate(ns, pool):
+        ns = [n for n in ns if n not in evaluated]
+        args = [(n, spec) for n in ns]
+        results = pool.map(_evaluate, args) if pool is not None else map(_evaluate, args)
+        for n, m in zip(ns, results):
+            evaluated[n] = m
+    
+    pool = ProcessPoolExecutor(max_workers=k) if k > 1 else None
+    try:
+        # Bracket: n0, 2 n0, 4 n0, ... up to nhi, k at a time, until one passes
+        ladder = [n0]
+        while ladder[-1] < nhi:
+            ladder.append(min(_round_up(2 * ladder[-1], step), nhi))
+        
+        lo, hi = n0 - step, None
+        for i in range(0, len(ladder), k):
+            ns = ladder[i:i + k]
+            evaluate(ns, pool)
+            hi, lo = _first_pass(ns, evaluated, lo)
+            if hi is not None:
+                break
+        
+        if hi is None:
+            def score(m):
+                r = max(m['ripple1'] / d1, m['ripple2'] / d2) / (1 + rtol)
+                return max(r, m['b1'] / b1max) if b1max is not None else r
+            best = min(evaluated.values(), key=score)
+            raise ValueError(
+                f"no n up to {nhi} meets the specification; closest was n={best['n']} "
+                f"with ripples {best['ripple1']:.3g}, {best['ripple2']:.3g} "
+                f"and peak B1 {best['b1']:.3g} G")
+        
+        # Narrow (lo, hi] with k evenly spaced candidates at a time
+        while hi - lo > step:
+            m = (hi - lo) // step
+            ns = sorted({lo + step * max(1, round(i * m / (k + 1))) for i in range(1, k + 1)})
+            ns = [n for n in ns if n < hi]
+            evaluate(ns, pool)
+            new_hi, lo = _first_pass(ns, evaluated, lo)
+            if new_hi is not None:
+                hi = new_hi
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    
+    rf = evaluated[hi].pop('rf')
+    for m in evaluated.values():
+        m.pop('rf', None)
+    
+    if return_info:
+        info = {
+            'n0': n0,
+            'metrics': evaluated[hi],
+            'evaluated': [evaluated[n] for n in sorted(evaluated)],
+        }
+        return hi, rf, info
+    return hi, rf
+
+
+def profile_ripple(a, b, tb, ptype, ftype, d1, d2, flip, npts=None):
+    """
+    Passband and stopband ripples of the profile of a dzrf design, and the
+    band edges, from the alpha and beta polynomials.
+    
+    The profile is normalized so that it is 1 in the passband and 0 in the
+    stopband: |Mxy|/sin(flip) for 'ex', |b^2|/sin(flip/2)^2 for 'se',
+    (1 - Mz)/(1 - cos(flip)) for 'inv' and 'sat', and |b|/flip for 'st'.
+    
+    Returns:
+    --------
+    ripple1, ripple2 : float
+        Largest deviation in the passband and the stopband
+    edges : tuple of float
+        Passband and stopband edges, in the units of x from ab2prof
+    """
+    x, q = _normalized_profile(a, b, ptype, flip, npts)
+    
+    w = _dinf(ptype, ftype, d1, d2, flip) / tb
+    edges = ((1 - w) * tb / 2, (1 + w) * tb / 2)
+    
+    passband = np.abs(x) <= edges[0]
+    stopband = np.abs(x) >= edges[1]
+    ripple1 = np.max(np.abs(q[passband] - 1)) if np.any(passband) else np.inf
+    ripple2 = np.max(np.abs(q[stopband])) if np.any(stopband) else np.inf
+    
+    return float(ripple1), float(ripple2), edges
+
+
+def pulse_metrics(n, tb, d1=0.01, d2=0.01, flip=None, ptype='ex', ftype='pm', dt=4e-6):
+    """
+    Design a pulse with dzrf and measure it.
+    
+    Returns:
+    --------
+    metrics : dict
+        'rf', 'ripple1', 'ripple2', 'b1' (peak, in G), 'energy' (sum of
+        B1^2 dt, in G^2 s), 'transition' (width between the 90% and 10%
+        points of the normalized profile, in the units of x from ab2prof)
+        and 'duration' (s)
+    """
+    if flip is None:
+        flip = FLIPS[ptype]
+    
+    b = dzbeta(n, tb, ptype, ftype, d1, d2, flip)
+    if ptype == 'st':
+        a = None
+        rf = b
+    else:
+        a = b2a(b)
+        rf = ab2rf(a, b)
+    
+    ripple1, ripple2, _ = profile_ripple(a, b, tb, ptype, ftype, d1, d2, flip)
+    
+    # Transition on the positive side, from the last point above 0.9 to
+    # the first point below 0.1 beyond it
+    x, q = _normalized_profile(a, b, ptype, flip)
+    pos = x >= 0
+    x, q = x[pos], q[pos]
+    above = np.nonzero(q >= 0.9)[0]
+    i90 = above[-1] if len(above) else 0
+    below = np.nonzero(q[i90:] <= 0.1)[0]
+    transition = x[i90 + below[0]] - x[i90] if len(below) else np.inf
+    
+    b1 = np.abs(rf) / (2 * np.pi * GAMMA * dt)
+    
+    return {
+        'rf': rf,
+        'ripple1': ripple1,
+        'ripple2': ripple2,
+        'b1': float(np.max(b1)),
+        'energy': float(np.sum(b1**2) * dt),
+        'transition': float(transition),
+        'duration': len(rf) * dt,
+    }
+
+
+def _normalized_profile(a, b, ptype, flip, npts=None):
+    # Profile scaled to 1 in the passband and 0 in the stopband
+    x, p = ab2prof(a, b, ptype, npts)
+    
+    if ptype == 'ex':
+        q = np.abs(p) / np.sin(flip)
+    elif ptype == 'se':
+        q = np.abs(p) / np.sin(flip / 2)**2
+    elif ptype in ('inv', 'sat'):
+        q = (1 - np.real(p)) / (1 - np.cos(flip))
+    else:
+        q = np.abs(p) / (1.0 if flip is None else flip)
+    
+    return x, q
+
+
+def _dinf(ptype, ftype, d1, d2, flip):
+    # Transition width in samples of the filter dzrf designs
+    _, d1, d2 = ripples(ptype, d1, d2, flip)
+    if ftype in ('min', 'max'):
+        return 0.5 * dinf(2 * d1, 0.5 * d2 * d2)
+    return dinf(d1, d2)
+
+
+def _first_pass(ns, evaluated, lo):
+    # Smallest passing candidate, and the largest failing one below it
+    for n in ns:
+        if evaluated[n]['ok']:
+            return n, lo
+        lo = n
+    return None, lo
+
+
+def _round_up(n, step):
+    return int(step * np.ceil(n / step))
+
+
+def _evaluate(args):
+    # Design and check one candidate, in a worker process
+    n, spec = args
+    m = pulse_metrics(n, spec['tb'], spec['d1'], spec['d2'], spec['flip'],
+                      spec['ptype'], spec['ftype'], spec['dt'])
+    
+    rtol = spec['rtol']
+    m['ok'] = bool(m['ripple1'] <= (1 + rtol) * spec['d1']
+                   and m['ripple2'] <= (1 + rtol) * spec['d2']
+                   and (spec['b1max'] is None or m['b1'] <= spec['b1max']))
+    m['n'] = n
+    
+    return m
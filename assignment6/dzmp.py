@@ -27,12 +27,17 @@ from scipy.signal import remez
 try:
     from .dinf import dinf
     from .fmp import fmp
+    from .instrument import instrumented, span
+    from .design_table import table_get, table_put
 except ImportError:
     # Fallback for direct import
     from dinf import dinf
     from fmp import fmp
+    from instrument import instrumented, span
+    from design_table import table_get, table_put
 
 
+@instrumented
 def dzmp(n, tb, d1, d2):
     """
     Design a minimum phase filter by first designing a linear phase
@@ -58,13 +63,18 @@ def dzmp(n, tb, d1, d2):
     di = 0.5 * dinf(2 * d1, 0.5 * d2 * d2)
     w = di / tb
     f = np.array([0, (1 - w) * (tb / 2), (1 + w) * (tb / 2), n / 2]) / (n / 2)
-    m = np.array([1, 1, 0, 0])
+    m = np.array([1, 0])  # remez takes one desired value per band
     w_weights = np.array([1, 2 * d1 / (0.5 * d2 * d2)])
     
-    # firpm in MATLAB is equivalent to remez in scipy
-    hl = remez(n2 - 1, f, m, w_weights)
+    # The linear phase filter comes from the design table if it is there
+    hl = table_get('dzmp', n, tb, d1, d2)
+    if hl is None:
+        # firpm(n2-1) in MATLAB designs n2 taps; fmp needs the odd length
+        with span('dzmp.remez', numtaps=n2):
+            hl = remez(n2, f, m, weight=w_weights, fs=2)
+        table_put('dzmp', n, tb, d1, d2, hl)
     
-    h = fmp(hl)
+    h = fmp(hl, check=True)
     
     return h
 
@@ -20,11 +20,19 @@ from scipy.signal import remez
 
 try:
     from .dinf import dinf
+    from .cache import cached
+    from .instrument import instrumented, span
+    from .design_table import table_get, table_put
 except ImportError:
     # Fallback for direct import
     from dinf import dinf
+    from cache import cached
+    from instrument import instrumented, span
+    from design_table import table_get, table_put
 
 
+@instrumented
+@cached
 def dzpm(nf, tb, d1, d2):
     """
     Design a Parks-McClellan filter.
@@ -45,14 +53,23 @@ def dzpm(nf, tb, d1, d2):
     h : ndarray
         Filter coefficients
     """
+    h = table_get('dzpm', nf, tb, d1, d2)
+    if h is not None:
+        return h
+    
     di = dinf(d1, d2)
     w = di / tb
     f = np.array([0, (1 - w) * (tb / 2), (1 + w) * (tb / 2), nf / 2]) / (nf / 2)
-    m = np.array([1, 1, 0, 0])
+    m = np.array([1, 0])  # remez takes one desired value per band
     w_weights = np.array([1, d1 / d2])
     
-    # firpm in MATLAB is equivalent to remez in scipy
-    h = remez(nf - 1, f, m, w_weights)
+    # firpm(nf-1) in MATLAB designs nf taps, which is remez(nf) in scipy,
+    # with fs=2 so that the band edges are normalized to Nyquist as in
+    # MATLAB
+    with span('dzpm.remez', numtaps=nf):
+        h = remez(nf, f, m, weight=w_weights, fs=2)
+    
+    table_put('dzpm', nf, tb, d1, d2, h)
     
     return h
 
@@ -0,0 +1,161 @@
+"""
+dzrf - design an rf pulse with the SLR algorithm
+
+rf = dzrf(n, tb, ptype, ftype, d1, d2, [flip])
+
+    n - number of samples
+    tb - time-bandwidth product
+    ptype - pulse type.  Options are:
+      'st' - small tip angle (default)
+      'ex' - pi/2 excitation pulse
+      'se' - spin-echo pulse
+      'inv' - inversion
+      'sat' - pi/2 saturation pulse
+    ftype - type of filter to use in the design
+      'ms' - Hamming windowed sinc (an msinc)
+      'pm' - Parks-McClellan equal ripple
+      'ls' - least squares (default)
+      'min' - minimum phase (factored pm)
+      'max' - maximum phase (reversed min)
+    d1 - passband ripple of the profile
+    d2 - stopband ripple of the profile
+    flip - flip angle in radians. The default is the flip angle of the
+      pulse type, and for 'st' the filter itself is returned.
+
+The profile ripples are mapped to ripples of the beta polynomial for each
+pulse type, and beta is scaled by sin(flip/2).
+
+written by John Pauly, 1992
+(c) Board of Trustees, Leland Stanford Junior University
+Converted to Python
+"""
+
+import numpy as np
+
+try:
+    from .dzls import dzls
+    from .dzpm import dzpm
+    from .dzmp import dzmp
+    from .b2a import b2a
+    from .ab2rf import ab2rf
+except ImportError:
+    # Fallback for direct import
+    from dzls import dzls
+    from dzpm import dzpm
+    from dzmp import dzmp
+    from b2a import b2a
+    from ab2rf import ab2rf
+
+PTYPES = ('st', 'ex', 'se', 'inv', 'sat')
+FTYPES = ('ms', 'pm', 'ls', 'min', 'max')
+
+# Default flip angle of each pulse type
+FLIPS = {'st': None, 'ex': np.pi / 2, 'se': np.pi, 'inv': np.pi, 'sat': np.pi / 2}
+
+
+def dzrf(n, tb=4, ptype='st', ftype='ls', d1=0.01, d2=0.01, flip=None):
+    """
+    Design an rf pulse with the SLR algorithm.
+    
+    Parameters:
+    -----------
+    n : int
+        Number of samples
+    tb : float
+        Time-bandwidth product
+    ptype : str
+        Pulse type, one of 'st', 'ex', 'se', 'inv', 'sat'
+    ftype : str
+        Filter type, one of 'ms', 'pm', 'ls', 'min', 'max'
+    d1 : float
+        Passband ripple of the profile
+    d2 : float
+        Stopband ripple of the profile
+    flip : float, optional
+        Flip angle in radians, default from the pulse type
+    
+    Returns:
+    --------
+    rf : ndarray
+        RF waveform, scaled so that sum(rf) = flip angle
+    """
+    b = dzbeta(n, tb, ptype, ftype, d1, d2, flip)
+    
+    if ptype == 'st':
+        return b
+    
+    return ab2rf(b2a(b), b)
+
+
+def dzbeta(n, tb=4, ptype='st', ftype='ls', d1=0.01, d2=0.01, flip=None):
+    """
+    Beta polynomial designed by dzrf, scaled by sin(flip/2).
+    
+    For 'st' the filter is returned, scaled by flip if it is given.
+    """
+    if ptype not in PTYPES:
+        raise ValueError(f"ptype must be one of {PTYPES}")
+    if ftype not in FTYPES:
+        raise ValueError(f"ftype must be one of {FTYPES}")
+    
+    bsf, d1, d2 = ripples(ptype, d1, d2, flip)
+    
+    if ftype == 'ms':
+        b = msinc(n, tb / 4)
+    elif ftype == 'pm':
+        b = dzpm(n, tb, d1, d2)
+    elif ftype == 'ls':
+        b = dzls(n, tb, d1, d2)
+    elif ftype == 'min':
+        b = dzmp(n, tb, d1, d2)
+        b = b[::-1]
+    else:
+        b = dzmp(n, tb, d1, d2)
+    
+    return bsf * b
+
+
+def ripples(ptype, d1, d2, flip=None):
+    """
+    Scale factor for beta and the ripples of beta that give profile
+    ripples d1 and d2 for a pulse type.
+    
+    Returns:
+    --------
+    bsf : float
+        Scale factor, sin(flip/2)
+    d1, d2 : float
+        Beta passband and stopband ripples
+    """
+    if ptype == 'st':
+        return (1.0 if flip is None else flip), d1, d2
+    
+    if flip is None:
+        flip = FLIPS[ptype]
+    bsf = np.sin(flip / 2)
+    
+    if ptype == 'ex':
+        d1 = np.sqrt(d1 / 2)
+        d2 = d2 / np.sqrt(2)
+    elif ptype == 'se':
+        d1 = d1 / 4
+        d2 = np.sqrt(d2)
+    elif ptype == 'inv':
+        d1 = d1 / 8
+        d2 = np.sqrt(d2 / 2)
+    elif ptype == 'sat':
+        d1 = d1 / 2
+        d2 = np.sqrt(d2)
+    
+    return bsf, d1, d2
+
+
+def msinc(n, m):
+    """
+    Hamming windowed sinc of length n, with m sinc-lobes. The sum of
+    the coefficients is approximately 1.
+    """
+    x = np.arange(-n / 2, n / 2) / (n / 2)
+    snc = np.sin(m * 2 * np.pi * x + 1e-5) / (m * 2 * np.pi * x + 1e-5)
+    ms = snc * (0.54 + 0.46 * np.cos(np.pi * x))
+    return ms * 4 * m / n
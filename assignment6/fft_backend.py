@@ -0,0 +1,89 @@
+"""
+fft_backend - shared FFT layer for the SLR design routines
+
+X = fft(x, [n], [axis])
+x = ifft(X, [n], [axis])
+X = rfft(x, [n], [axis])
+x = irfft(X, [n], [axis])
+set_workers(workers)
+
+Thin wrappers around scipy.fft, which keeps a cache of FFT plans so that
+repeated transforms of the same size reuse them, and can split a batch of
+transforms over worker threads. All transforms take an axis, so a batch of
+designs can be transformed with one call. Real inputs to fft are handled
+with a real-to-complex transform internally.
+
+The number of workers defaults to 1, and can be set with set_workers or
+the environment variable MRI_FFT_WORKERS (-1 uses all cores).
+
+scratch(shape, dtype) returns a reusable per-thread buffer for building
+zero-padded inputs without allocating a new array on every call.
+"""
+
+import os
+import threading
+
+import numpy as np
+import scipy.fft
+
+_workers = int(os.environ.get('MRI_FFT_WORKERS', 1))
+_local = threading.local()
+
+
+def set_workers(workers):
+    """
+    Set the number of worker threads used by the transforms.
+
+    Parameters:
+    -----------
+    workers : int or None
+        Number of threads, -1 for all cores, None for 1
+
+    Returns:
+    --------
+    previous : int
+        The previous setting
+    """
+    global _workers
+    previous = _workers
+    _workers = 1 if workers is None else int(workers)
+    return previous
+
+
+def get_workers():
+    return _workers
+
+
+def fft(x, n=None, axis=-1):
+    return scipy.fft.fft(x, n, axis=axis, workers=_workers)
+
+
+def ifft(x, n=None, axis=-1):
+    return scipy.fft.ifft(x, n, axis=axis, workers=_workers)
+
+
+def rfft(x, n=None, axis=-1):
+    return scipy.fft.rfft(x, n, axis=axis, workers=_workers)
+
+
+def irfft(x, n=None, axis=-1):
+    return scipy.fft.irfft(x, n, axis=axis, workers=_workers)
+
+
+def scratch(shape, dtype=complex):
+    """
+    Zero-filled buffer of the given shape and dtype, reused by later calls
+    from the same thread. The contents are only valid until the next call
+    with the same shape and dtype, so it must not be returned to callers.
+    """
+    buffers = getattr(_local, 'buffers', None)
+    if buffers is None:
+        buffers = _local.buffers = {}
+
+    key = (tuple(np.atleast_1d(shape)), np.dtype(dtype).str)
+    buf = buffers.get(key)
+    if buf is None:
+        buf = buffers[key] = np.zeros(key[0], dtype=dtype)
+    else:
+        buf.fill(0)
+    return buf
@@ -4,6 +4,17 @@ fmp - Generate an equal ripple minimum phase filter starting with a linear
 
 Called by dzmp.
 
+The filters can be a batch along an axis, factored with one set of FFTs.
+The spectrum is oversampled by a pad factor, tried from 2 up to max_pad,
+until the magnitude of the minimum phase filter matches the square root
+of the shifted spectrum to within tol times the stopband level; if none
+does, the closest is kept. The original fixed factor of 8 can be given
+with pad. With check=True the zeros of the results are found, as the
+eigenvalues of a batch of companion matrices, and an error is raised if
+any is outside the unit circle by more than root_tol. dzmp checks its
+filters; the check costs more than the factorization itself, so large
+batches may leave it off.
+
 written by John Pauly, 1992
 (c) Board of Trustees, Leland Stanford Junior University
 Converted to Python
@@ -13,12 +24,18 @@ import numpy as np
 
 try:
     from .mag2mp import mag2mp
+    from .instrument import instrumented, span
+    from .fft_backend import fft, ifft, rfft, scratch
 except ImportError:
     # Fallback for direct import
     from mag2mp import mag2mp
+    from instrument import instrumented, span
+    from fft_backend import fft, ifft, rfft, scratch
 
 
-def fmp(h):
+@instrumented
+def fmp(h, axis=-1, pad=None, tol=0.25, max_pad=16, check=False, root_tol=None,
+        return_pad=False):
     """
     Generate an equal ripple minimum phase filter starting with a linear
     phase filter.
@@ -26,41 +43,143 @@ def fmp(h):
     Parameters:
     -----------
     h : array_like
-        Linear phase filter coefficients
+        Linear phase filter coefficients, of odd length
+    axis : int, optional
+        Axis of h holding the coefficients, for a batch of filters
+    pad : int, optional
+        Fixed oversampling factor. By default it is chosen adaptively.
+    tol : float, optional
+        Largest magnitude error accepted by the adaptive pad, relative to
+        the stopband level of the minimum phase filter
+    max_pad : int, optional
+        Largest pad factor tried
+    check : bool, optional
+        Verify that all zeros are inside the unit circle
+    root_tol : float, optional
+        How far outside the unit circle a zero may be found by check.
+        Zeros on the unit circle are double zeros of the shifted
+        spectrum, which the factorization places to within about one
+        bin of the FFT grid. The default is two bins, 4*pi/lp for an FFT
+        length lp.
+    return_pad : bool, optional
+        Also return the pad factor used for each filter
     
     Returns:
     --------
     hmp : ndarray
-        Minimum phase filter coefficients
+        Minimum phase filter coefficients, (l+1)/2 along axis
+    pad : int or ndarray, optional
+        Pad factor used, per filter for a batch
     """
-    h = np.asarray(h)
-    l = len(h)
+    h = np.moveaxis(np.asarray(h), axis, -1)
+    l = h.shape[-1]
     
     if l % 2 == 0:
         raise ValueError('filter length must be odd')
     
-    # Calculate next power of 2 that is >= 8*l
-    lp = int(8 * 2 ** np.ceil(np.log2(l)))
+    batch = h.shape[:-1]
+    h2 = h.reshape(-1, l)
+    
+    if pad is not None:
+        hmp = _fmp(h2, pad)[0]
+        pads = np.full(len(h2), pad)
+    else:
+        hmp = None
+        best = np.full(len(h2), np.inf)
+        pads = np.zeros(len(h2), dtype=int)
+        todo = np.arange(len(h2))
+        p = 2
+        while len(todo) and p <= max_pad:
+            out, err, level = _fmp(h2[todo], p)
+            if hmp is None:
+                hmp = np.zeros((len(h2), out.shape[1]), dtype=out.dtype)
+            better = err < best[todo]
+            hmp[todo[better]] = out[better]
+            pads[todo[better]] = p
+            best[todo[better]] = err[better]
+            todo = todo[err > tol * level]
+            p *= 2
     
-    # Pad h to length lp
-    pad_before = (lp - l) // 2
-    pad_after = lp - l - pad_before
-    hp = np.pad(h, (pad_before, pad_after), mode='constant', constant_values=0)
+    if check:
+        lp = pads * 2 ** np.ceil(np.log2(l))
+        limit = 1 + (4 * np.pi / lp if root_tol is None else root_tol)
+        r = _max_root(hmp)
+        bad = np.flatnonzero(r > limit)
+        if len(bad):
+            i = bad[0]
+            raise ValueError(f"filter {i} is not minimum phase, it has a zero at radius {r[i]:.4f}")
     
-    # fftc is just fft in this context
-    hpf = np.fft.fft(hp)
+    hmp = np.moveaxis(hmp.reshape(batch + (hmp.shape[-1],)), -1, axis)
+    
+    if return_pad:
+        return hmp, (pads.reshape(batch) if batch else int(pads[0]))
+    return hmp
+
+
+def _max_root(h):
+    # Largest zero radius of each row of h, from the eigenvalues of the
+    # companion matrices of the whole batch at once
+    nh, m = h.shape
+    if m < 2:
+        return np.zeros(nh)
+    lead = h[:, 0]
+    ok = lead != 0
+    r = np.zeros(nh)
+    if np.any(ok):
+        c = np.zeros((np.count_nonzero(ok), m - 1, m - 1), dtype=h.dtype)
+        c[:, 0, :] = -h[ok, 1:] / lead[ok, None]
+        c[:, np.arange(1, m - 1), np.arange(m - 2)] = 1
+        r[ok] = np.max(np.abs(np.linalg.eigvals(c)), axis=1)
+    for i in np.flatnonzero(~ok):
+        # np.roots drops the leading zeros
+        roots = np.roots(h[i])
+        r[i] = np.max(np.abs(roots)) if len(roots) else 0.0
+    return r
+
+
+def _fmp(h, pad):
+    # Factor each row of h with an FFT length of pad times the next power
+    # of 2, returning the minimum phase filters, the largest magnitude
+    # errors on the FFT grid, and the stopband levels
+    nh, l = h.shape
+    lp = int(pad * 2 ** np.ceil(np.log2(l)))
+    
+    # Pad h to length lp, centered at lp/2, and fftshift it, by writing it
+    # straight into a reused buffer at the shifted positions. This is the
+    # fftc, the centered fft, so the spectrum of the symmetric filter is
+    # real.
+    pad_before = (lp - l + 1) // 2
+    hp = scratch((nh, lp), np.result_type(h.dtype, float))
+    hp[:, (np.arange(l) + pad_before + lp // 2) % lp] = h
+    
+    with span('fmp.fft', nfft=lp, batch=nh):
+        if np.isrealobj(hp):
+            # Real filters have Hermitian spectra, so only half is computed
+            half = rfft(hp)
+            hpf = np.concatenate([half, np.conj(half[:, -2:0:-1])], axis=1)
+        else:
+            hpf = fft(hp)
     
     # Shift minimum to be slightly above zero
-    hpfs = hpf - np.min(np.real(hpf)) * 1.000001
+    low = np.min(np.real(hpf), axis=1, keepdims=True)
+    mag = np.sqrt(np.abs(hpf - low * 1.000001))
     
-    # Get minimum phase version
-    hpfmp = mag2mp(np.sqrt(np.abs(hpfs)))
+    # Get minimum phase version. The fftshifts around mag2mp in the
+    # original cancel, since shifting the spectrum by half its length
+    # modulates the cepstrum by (-1)^k, which commutes with keeping the
+    # causal part.
+    hpfmp = mag2mp(mag, axis=1)
     
     # Convert back to time domain
-    hpmp = np.fft.ifft(np.fft.fftshift(np.conj(hpfmp)))
+    with span('fmp.fft', nfft=lp, batch=nh):
+        hpmp = ifft(np.conj(hpfmp))
     
     # Extract first half (minimum phase part)
-    hmp = hpmp[0:(l + 1) // 2]
+    hmp = hpmp[:, 0:(l + 1) // 2]
     
-    return hmp
-
+    # Compare its magnitude response with the one it should have
+    with span('fmp.fft', nfft=lp, batch=nh):
+        err = np.max(np.abs(np.abs(fft(hmp, lp)) - mag), axis=1)
+    level = np.sqrt(2 * np.abs(low[:, 0]))
+    
+    return hmp, err, level
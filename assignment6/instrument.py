@@ -0,0 +1,275 @@
+"""
+instrument - lightweight timers, counters and memory high-water marks
+
+enable([log], [memory])
+with span('dzpm.remez', numtaps=n):
+    ...
+count('ab2rf.steps', n)
+print(summary())
+disable()
+
+Public kernels are wrapped with @instrumented, which records the call
+count, wall time, input array sizes and (with memory=True) the
+tracemalloc high-water mark of every call. Instrumentation is off by
+default; while it is off, @instrumented and span cost one flag test.
+It can also be switched on with the environment variable
+MRI_INSTRUMENT=1, or MRI_INSTRUMENT=<path> to also write a log.
+
+Records can be streamed to a JSON-lines log as they are made, exported
+with export_jsonl, or summarized per name with summary.
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from functools import wraps
+
+import numpy as np
+
+_enabled = False
+_memory = False
+_tracing = False
+_log = None
+_records = []
+_counters = {}
+_local = threading.local()
+_lock = threading.Lock()
+
+
+def enable(log=None, memory=True):
+    """
+    Turn instrumentation on.
+
+    Parameters:
+    -----------
+    log : str, optional
+        JSON-lines file that records are appended to as they are made
+    memory : bool, optional
+        Track memory high-water marks with tracemalloc, which slows down
+        allocation-heavy code
+    """
+    global _enabled, _memory, _tracing, _log
+
+    if _log is not None:
+        _log.close()
+    _log = open(log, 'a') if log else None
+
+    _memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _tracing = True
+
+    _enabled = True
+
+
+def disable():
+    """
+    Turn instrumentation off. Records made so far are kept. tracemalloc
+    is stopped only if enable started it.
+    """
+    global _enabled, _tracing, _log
+
+    _enabled = False
+    if _tracing and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _tracing = False
+    if _log is not None:
+        _log.close()
+        _log = None
+
+
+def enabled():
+    return _enabled
+
+
+def reset():
+    """
+    Discard all records and counters.
+    """
+    with _lock:
+        _records.clear()
+        _counters.clear()
+
+
+def records():
+    with _lock:
+        return list(_records)
+
+
+def counters():
+    with _lock:
+        return dict(_counters)
+
+
+def count(name, n=1):
+    """
+    Add n to the counter name.
+    """
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullSpan()
+
+
+class _Span:
+    def __init__(self, name, sizes):
+        self.name = name
+        self.sizes = sizes
+        self.peak = 0
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+
+        self.depth = len(stack)
+        self.parent = stack[-1].name if stack else None
+
+        if _memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            # Fold the peak so far into the enclosing span before resetting
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            self.start_mem = current
+            self.peak = current
+
+        stack.append(self)
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.t0
+        stack = _local.stack
+        stack.pop()
+
+        record = {
+            'name': self.name,
+            'wall': wall,
+            'depth': self.depth,
+            'parent': self.parent,
+            'sizes': self.sizes,
+            'time': time.time(),
+        }
+
+        if _memory and tracemalloc.is_tracing() and hasattr(self, 'start_mem'):
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            record['peak_bytes'] = self.peak - self.start_mem
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, self.peak)
+
+        _emit(record)
+        return False
+
+
+def span(name, **sizes):
+    """
+    Context manager timing the enclosed block under name. Keyword
+    arguments are recorded alongside, e.g. array sizes.
+    """
+    if not _enabled:
+        return _NULL
+    return _Span(name, sizes)
+
+
+def _shape(value):
+    if isinstance(value, np.ndarray):
+        return list(value.shape)
+    if isinstance(value, (list, tuple)) and len(value) > 8:
+        return [len(value)]
+    if np.isscalar(value):
+        return value if isinstance(value, (int, float, str, bool)) else str(value)
+    return None
+
+
+def instrumented(func):
+    """
+    Decorator recording a span for every call of func, with the shapes of
+    array arguments and the values of scalar arguments.
+    """
+    name = func.__name__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+
+        sizes = {}
+        for i, a in enumerate(args):
+            s = _shape(a)
+            if s is not None:
+                sizes[f"arg{i}"] = s
+        for k, a in kwargs.items():
+            s = _shape(a)
+            if s is not None:
+                sizes[k] = s
+
+        with _Span(name, sizes):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def _emit(record):
+    with _lock:
+        _records.append(record)
+        if _log is not None:
+            _log.write(json.dumps(record, default=str) + '\n')
+            _log.flush()
+
+
+def export_jsonl(path):
+    """
+    Write all records, then the counters, to a JSON-lines file.
+    """
+    with _lock:
+        with open(path, 'w') as f:
+            for r in _records:
+                f.write(json.dumps(r, default=str) + '\n')
+            for name, n in _counters.items():
+                f.write(json.dumps({'counter': name, 'count': n}) + '\n')
+
+
+def summary():
+    """
+    Table of call count, total, mean and max wall time and the largest
+    memory high-water mark per name, sorted by total time.
+    """
+    stats = {}
+    with _lock:
+        for r in _records:
+            s = stats.setdefault(r['name'], {'calls': 0, 'total': 0.0, 'max': 0.0, 'peak': None})
+            s['calls'] += 1
+            s['total'] += r['wall']
+            s['max'] = max(s['max'], r['wall'])
+            if 'peak_bytes' in r:
+                s['peak'] = max(s['peak'] or 0, r['peak_bytes'])
+        counters = dict(_counters)
+
+    lines = [f"{'name':28s} {'calls':>7s} {'total ms':>11s} {'mean ms':>10s} {'max ms':>10s} {'peak MB':>9s}"]
+    for name, s in sorted(stats.items(), key=lambda kv: -kv[1]['total']):
+        peak = f"{s['peak'] / 2**20:9.2f}" if s['peak'] is not None else f"{'-':>9s}"
+        lines.append(f"{name:28s} {s['calls']:7d} {1e3 * s['total']:11.3f} "
+                     f"{1e3 * s['total'] / s['calls']:10.3f} {1e3 * s['max']:10.3f} {peak}")
+    for name, n in sorted(counters.items()):
+        lines.append(f"{name:28s} {n:7d}")
+
+    return '\n'.join(lines)
+
+
+if os.environ.get('MRI_INSTRUMENT'):
+    _env = os.environ['MRI_INSTRUMENT']
+    enable(log=None if _env in ('1', 'true', 'yes') else _env)
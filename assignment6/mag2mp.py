@@ -19,8 +19,17 @@ Converted to Python
 
 import numpy as np
 
+try:
+    from .instrument import instrumented
+    from .fft_backend import fft, ifft, rfft, irfft
+except ImportError:
+    # Fallback for direct import
+    from instrument import instrumented
+    from fft_backend import fft, ifft, rfft, irfft
 
-def mag2mp(x):
+
+@instrumented
+def mag2mp(x, axis=-1):
     """
     Take the magnitude of the fft of a signal, and return the fft of the analytic signal.
     
@@ -28,26 +37,38 @@ def mag2mp(x):
     -----------
     x : array_like
         Magnitude of analytic signal fft.
+    axis : int, optional
+        Axis of x holding the spectrum, so a batch of spectra can be
+        converted in one call
     
     Returns:
     --------
     a : ndarray
         FFT of analytic signal
     """
-    n = len(x)
+    x = np.moveaxis(np.asarray(x), axis, -1)
+    n = x.shape[-1]
     xl = np.log(x)  # log of mag spectrum
-    xlf = np.fft.fft(xl)  # FFT of log
-    
-    xlfp = np.zeros_like(xlf, dtype=complex)
-    xlfp[0] = xlf[0]  # keep DC the same
-    xlfp[1:(n//2)] = 2 * xlf[1:(n//2)]  # double positive freqs
-    xlfp[n//2] = xlf[n//2]  # keep half Nyquist the same, too
-    xlfp[(n//2 + 1):] = 0  # zero neg freqs
     
-    xlaf = np.fft.ifft(xlfp)  # IFFT
-    a = np.exp(xlaf)  # complex exponentiation
+    if np.isrealobj(xl) and n % 2 == 0:
+        # The log spectrum is real, so the real part of its analytic signal
+        # is xl itself and only the Hilbert transform is needed, which takes
+        # two real transforms instead of two complex ones
+        xlf = rfft(xl)
+        xlf *= -1j
+        xlf[..., 0] = 0
+        xlf[..., n//2] = 0
+        a = x * np.exp(1j * irfft(xlf, n))
+    else:
+        xlf = fft(xl)  # FFT of log
+        
+        xlfp = np.zeros_like(xlf, dtype=complex)
+        xlfp[..., 0] = xlf[..., 0]  # keep DC the same
+        xlfp[..., 1:(n//2)] = 2 * xlf[..., 1:(n//2)]  # double positive freqs
+        xlfp[..., n//2] = xlf[..., n//2]  # keep half Nyquist the same, too
+        xlfp[..., (n//2 + 1):] = 0  # zero neg freqs
+        
+        xlaf = ifft(xlfp)  # IFFT
+        a = np.exp(xlaf)  # complex exponentiation
     
-    return a
-
-
-
+    return np.moveaxis(a, -1, axis)
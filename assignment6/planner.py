@@ -0,0 +1,283 @@
+"""
+planner - dry-run cost model for simulations, designs and reconstructions
+
+est = plan(kernel, **sizes)
+
+Estimates the floating point work, peak memory and wall time of a call
+from its input sizes alone, without running it. The time estimate uses
+throughputs measured by a short micro-benchmark (calibrate), which is
+run once and cached per host in ~/.cache/mri-ee469b/.
+
+kernel         sizes
+'abrm'         nt, npos
+'simulate'     nt, npos, [mem_budget]
+'voronoidens'  npoints, [ndim]
+'slr'          n, [ftype ('ls', 'pm', 'mp')], [pad]
+'cgsense'      im_size, ncoil, nsamples, [nsub], [niter], [width], [oversamp]
+"""
+
+import json
+import os
+import platform
+import time
+
+import numpy as np
+
+try:
+    from .simulate import BYTES_PER_SAMPLE, _block_sizes
+except ImportError:
+    # Fallback for direct import
+    from simulate import BYTES_PER_SAMPLE, _block_sizes
+
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'mri-ee469b')
+
+_rates = None
+
+
+def calibrate(force=False, path=None):
+    """
+    Measure the throughputs used by the cost model, or load them from the
+    per-host cache.
+
+    Parameters:
+    -----------
+    force : bool, optional
+        Re-run the micro-benchmark even if cached results exist
+    path : str, optional
+        Cache file, default ~/.cache/mri-ee469b/planner-<host>.json
+
+    Returns:
+    --------
+    rates : dict
+        'elementwise' (flop/s of NumPy elementwise complex arithmetic),
+        'fft' (flop/s of FFTs counted as 5 n log2 n), 'dense' (flop/s of
+        a dense solve), 'loop' (seconds of Python overhead per loop
+        iteration) and 'qhull' (seconds per point per log2 n of qhull)
+    """
+    global _rates
+
+    if path is None:
+        path = os.path.join(CACHE_DIR, f"planner-{platform.node() or 'host'}.json")
+
+    key = f"numpy-{np.__version__}"
+    if not force:
+        if _rates is not None and _rates.get('key') == key:
+            return _rates
+        try:
+            with open(path) as f:
+                rates = json.load(f)
+            if rates.get('key') == key:
+                _rates = rates
+                return rates
+        except (OSError, ValueError):
+            pass
+
+    rates = _measure()
+    rates['key'] = key
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(rates, f, indent=2)
+    except OSError:
+        pass
+
+    _rates = rates
+    return rates
+
+
+def plan(kernel, calibrated=True, **sizes):
+    """
+    Estimate the cost of a call from its input sizes.
+
+    Parameters:
+    -----------
+    kernel : str
+        One of 'abrm', 'simulate', 'voronoidens', 'slr', 'cgsense'
+    calibrated : bool, optional
+        Use (and if needed measure) this machine's throughputs. If False,
+        nominal throughputs are used and no benchmark is run.
+    **sizes
+        Problem sizes, see the module docstring
+
+    Returns:
+    --------
+    est : dict
+        'kernel', 'flops', 'bytes' (peak), 'seconds', and kernel specific
+        entries such as suggested block sizes
+    """
+    rates = calibrate() if calibrated else dict(_NOMINAL)
+
+    if kernel not in _MODELS:
+        raise ValueError(f"Unknown kernel '{kernel}', expected one of {sorted(_MODELS)}")
+
+    est = _MODELS[kernel](rates, **sizes)
+    est = {k: (float(v) if isinstance(v, np.floating) else v) for k, v in est.items()}
+    est['kernel'] = kernel
+
+    return est
+
+
+# Nominal throughputs, used before calibration
+_NOMINAL = {
+    'elementwise': 5e8,
+    'fft': 2e9,
+    'dense': 2e10,
+    'loop': 5e-6,
+    'qhull': 2e-7,
+}
+
+
+def _timeit(f, repeat=3):
+    best = np.inf
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        f()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _measure():
+    rng = np.random.default_rng(0)
+
+    # Elementwise complex arithmetic, as in the abrm_vectorized loop
+    n = 2**18
+    a = rng.normal(size=n) + 1j * rng.normal(size=n)
+    b = rng.normal(size=n) + 1j * rng.normal(size=n)
+    t = _timeit(lambda: a * b - np.conj(b) * a)
+    elementwise = 4 * 6 * n / t
+
+    # FFTs
+    n = 2**16
+    x = rng.normal(size=(16, n)) + 0j
+    t = _timeit(lambda: np.fft.fft(x, axis=-1))
+    fft = 16 * 5 * n * np.log2(n) / t
+
+    # Dense solve
+    n = 400
+    m = rng.normal(size=(n, n)) + n * np.eye(n)
+    v = rng.normal(size=n)
+    t = _timeit(lambda: np.linalg.solve(m, v))
+    dense = (2 / 3) * n**3 / t
+
+    # Python loop overhead with small array operations
+    s = np.zeros(4, dtype=complex)
+
+    def loop():
+        u = s
+        for _ in range(2000):
+            u = u * 1.0 + s
+    loop_time = _timeit(loop) / 2000
+
+    # qhull (Voronoi) per point per log2 n
+    try:
+        from scipy.spatial import Voronoi
+        n = 4000
+        pts = rng.normal(size=(n, 2))
+        t = _timeit(lambda: Voronoi(pts), repeat=2)
+        qhull = t / (n * np.log2(n))
+    except ImportError:
+        qhull = _NOMINAL['qhull']
+
+    return {
+        'elementwise': float(elementwise),
+        'fft': float(fft),
+        'dense': float(dense),
+        'loop': float(loop_time),
+        'qhull': float(qhull),
+    }
+
+
+def _fft_flops(n, count=1):
+    return 5.0 * count * n * np.log2(max(n, 2))
+
+
+def _abrm(rates, nt, npos):
+    # Set-up and rotation loop are ~60 flops per (position, sample), but
+    # memory bound, so they are counted at ~2.5x
+    flops = 150.0 * nt * npos
+    seconds = flops / rates['elementwise'] + nt * rates['loop']
+    return {'flops': flops, 'bytes': BYTES_PER_SAMPLE * nt * npos, 'seconds': seconds}
+
+
+def _simulate(rates, nt, npos, mem_budget=2**30):
+    est = _abrm(rates, nt, npos)
+    block, chunk = _block_sizes(npos, nt, mem_budget)
+    if est['bytes'] <= mem_budget:
+        est['engine'] = 'vectorized'
+    else:
+        est['engine'] = 'blocked'
+        est['bytes'] = BYTES_PER_SAMPLE * min(chunk, npos) * block
+        est['seconds'] += nt * int(np.ceil(npos / chunk)) * rates['loop']
+    est['block'] = block
+    est['chunk'] = chunk
+    return est
+
+
+def _voronoidens(rates, npoints, ndim=2):
+    logn = np.log2(max(npoints, 2))
+    # Cells have ~6 vertices in 2D and ~27 in 3D
+    verts = 6 if ndim == 2 else 27
+    flops = 20.0 * npoints * verts
+    # The areas are vectorized, leaving the Voronoi diagram itself
+    seconds = (rates['qhull'] * npoints * logn * (1 if ndim == 2 else 8)
+               + flops / rates['elementwise'])
+    nbytes = npoints * (ndim * 8 + verts * (8 + ndim * 8)) * 3
+    return {'flops': flops, 'bytes': nbytes, 'seconds': seconds}
+
+
+def _slr(rates, n, ftype='pm', pad=8):
+    if ftype == 'ls':
+        # Levinson recursion on the n x n Toeplitz normal equations
+        design = 4.0 * n * n
+        design_time = design / rates['elementwise']
+    elif ftype in ('pm', 'mp'):
+        m = 2 * n if ftype == 'mp' else n
+        # remez: ~15 exchange iterations over a 16x dense grid
+        design = 15 * 16.0 * m * m / 2
+        design_time = design / rates['elementwise'] + 15 * rates['loop'] * 10
+    else:
+        raise ValueError("ftype must be 'ls', 'pm' or 'mp'")
+
+    # b2a: one forward FFT, two in mag2mp, one inverse, all of length pad*n
+    b2a = _fft_flops(pad * n, 4)
+    # ab2rf: n steps of O(n) vector updates
+    ab2rf = 16.0 * n * n / 2
+
+    flops = design + b2a + ab2rf
+    seconds = (design_time + b2a / rates['fft']
+               + ab2rf / rates['elementwise'] + n * 10 * rates['loop'])
+    nbytes = 16 * pad * n * 6 + (8 * 4 * n if ftype == 'ls' else 8 * 16 * n)
+    return {'flops': flops, 'bytes': nbytes, 'seconds': seconds,
+            'design_seconds': design_time}
+
+
+def _cgsense(rates, im_size, ncoil, nsamples, nsub=1, niter=10, width=4, oversamp=1.25):
+    im_size = tuple(np.atleast_1d(im_size))
+    ndim = len(im_size)
+    nvox = int(np.prod(im_size))
+    ngrid = int(np.prod([int(np.ceil(oversamp * s)) for s in im_size]))
+
+    # One normal operator application: forward and adjoint NUFFT per coil
+    # and subspace coefficient, each one FFT plus interpolation
+    fft = _fft_flops(ngrid, 2 * ncoil * nsub)
+    interp = 2 * ncoil * nsub * nsamples * 8.0 * width**ndim
+    coil = 2 * ncoil * nsub * nvox * 6.0
+    per_iter = fft + interp + coil
+
+    flops = niter * per_iter
+    seconds = niter * (fft / rates['fft'] + (interp + coil) / rates['elementwise'])
+
+    # Coil maps, k-space data, images and CG vectors, plus one grid per coil
+    nbytes = 8 * (ncoil * nvox + ncoil * nsub * nsamples + 5 * nsub * nvox + ncoil * ngrid)
+    return {'flops': flops, 'bytes': nbytes, 'seconds': seconds,
+            'seconds_per_iter': seconds / max(niter, 1)}
+
+
+_MODELS = {
+    'abrm': _abrm,
+    'simulate': _simulate,
+    'voronoidens': _voronoidens,
+    'slr': _slr,
+    'cgsense': _cgsense,
+}
@@ -8,10 +8,27 @@ print("=" * 60)
 print()
 
 tests = [
+    "test_abrm.py",
     "test_ab2inv.py",
     "test_ab2rf.py",
     "test_mag2mp.py",
-    "test_b2a.py"
+    "test_b2a.py",
+    "test_seqsim.py",
+    "test_cache.py",
+    "test_simulate.py",
+    "test_planner.py",
+    "test_instrument.py",
+    "test_fft_backend.py",
+    "test_dzls.py",
+    "test_dzpm.py",
+    "test_dzmp.py",
+    "test_benchmark.py",
+    "test_design_table.py",
+    "test_dzrf.py",
+    "test_sweep.py",
+    "test_fmp.py",
+    "test_dzmb.py",
+    "test_ckpoly.py"
 ]
 
 for test_file in tests:
@@ -0,0 +1,209 @@
+"""
+simulate - single entry point for rf simulation, choosing between abrm,
+  abrm_vectorized and the blocked abrm_moving engine.
+
+[a, b] = simulate(rf, [g], [x [,y]])
+[a, b, info] = simulate(rf, g, x, y, return_info=True)
+
+Before simulating, the problem is reduced using the structure of the
+gradient:
+  - runs of samples with zero rf are free precession about z, which
+    commute, so each run is merged into one sample with the summed gradient
+  - if the gradient has a fixed direction (a 1D pulse, or a 2D pulse with
+    constant gx/gy ratio) the result only depends on the position along
+    that direction, so only the distinct projected positions are simulated
+Then abrm_vectorized is used if it fits in the memory budget, otherwise
+abrm_moving with no motion, which sets up the rotations in time blocks.
+
+info reports the engine that was chosen and why.
+"""
+
+import numpy as np
+
+try:
+    from .abrm import abrm, abrm_vectorized, abrm_moving
+except ImportError:
+    # Fallback for direct import
+    from abrm import abrm, abrm_vectorized, abrm_moving
+
+# Approximate bytes of abrm_vectorized intermediates per (position, sample)
+BYTES_PER_SAMPLE = 128
+
+ENGINES = ('auto', 'abrm', 'vectorized', 'blocked')
+
+
+def simulate(rf, g=None, x=None, y=None, mem_budget=2**30, engine='auto',
+             return_info=False):
+    """
+    Simulate an rf pulse with the fastest applicable engine.
+
+    Parameters:
+    -----------
+    rf : array_like
+        RF scaled so that sum(rf) = flip angle
+    g : array_like, optional
+        Gradient waveform, scaled so that (gamma/2*pi)*sum(g) = k in cycles/cm
+    x : array_like, optional
+        Position vector
+    y : array_like, optional
+        Position vector for 2D pulses (assumes imag(g) = gy)
+    mem_budget : int, optional
+        Bytes available for intermediate arrays (default 1 GB)
+    engine : str, optional
+        'auto', or force one of 'abrm', 'vectorized', 'blocked'
+    return_info : bool, optional
+        Also return a dict describing the choice
+
+    Returns:
+    --------
+    a : ndarray
+        Alpha parameter, shape (len(x), len(y))
+    b : ndarray
+        Beta parameter, same shape as a
+    info : dict, optional
+        'engine', 'reasons', 'nt', 'nt_reduced', 'npos', 'npos_reduced'
+        and 'bytes' (estimated peak for the chosen engine)
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {ENGINES}")
+
+    # Same argument handling as abrm
+    if g is None and x is None:
+        raise ValueError("At least one of g or x must be provided")
+    elif g is None:
+        g = np.ones(len(rf)) * 2 * np.pi / len(rf)
+        y = 0
+    elif x is None:
+        x = g
+        g = np.ones(len(rf)) * 2 * np.pi / len(rf)
+        y = 0
+    elif y is None:
+        y = 0
+
+    rf = np.asarray(rf).flatten().astype(complex)
+    g = np.asarray(g).flatten().astype(complex)
+    x = np.asarray(x, dtype=float).flatten()
+    y = np.asarray(y, dtype=float).flatten()
+
+    reasons = []
+    info = {'nt': len(rf), 'npos': len(x) * len(y)}
+
+    # Merge runs of zero rf into single free precession samples
+    rf, g = _merge_zero_rf(rf, g)
+    if len(rf) < info['nt']:
+        reasons.append(f"merged zero-rf stretches, {info['nt']} -> {len(rf)} samples")
+    info['nt_reduced'] = len(rf)
+
+    # Positions, as complex numbers x + iy
+    p = (x[:, None] + 1j * y[None, :]).flatten()
+
+    # With a fixed gradient direction only the projected position matters
+    direction = _gradient_direction(g)
+    if direction is not None:
+        u = np.real(p * np.conj(direction))
+        u, inverse = np.unique(u, return_inverse=True)
+        if len(u) < len(p):
+            reasons.append(f"gradient has a fixed direction, {len(p)} -> {len(u)} positions")
+            p = u * direction
+        else:
+            inverse = None
+    else:
+        inverse = None
+    info['npos_reduced'] = len(p)
+
+    nbytes = BYTES_PER_SAMPLE * len(p) * len(rf)
+
+    if engine == 'auto':
+        if nbytes <= mem_budget:
+            engine = 'vectorized'
+            reasons.append(f"abrm_vectorized needs ~{nbytes / 2**20:.1f} MB, within budget")
+        else:
+            engine = 'blocked'
+            reasons.append(f"abrm_vectorized needs ~{nbytes / 2**20:.1f} MB, over budget")
+    else:
+        reasons.append(f"engine '{engine}' requested")
+
+    if engine == 'vectorized':
+        if inverse is None:
+            a, b = abrm_vectorized(rf, g, x, y)
+        elif np.all(p.imag == 0):
+            a, b = abrm_vectorized(rf, g, p.real, 0)
+        else:
+            # Scattered positions, all time samples set up in one block
+            a, b = abrm_moving(rf, g, p, block=len(rf))
+        info['bytes'] = nbytes
+    elif engine == 'blocked':
+        block, chunk = _block_sizes(len(p), len(rf), mem_budget)
+        a = np.empty(len(p), dtype=complex)
+        b = np.empty(len(p), dtype=complex)
+        for i in range(0, len(p), chunk):
+            ac, bc = abrm_moving(rf, g, p[i:i + chunk], block=block)
+            a[i:i + chunk] = ac[:, 0]
+            b[i:i + chunk] = bc[:, 0]
+        reasons.append(f"time blocks of {block} samples, {chunk} positions at a time")
+        info['bytes'] = BYTES_PER_SAMPLE * min(chunk, len(p)) * block
+    else:
+        a = np.empty(len(p), dtype=complex)
+        b = np.empty(len(p), dtype=complex)
+        for i, pi in enumerate(p):
+            ai, bi = abrm(rf, g, pi.real, pi.imag)
+            a[i], b[i] = ai[0, 0], bi[0, 0]
+        info['bytes'] = 0
+
+    a = np.asarray(a).reshape(-1)
+    b = np.asarray(b).reshape(-1)
+    if inverse is not None:
+        a = a[inverse.reshape(-1)]
+        b = b[inverse.reshape(-1)]
+
+    a = a.reshape(len(x), len(y))
+    b = b.reshape(len(x), len(y))
+
+    info['engine'] = engine
+    info['reasons'] = reasons
+
+    if return_info:
+        return a, b, info
+    return a, b
+
+
+def _merge_zero_rf(rf, g):
+    # Consecutive samples with rf == 0 are rotations about z, which commute,
+    # so each run can be replaced by one sample with the summed gradient
+    zero = rf == 0
+    if not np.any(zero[1:] & zero[:-1]):
+        return rf, g
+
+    # Start a new output sample at every nonzero sample and at the first
+    # sample of each zero run
+    start = ~zero
+    start[0] = True
+    start[1:] |= zero[1:] & ~zero[:-1]
+    group = np.cumsum(start) - 1
+
+    g_new = np.zeros(group[-1] + 1, dtype=complex)
+    np.add.at(g_new, group, g)
+
+    return rf[start], g_new
+
+
+def _gradient_direction(g):
+    # Unit complex number d if g = real_amplitude * d for all samples, else None
+    nz = np.abs(g) > 0
+    if not np.any(nz):
+        return 1.0 + 0j
+    d = g[nz][np.argmax(np.abs(g[nz]))]
+    d = d / np.abs(d)
+    if np.allclose(np.imag(g * np.conj(d)), 0, atol=1e-12 * np.max(np.abs(g))):
+        return d
+    return None
+
+
+def _block_sizes(npos, nt, mem_budget):
+    # Time block and position chunk so that npos*block samples fit the budget
+    per_sample = BYTES_PER_SAMPLE
+    block = int(mem_budget // (per_sample * npos))
+    if block >= 1:
+        return min(block, nt), npos
+    chunk = max(1, int(mem_budget // per_sample))
+    return 1, chunk
@@ -0,0 +1,204 @@
+"""
+sweep - design SLR pulses over a parameter grid in parallel
+
+sweep(out_dir, n, tb, d1, d2, flip, ftype, [ptype], [dt], [chunk], [workers])
+results = load_sweep(out_dir)
+
+Every combination of the parameters (each a value or a list of values)
+is designed with dzrf (dzls, dzpm or dzmp, then b2a and ab2rf) and
+measured with pulse_metrics. The grid is split into chunks of points,
+which are handed to a process pool. Each finished chunk is written by its
+worker to chunk_<i>.npz in out_dir, and recorded in manifest.json, so
+results stream to disk as they are made. Running the same sweep again
+into the same directory skips the chunks that are already there, which
+resumes an interrupted sweep.
+
+load_sweep returns the results as columns: one array per parameter and
+metric, with a row per grid point, plus 'rf', zero padded to the longest
+pulse, and its 'length'.
+"""
+
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+try:
+    from .dzminlen import pulse_metrics
+except ImportError:
+    # Fallback for direct import
+    from dzminlen import pulse_metrics
+
+PARAMS = ('n', 'tb', 'd1', 'd2', 'flip', 'ftype')
+METRICS = ('b1', 'energy', 'ripple1', 'ripple2', 'transition', 'duration')
+
+
+def sweep(out_dir, n, tb, d1=0.01, d2=0.01, flip=np.pi / 2, ftype='pm', ptype='ex',
+          dt=4e-6, chunk=32, workers=None, verbose=False):
+    """
+    Design and measure pulses over a parameter grid.
+
+    Parameters:
+    -----------
+    out_dir : str
+        Directory for the chunk files and manifest
+    n, tb, d1, d2, flip, ftype : value or list
+        Grid values of each dzrf parameter
+    ptype : str, optional
+        Pulse type, the same for the whole grid
+    dt : float, optional
+        Sample spacing in seconds, for the B1 metrics
+    chunk : int, optional
+        Grid points per task
+    workers : int, optional
+        Processes, default the number of cores. 1 runs in this process.
+
+    Returns:
+    --------
+    done : int
+        Number of chunks computed by this call (not counting resumed ones)
+    """
+    grid = {name: _values(v) for name, v in zip(PARAMS, (n, tb, d1, d2, flip, ftype))}
+    points = list(itertools.product(*(grid[name] for name in PARAMS)))
+    nchunks = (len(points) + chunk - 1) // chunk
+
+    spec = {
+        'grid': grid,
+        'ptype': ptype,
+        'dt': dt,
+        'chunk': chunk,
+        'npoints': len(points),
+        'nchunks': nchunks,
+    }
+
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = _load_manifest(out_dir)
+    if manifest is not None and manifest['spec'] != json.loads(json.dumps(spec)):
+        raise ValueError(f"{out_dir} holds a different sweep; use a new directory")
+    if manifest is None:
+        manifest = {'spec': spec, 'completed': []}
+        _save_manifest(out_dir, manifest)
+
+    completed = set(manifest['completed'])
+    todo = [i for i in range(nchunks)
+            if not (i in completed and os.path.exists(_chunk_path(out_dir, i)))]
+    if verbose and len(todo) < nchunks:
+        print(f"Resuming: {nchunks - len(todo)} of {nchunks} chunks already done")
+
+    tasks = [(out_dir, i, i * chunk, points[i * chunk:(i + 1) * chunk], ptype, dt) for i in todo]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    done = 0
+    if workers == 1:
+        for task in tasks:
+            _finish(out_dir, manifest, _run_chunk(task), verbose, nchunks)
+            done += 1
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_chunk, task) for task in tasks]
+            for future in as_completed(futures):
+                _finish(out_dir, manifest, future.result(), verbose, nchunks)
+                done += 1
+
+    return done
+
+
+def load_sweep(out_dir):
+    """
+    Load the results of a sweep as columns.
+
+    Returns:
+    --------
+    results : dict of ndarray
+        'index' and the parameter and metric columns, 'rf' (npoints,
+        max length) and 'length', for the chunks completed so far
+    """
+    manifest = _load_manifest(out_dir)
+    if manifest is None:
+        raise ValueError(f"no sweep in {out_dir}")
+
+    parts = []
+    for i in sorted(manifest['completed']):
+        with np.load(_chunk_path(out_dir, i)) as f:
+            parts.append({k: f[k] for k in f.files})
+    if not parts:
+        return {}
+
+    results = {}
+    for k in parts[0]:
+        if k == 'rf':
+            width = max(p['rf'].shape[1] for p in parts)
+            results[k] = np.concatenate(
+                [np.pad(p['rf'], ((0, 0), (0, width - p['rf'].shape[1]))) for p in parts])
+        else:
+            results[k] = np.concatenate([p[k] for p in parts])
+
+    order = np.argsort(results['index'])
+    return {k: v[order] for k, v in results.items()}
+
+
+def _values(v):
+    if isinstance(v, (str, int, float, np.integer, np.floating)):
+        return [v.item() if isinstance(v, np.generic) else v]
+    return [x.item() if isinstance(x, np.generic) else x for x in v]
+
+
+def _chunk_path(out_dir, i):
+    return os.path.join(out_dir, f"chunk_{i:06d}.npz")
+
+
+def _load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, 'manifest.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, 'manifest.json')
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f)
+    os.replace(path + '.tmp', path)
+
+
+def _finish(out_dir, manifest, i, verbose, nchunks):
+    manifest['completed'] = sorted(set(manifest['completed']) | {i})
+    _save_manifest(out_dir, manifest)
+    if verbose:
+        print(f"chunk {i + 1}/{nchunks} done")
+
+
+def _run_chunk(task):
+    # Design one chunk of grid points and write it to disk, in a worker
+    out_dir, i, first, points, ptype, dt = task
+
+    columns = {name: [] for name in ('index',) + PARAMS + METRICS}
+    rfs = []
+    for j, point in enumerate(points):
+        params = dict(zip(PARAMS, point))
+        m = pulse_metrics(params['n'], params['tb'], params['d1'], params['d2'],
+                          params['flip'], ptype, params['ftype'], dt)
+        columns['index'].append(first + j)
+        for name in PARAMS:
+            columns[name].append(params[name])
+        for name in METRICS:
+            columns[name].append(m[name])
+        rfs.append(m['rf'])
+
+    width = max(len(rf) for rf in rfs)
+    rf = np.zeros((len(rfs), width), dtype=complex)
+    for j, r in enumerate(rfs):
+        rf[j, :len(r)] = r
+
+    arrays = {name: np.asarray(v) for name, v in columns.items()}
+    path = _chunk_path(out_dir, i)
+    tmp = path + '.tmp.npz'
+    np.savez(tmp, rf=rf, length=np.array([len(r) for r in rfs]), **arrays)
+    os.replace(tmp, path)
+
+    return i
@@ -0,0 +1,63 @@
+
+
+# Test program for abrm.py
+
+import numpy as np
+from abrm import abrm, abrm_vectorized, abrm_moving
+
+n = 100
+t = np.linspace(-2, 2, n)
+rf = np.sinc(t) / np.sum(np.sinc(t)) * np.pi / 2
+g = np.ones(n) * 2 * np.pi / n
+x = np.linspace(-3, 3, 31)
+
+# Test 1: Scalar and vectorized versions agree
+print("Test 1: abrm vs abrm_vectorized")
+a1, b1 = abrm(rf, g, x)
+a2, b2 = abrm_vectorized(rf, g, x)
+print(f"Match: {np.allclose(a1, a2) and np.allclose(b1, b2)}")
+print()
+
+# Test 2: Static spins in abrm_moving
+print("Test 2: abrm_moving with v = 0")
+a3, b3 = abrm_moving(rf, g, x, v=0)
+print(f"Output shape: {a3.shape}")
+print(f"Match abrm_vectorized: {np.allclose(a3[:, 0], a2[:, 0]) and np.allclose(b3[:, 0], b2[:, 0])}")
+print()
+
+# Test 3: Moving spins against a per-sample reference
+print("Test 3: Constant velocity and acceleration")
+v = np.array([-2.0, 0.0, 0.5, 3.0])
+acc = 0.4
+dt = 0.01
+a4, b4 = abrm_moving(rf, g, x, v, acc, dt, block=16)
+tt = np.arange(n) * dt
+ok = True
+for j in range(len(v)):
+    for i in [0, 10, 30]:
+        xt = x[i] + v[j] * tt + 0.5 * acc * tt**2
+        aa, bb = 1.0 + 0j, 0.0 + 0j
+        for m in range(n):
+            ar, br = abrm_vectorized(rf[m:m+1], g[m:m+1], xt[m:m+1])
+            aa, bb = ar[0, 0] * aa - np.conj(br[0, 0]) * bb, br[0, 0] * aa + np.conj(ar[0, 0]) * bb
+        ok = ok and np.isclose(aa, a4[i, j]) and np.isclose(bb, b4[i, j])
+print(f"Output shape: {a4.shape}")
+print(f"Match reference: {ok}")
+print()
+
+# Test 4: Block size does not change the result
+print("Test 4: Block size independence")
+a5, b5 = abrm_moving(rf, g, x, v, acc, dt, block=7)
+print(f"Match: {np.allclose(a4, a5) and np.allclose(b4, b5)}")
+print()
+
+# Test 5: 2D motion with complex positions
+print("Test 5: 2D motion")
+g2 = g * np.exp(1j * np.linspace(0, 4 * np.pi, n))
+a6, b6 = abrm_moving(rf, g2, x + 1j, v=0)
+a7, b7 = abrm_vectorized(rf, g2, x, 1)
+print(f"Match abrm_vectorized: {np.allclose(a6[:, 0], a7[:, 0]) and np.allclose(b6[:, 0], b7[:, 0])}")
+print(f"|a|^2 + |b|^2 = 1: {np.allclose(np.abs(a4)**2 + np.abs(b4)**2, 1)}")
+print()
+
+print("All tests completed.")
@@ -54,6 +54,36 @@ print(f"Output aca: {aca6}")
 print(f"Output is finite: {np.all(np.isfinite(aca6))}")
 print()
 
+# Test 7: Adaptive pad factor
+print("Test 7: Adaptive pad factor")
+from dzls import dzls
+bc7 = dzls(64, 4, 0.01, 0.01) * np.sin(np.pi / 4)
+aca7, pad7 = b2a(bc7, return_pad=True)
+print(f"Pad used: {pad7}")
+print(f"Max difference from pad=8: {np.max(np.abs(aca7 - b2a(bc7, pad=8))):.2e}")
+bc7s = dzls(64, 4, 0.01, 0.01) * 0.98
+aca7s, pad7s = b2a(bc7s, return_pad=True)
+print(f"Sharp near-inversion pad: {pad7s}, max difference from pad=64: "
+      f"{np.max(np.abs(aca7s - b2a(bc7s, pad=64))):.2e}")
+print(f"Scaled beta uses pad 8: {b2a(bc6, return_pad=True)[1] == 8}")
+print()
+
+# Test 8: The magnitude of alpha is real, so mag2mp takes its real path
+print("Test 8: Real transform in mag2mp")
+import mag2mp
+calls = []
+rfft = mag2mp.rfft
+mag2mp.rfft = lambda *args, **kwargs: calls.append(1) or rfft(*args, **kwargs)
+try:
+    aca8 = b2a(bc3, pad=8)
+finally:
+    mag2mp.rfft = rfft
+print(f"rfft used: {len(calls) > 0}")
+A8 = np.fft.fft(aca8, 256)
+B8 = np.fft.fft(bc3, 256)
+print(f"|alpha|^2 + |beta|^2 = 1: {np.allclose(np.abs(A8)**2 + np.abs(B8)**2, 1)}")
+print()
+
 print("All tests completed.")
 
 
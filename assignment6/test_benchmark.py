@@ -0,0 +1,56 @@
+
+
+# Test program for benchmark.py
+
+import os
+import platform
+import shutil
+import tempfile
+
+from benchmark import regressions, load_history, save_history, main
+
+
+def result(seconds):
+    return {'seconds': seconds, 'samples_per_s': 1.0 / seconds, 'peak_bytes': 0, 'repeats': 1}
+
+
+def past(seconds, host=None):
+    return {'host': host or platform.node(), 'results': {'fmp[64]': result(seconds)}}
+
+
+# Test 1: Slower than the median of the history by more than the threshold
+print("Test 1: Regression flagged")
+history = [past(1.0), past(1.1), past(0.9)]
+flagged = regressions({'fmp[64]': result(1.5)}, history, threshold=0.25)
+print(f"Flagged: {[f[0] for f in flagged]}, baseline {flagged[0][2]:.2f} s, "
+      f"change {100 * flagged[0][3]:.0f}%")
+print(f"Within the threshold not flagged: {regressions({'fmp[64]': result(1.2)}, history) == []}")
+print()
+
+# Test 2: Only the last runs on this host are compared
+print("Test 2: Window and host")
+history = [past(0.1)] * 5 + [past(1.0)] * 5 + [past(0.1, host='elsewhere')] * 5
+print(f"Old runs outside the window ignored: {regressions({'fmp[64]': result(1.2)}, history) == []}")
+print(f"New cases not flagged: {regressions({'dzmp[64]': result(9.0)}, history) == []}")
+print()
+
+# Test 3: History round trip, and the exit status of a run
+print("Test 3: History file and exit status")
+tmp = tempfile.mkdtemp()
+path = os.path.join(tmp, 'history.json')
+print(f"Missing history is empty: {load_history(path) == []}")
+save_history({'fmp[64]': result(1.0)}, path)
+print(f"Saved run read back: {load_history(path)[0]['results']['fmp[64]']['seconds'] == 1.0}")
+args = ['--quick', '--kernels', 'mag2mp', '--min-time', '0.01', '--history', path]
+status = main(args)
+print(f"First run of mag2mp: status {status}, runs in history: {len(load_history(path))}")
+keys = load_history(path)[-1]['results']
+os.remove(path)
+save_history({key: result(1e-9) for key in keys}, path)
+status = main(args + ['--no-save'])
+print(f"Against a much faster history: status {status} (expected 1), "
+      f"runs in history: {len(load_history(path))}")
+shutil.rmtree(tmp)
+print()
+
+print("All tests completed.")
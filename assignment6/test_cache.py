@@ -0,0 +1,97 @@
+
+
+# Test program for cache.py
+
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from cache import cached, cache_config, cache_stats, cache_clear
+from abrm import abrm_vectorized
+
+cache_enabled = cache_config()['enabled']
+cache_config(enabled=True)
+cache_clear()
+
+# Test 1: Repeated call is a hit and returns the same result
+print("Test 1: Memory tier hit")
+rf = np.sinc(np.linspace(-2, 2, 200)) * 0.02
+x = np.linspace(-3, 3, 101)
+t0 = time.perf_counter()
+a1, b1 = abrm_vectorized(rf, x=x)
+t1 = time.perf_counter()
+a2, b2 = abrm_vectorized(rf, x=x)
+t2 = time.perf_counter()
+stats = cache_stats()
+print(f"First call: {1e3 * (t1 - t0):.2f} ms, second call: {1e3 * (t2 - t1):.2f} ms")
+print(f"Hits: {stats['hits']}, misses: {stats['misses']}")
+print(f"Results match: {np.array_equal(a1, a2) and np.array_equal(b1, b2)}")
+print()
+
+# Test 2: Returned arrays are copies
+print("Test 2: Cached results cannot be modified by the caller")
+a2[:] = 0
+a3, b3 = abrm_vectorized(rf, x=x)
+print(f"Cache unchanged: {np.array_equal(a1, a3)}")
+print()
+
+# Test 3: Different inputs give different keys
+print("Test 3: Changed input is a miss")
+abrm_vectorized(rf * 2, x=x)
+abrm_vectorized(rf.astype(np.float32), x=x)
+print(f"Misses: {cache_stats()['misses']}")
+print()
+
+# Test 4: Byte budget evicts least recently used entries
+print("Test 4: LRU eviction")
+
+
+@cached
+def ones(n):
+    return np.ones(n)
+
+
+cache_clear()
+cache_config(max_bytes=4 * 8000)
+for n in [1000, 1001, 1002, 1000, 1003]:
+    ones(n)
+stats = cache_stats()
+print(f"Entries: {stats['entries']}, bytes: {stats['bytes']}, evictions: {stats['evictions']}")
+ones(1000)
+print(f"Most recently used entry kept: {cache_stats()['hits'] == 2}")
+cache_config(max_bytes=256 * 2**20)
+print()
+
+# Test 5: Disk tier survives clearing the memory tier
+print("Test 5: Disk tier")
+tmp = tempfile.mkdtemp()
+cache_config(disk_dir=tmp)
+cache_clear()
+r1 = ones(5000)
+cache_clear()
+r2 = ones(5000)
+stats = cache_stats()
+print(f"Disk hits: {stats['disk_hits']}, misses: {stats['misses']}")
+print(f"Results match: {np.array_equal(r1, r2)}")
+cache_config(disk_max_bytes=60000)
+for n in range(6000, 6010):
+    ones(n)
+size = sum(f.stat().st_size for f in __import__('pathlib').Path(tmp).glob('*.npz'))
+print(f"Disk tier within budget: {size <= 60000}")
+cache_config(disk_dir='')
+shutil.rmtree(tmp)
+print()
+
+# Test 6: Disabled, calls go straight through
+print("Test 6: Disabled cache")
+cache_config(enabled=False)
+cache_clear()
+ones(7000)
+ones(7000)
+stats = cache_stats()
+print(f"Nothing recorded: {stats['hits'] == 0 and stats['misses'] == 0 and stats['entries'] == 0}")
+cache_config(enabled=cache_enabled)
+print()
+
+print("All tests completed.")
@@ -0,0 +1,69 @@
+
+
+# Test program for ckpoly.py
+
+import numpy as np
+from ckpoly import CKPolynomial
+from abrm import abrm_vectorized
+from ab2prof import ab2prof
+from dzrf import dzbeta
+from b2a import b2a
+from ab2rf import ab2rf
+
+b = dzbeta(256, 4, 'ex', 'pm')
+a = b2a(b)
+rf90 = ab2rf(a, b)
+b180 = dzbeta(256, 4, 'se', 'pm')
+rf180 = ab2rf(b2a(b180), b180)
+x = np.linspace(-40, 40, 41)
+
+# Test 1: Single pulse against simulation
+print("Test 1: from_rf vs abrm")
+p = CKPolynomial.from_rf(rf90)
+print(p)
+asim, bsim = abrm_vectorized(rf90, x=x)
+pa, pb = p.evaluate(x)
+print(f"Max alpha error: {np.max(np.abs(pa - asim[:, 0])):.2e}, "
+      f"beta error: {np.max(np.abs(pb - bsim[:, 0])):.2e}")
+q = CKPolynomial.from_ab(a, b)
+print(f"from_ab vs from_rf alpha: {np.max(np.abs(q.a - p.a)):.2e}")
+print()
+
+# Test 2: FFT profile
+print("Test 2: Profile")
+xg, prof = q.profile('ex', npts=2048)
+xp, prof2 = ab2prof(a, b, 'ex', npts=2048)
+print(f"Same grid as ab2prof: {np.allclose(xg, xp)}, "
+      f"max |Mxy| difference: {np.max(np.abs(np.abs(prof) - np.abs(prof2))):.2e}")
+xg, ga, gb = p.ab_grid(100)
+ea, eb = p.evaluate(xg)
+print(f"Grid agrees with direct evaluation: {np.allclose(ga, ea) and np.allclose(gb, eb)}")
+print()
+
+# Test 3: Composition with a gradient, against simulating the concatenation
+print("Test 3: Excitation, rewinder, refocusing")
+g0 = p.g0
+q180 = CKPolynomial.from_rf(rf180, g0)
+seq = q180 @ p.grad(-(len(rf90) // 2) * g0)
+rf = np.concatenate([rf90, np.zeros(len(rf90) // 2), rf180])
+g = np.concatenate([np.full(len(rf90), g0), -np.ones(len(rf90) // 2) * g0, np.full(len(rf180), g0)])
+asim, bsim = abrm_vectorized(rf, g, x)
+sa, sb = seq.evaluate(x)
+print(f"Max alpha error: {np.max(np.abs(sa - asim[:, 0])):.2e}, "
+      f"beta error: {np.max(np.abs(sb - bsim[:, 0])):.2e}")
+print(f"p.then(q) is q @ p: {np.allclose(p.then(q180).a, (q180 @ p).a)}")
+print()
+
+# Test 4: Inverse and identity
+print("Test 4: Inverse")
+ident = p.inverse() @ p
+ia, ib = ident.evaluate(x)
+print(f"Identity: max |alpha - 1| {np.max(np.abs(ia - 1)):.2e}, max |beta| {np.max(np.abs(ib)):.2e}")
+try:
+    p.grad(0.5 * g0)
+    print("No error raised")
+except ValueError as e:
+    print(f"ValueError: {e}")
+print()
+
+print("All tests completed.")
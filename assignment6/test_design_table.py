@@ -0,0 +1,99 @@
+
+
+# Test program for design_table.py
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from scipy.signal import remez
+from dinf import dinf
+from design_table import table_config, table_get, table_put, table_build, table_entries
+from cache import cache_config
+from dzpm import dzpm
+from dzmp import dzmp
+
+cache_enabled = cache_config()['enabled']
+cache_config(enabled=False)
+tmp = tempfile.mkdtemp()
+
+# Test 1: Off without a path
+print("Test 1: Table off by default")
+table_config(path='')
+print(f"Lookup without a table: {table_get('dzpm', 64, 4, 0.01, 0.01)}")
+print()
+
+# Test 2: Miss, write-back, then hit
+print("Test 2: Write-back and lookup")
+table_config(path=tmp)
+t0 = time.perf_counter()
+h1 = dzpm(256, 8, 0.01, 0.01)
+t1 = time.perf_counter()
+h2 = dzpm(256, 8, 0.01, 0.01)
+t2 = time.perf_counter()
+print(f"Miss: {1e3 * (t1 - t0):.2f} ms, hit: {1e3 * (t2 - t1):.2f} ms")
+print(f"Identical: {np.array_equal(h1, h2)}")
+m1 = dzmp(64, 4, 0.01, 0.01)
+m2 = dzmp(64, 4, 0.01, 0.01)
+print(f"dzmp identical: {np.array_equal(m1, m2)}, entries: {table_entries()}")
+print()
+
+# Test 3: Persistence, and growing past the initial capacity
+print("Test 3: Reopening and growing")
+table_config(path='')
+table_config(path=tmp)
+print(f"Found after reopening: {np.array_equal(table_get('dzpm', 256, 8, 0.01, 0.01), h1)}")
+big = np.arange(70000, dtype=float)
+table_put('test', 70000, 1, 1, 1, big)
+print(f"Large entry stored: {np.array_equal(table_get('test', 70000, 1, 1, 1), big)}")
+print(f"Earlier entry intact: {np.array_equal(table_get('dzpm', 256, 8, 0.01, 0.01), h1)}")
+print()
+
+# Test 4: Offline build
+print("Test 4: Offline build")
+tmp2 = tempfile.mkdtemp()
+failed = table_build(tmp2, ['dzpm'], [64, 128], [4, 8], [0.01], [0.01, 0.001], verbose=False)
+table_config(path=tmp2)
+print(f"Failures: {len(failed)}, entries: {len(table_entries())} (expected 8)")
+w = dinf(0.01, 0.001) / 8
+f = np.array([0, (1 - w) * 4, (1 + w) * 4, 64]) / 64
+h = remez(128, f, [1, 0], weight=[1, 0.01 / 0.001], fs=2)
+print(f"Built entry matches remez: {np.allclose(table_get('dzpm', 128, 8, 0.01, 0.001), h)}")
+print()
+
+# Test 5: Writers in several processes
+print("Test 5: Concurrent writers")
+tmp3 = tempfile.mkdtemp()
+writer = """
+import sys
+import numpy as np
+sys.path.insert(0, sys.argv[1])
+from design_table import table_config, table_put
+table_config(path=sys.argv[2])
+p = int(sys.argv[3])
+for i in range(40):
+    table_put('test', i, p, 1, 1, np.full(50 + i, 1000.0 * p + i))
+table_put('test', 0, p, 2, 2, np.full(20000, 1000.0 * p))
+"""
+here = os.path.dirname(os.path.abspath(sys.modules['design_table'].__file__))
+procs = [subprocess.Popen([sys.executable, '-c', writer, here, tmp3, str(p)]) for p in range(4)]
+status = [proc.wait() for proc in procs]
+table_config(path='')
+table_config(path=tmp3)
+wrong = [(i, p) for p in range(4) for i in range(40)
+         if not np.array_equal(table_get('test', i, p, 1, 1), np.full(50 + i, 1000.0 * p + i))]
+print(f"Writers exited with {status}, entries: {len(table_entries())} (expected 164)")
+print(f"Entries lost or overwritten: {len(wrong)}")
+print()
+
+table_config(path='')
+cache_config(enabled=cache_enabled)
+shutil.rmtree(tmp)
+shutil.rmtree(tmp2)
+shutil.rmtree(tmp3)
+
+print("All tests completed.")
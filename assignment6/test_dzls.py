@@ -0,0 +1,48 @@
+
+
+# Test program for dzls.py
+
+import time
+
+import numpy as np
+from dzls import dzls
+
+design = getattr(dzls, 'uncached', dzls)
+
+# Test 1: Toeplitz engine matches firls
+print("Test 1: Toeplitz engine vs firls")
+for nf, tb, d1, d2 in [(64, 4, 0.01, 0.01), (65, 4, 0.01, 0.01), (128, 8, 0.001, 0.05), (513, 12, 0.01, 0.001)]:
+    h = design(nf, tb, d1, d2)
+    hf = design(nf, tb, d1, d2, engine='firls')
+    print(f"nf={nf}, tb={tb}: taps {len(h)}, relative error "
+          f"{np.max(np.abs(h - hf)) / np.max(np.abs(hf)):.2e}")
+print()
+
+# Test 2: Linear phase and passband gain
+print("Test 2: Filter properties")
+h = design(128, 8, 0.01, 0.01)
+print(f"Symmetric: {np.allclose(h, h[::-1])}")
+print(f"DC gain: {np.sum(h):.4f}")
+print()
+
+# Test 3: Large filters
+print("Test 3: Large filter timing")
+for nf in [1024, 4096]:
+    t0 = time.perf_counter()
+    design(nf, 16, 0.01, 0.01)
+    t1 = time.perf_counter()
+    design(nf, 16, 0.01, 0.01, engine='firls')
+    t2 = time.perf_counter()
+    print(f"nf={nf}: toeplitz {1e3 * (t1 - t0):.1f} ms, firls {1e3 * (t2 - t1):.1f} ms")
+print()
+
+# Test 4: Unknown engine
+print("Test 4: Unknown engine")
+try:
+    design(64, 4, 0.01, 0.01, engine='dense')
+    print("No error raised")
+except ValueError as e:
+    print(f"ValueError: {e}")
+print()
+
+print("All tests completed.")
@@ -0,0 +1,52 @@
+
+
+# Test program for dzmb.py and batched b2a/ab2rf
+
+import numpy as np
+from dzmb import dzmb, mbbeta, candidate_phases
+from dzrf import dzbeta
+from b2a import b2a
+from ab2rf import ab2rf
+from abrm import abrm_vectorized
+
+# Test 1: Batched b2a and ab2rf agree with single designs
+print("Test 1: Batched b2a/ab2rf")
+bs = np.array([dzbeta(64, 4, 'ex', 'pm'), dzbeta(64, 8, 'inv', 'ls')])
+rf = ab2rf(b2a(bs), bs)
+for k in range(2):
+    print(f"Pulse {k} max difference: {np.max(np.abs(rf[k] - ab2rf(b2a(bs[k]), bs[k]))):.2e}")
+rft = ab2rf(b2a(bs.T, axis=0), bs.T, axis=0)
+print(f"axis=0 matches: {np.allclose(rft.T, rf)}")
+print()
+
+# Test 2: Band shifting
+print("Test 2: mbbeta")
+b0 = dzbeta(128, 4, 'ex', 'ls')
+beta = mbbeta(b0, 4, 3, np.zeros(3))
+print(f"Shape: {beta.shape}, center band alone: {np.allclose(mbbeta(b0, 4, 3, [0.0]), b0)}")
+print(f"Zero phase peak / single band peak: {np.max(np.abs(beta)) / np.max(np.abs(b0)):.2f}")
+print(f"Candidates shape: {candidate_phases(3, 16).shape}")
+print()
+
+# Test 3: Multiband design
+print("Test 3: dzmb")
+rf, x, p, info = dzmb(256, 4, 4, 3, 'ex', 'ls', return_info=True)
+rf0, _, _ = dzmb(256, 4, 4, 3, 'ex', 'ls', phases=np.zeros(4))
+print(f"Peak rf: {np.max(np.abs(rf)):.4f}, zero phases: {np.max(np.abs(rf0)):.4f}")
+centers = (np.arange(4) - 1.5) * 3 * 4
+print("Band centers |Mxy|:", np.round([np.abs(p[np.argmin(np.abs(x - c))]) for c in centers], 3))
+a, b = abrm_vectorized(rf, x=x)
+mxy = 2 * np.conj(a[:, 0]) * b[:, 0]
+print(f"Max |Mxy| difference from simulation: {np.max(np.abs(np.abs(mxy) - np.abs(p))):.3f}")
+print()
+
+# Test 4: Bands that do not fit
+print("Test 4: Too many bands")
+try:
+    dzmb(64, 4, 6, 3)
+    print("No error raised")
+except ValueError as e:
+    print(f"ValueError: {e}")
+print()
+
+print("All tests completed.")
@@ -0,0 +1,51 @@
+
+
+# Test program for dzmp.py
+
+import numpy as np
+from scipy.signal import remez
+from dinf import dinf
+from dzmp import dzmp
+from fmp import fmp
+
+# Test 1: firpm(n2-1) in MATLAB designs n2 = 2n-1 taps, which remez takes
+# as numtaps = n2. One fewer gives the even length that fmp rejects.
+print("Test 1: Odd length linear phase filter")
+n, tb, d1, d2 = 64, 4, 0.01, 0.01
+di = 0.5 * dinf(2 * d1, 0.5 * d2 * d2)
+w = di / tb
+f = np.array([0, (1 - w) * (tb / 2), (1 + w) * (tb / 2), n / 2]) / (n / 2)
+weight = [1, 2 * d1 / (0.5 * d2 * d2)]
+hl = remez(2 * n - 1, f, [1, 0], weight=weight, fs=2)
+print(f"Linear phase taps: {len(hl)} (expected {2 * n - 1})")
+try:
+    fmp(remez(2 * n - 2, f, [1, 0], weight=weight, fs=2))
+    print("Even length accepted")
+except ValueError as e:
+    print(f"Even length rejected: {e}")
+h = dzmp(n, tb, d1, d2)
+print(f"Minimum phase taps: {len(h)} (expected {n})")
+print()
+
+# Test 2: The band edges are normalized to Nyquist with fs=2, so the
+# squared magnitude of the factor has the transition where the linear
+# phase design puts it
+print("Test 2: Transition band")
+H = np.abs(np.fft.fft(h, 4096))[:2048]
+x = np.arange(2048) / 2048
+fp = (1 - w) * (tb / 2) / (n / 2)
+fs = (1 + w) * (tb / 2) / (n / 2)
+print(f"Passband max deviation: {np.max(np.abs(H[x <= fp] - 1)):.4f}")
+print(f"Stopband max: {np.max(H[x >= fs]):.4f} (d2 {d2})")
+print()
+
+# Test 3: Minimum phase, so the energy is at the start of the filter
+print("Test 3: Minimum phase")
+print(f"Largest zero radius: {np.max(np.abs(np.roots(h))):.4f}")
+energy = np.cumsum(np.abs(h)**2) / np.sum(np.abs(h)**2)
+reverse = np.cumsum(np.abs(h[::-1])**2) / np.sum(np.abs(h)**2)
+print(f"Energy in the first quarter: {energy[n // 4 - 1]:.3f}, "
+      f"reversed: {reverse[n // 4 - 1]:.3f}")
+print()
+
+print("All tests completed.")
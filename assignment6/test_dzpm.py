@@ -0,0 +1,59 @@
+
+
+# Test program for dzpm.py
+
+import numpy as np
+from scipy.signal import freqz, firls
+from dinf import dinf
+from dzpm import dzpm
+from dzls import dzls
+
+design = getattr(dzpm, 'uncached', dzpm)
+
+# Test 1: Band edges normalized to Nyquist, as firpm in MATLAB. remez
+# without fs=2 reads them as fractions of the sampling rate, which puts the
+# transition at twice the frequency.
+print("Test 1: Ripples within the bands")
+for nf, tb, d1, d2 in [(64, 4, 0.01, 0.01), (128, 8, 0.01, 0.001)]:
+    h = design(nf, tb, d1, d2)
+    w = dinf(d1, d2) / tb
+    f, H = freqz(h, worN=8192, fs=2)
+    H = np.abs(H)
+    fp = (1 - w) * (tb / 2) / (nf / 2)
+    fs = (1 + w) * (tb / 2) / (nf / 2)
+    ripple1 = np.max(np.abs(H[f <= fp] - 1))
+    ripple2 = np.max(H[f >= fs])
+    print(f"nf={nf}, tb={tb}: {len(h)} taps, pass band ripple {ripple1:.4f} (d1 {d1}), "
+          f"stop band ripple {ripple2:.4f} (d2 {d2})")
+    print(f"Within twice the specification: {ripple1 < 2 * d1 and ripple2 < 2 * d2}")
+print()
+
+# Test 2: The stop band is weighted d1/d2 relative to the pass band, so the
+# ripples keep that ratio
+print("Test 2: Band weights")
+h = design(128, 8, 0.01, 0.001)
+f, H = freqz(h, worN=8192, fs=2)
+H = np.abs(H)
+w = dinf(0.01, 0.001) / 8
+ratio = np.max(np.abs(H[f <= (1 - w) * 4 / 64] - 1)) / np.max(H[f >= (1 + w) * 4 / 64])
+print(f"Ripple ratio: {ratio:.2f} (expected {0.01 / 0.001:.0f})")
+print()
+
+# Test 3: dzls passes its band weights to firls by keyword
+print("Test 3: dzls firls engine weights")
+nf, tb, d1, d2 = 65, 4, 0.01, 0.001
+w = dinf(d1, d2) / tb
+f = np.array([0, (1 - w) * (tb / 2), (1 + w) * (tb / 2), nf / 2]) / (nf / 2)
+ref = firls(nf, f, [1, 1, 0, 0], weight=[1, d1 / d2])
+h = getattr(dzls, 'uncached', dzls)(nf, tb, d1, d2, engine='firls')
+print(f"Matches firls with weight=: {np.allclose(h, ref)}")
+print()
+
+# Test 4: nf taps, as firpm(nf-1) and firls(nf-1) in MATLAB
+print("Test 4: Filter lengths")
+lengths = [(len(design(nf, 4, 0.01, 0.01)), len(getattr(dzls, 'uncached', dzls)(nf, 4, 0.01, 0.01)))
+           for nf in [64, 65]]
+print(f"dzpm and dzls lengths for nf=64, 65: {lengths}")
+print()
+
+print("All tests completed.")
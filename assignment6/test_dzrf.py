@@ -0,0 +1,72 @@
+
+
+# Test program for dzrf.py, ab2prof.py and dzminlen.py
+
+import numpy as np
+from dzrf import dzrf, dzbeta
+from b2a import b2a
+from ab2prof import ab2prof
+from abrm import abrm_vectorized
+from dzminlen import dzminlen, profile_ripple
+
+# Test 1: Pulse types and filter types
+print("Test 1: dzrf designs")
+for ptype in ['st', 'ex', 'se', 'inv', 'sat']:
+    for ftype in ['ms', 'pm', 'ls', 'min', 'max']:
+        rf = dzrf(64, 6, ptype, ftype, 0.01, 0.01)
+        assert np.all(np.isfinite(rf)), (ptype, ftype)
+print("All combinations finite")
+lengths = {ftype: {len(dzrf(n, 6, 'ex', ftype, 0.01, 0.01)) for n in (63, 64)}
+           for ftype in ['ms', 'pm', 'ls', 'min', 'max']}
+print(f"n samples for every filter type: {all(l == {63, 64} for l in lengths.values())}")
+rf = dzrf(64, 6, 'inv', 'pm', 0.01, 0.01)
+print(f"Inversion rf length: {len(rf)}, sum: {np.abs(np.sum(rf)):.3f}")
+print()
+
+# Test 2: FFT profile agrees with simulation
+print("Test 2: ab2prof vs abrm")
+b = dzbeta(64, 6, 'ex', 'pm', 0.01, 0.01)
+a = b2a(b)
+rf = dzrf(64, 6, 'ex', 'pm', 0.01, 0.01)
+x, p = ab2prof(a, b, 'ex')
+asim, bsim = abrm_vectorized(rf, x=x)
+mxy = 2 * np.conj(asim[:, 0]) * bsim[:, 0]
+print(f"Max |Mxy| difference: {np.max(np.abs(np.abs(mxy) - np.abs(p))):.2e}")
+r1, r2, edges = profile_ripple(a, b, 6, 'ex', 'pm', 0.01, 0.01, np.pi / 2)
+print(f"Ripples: {r1:.4f}, {r2:.4f}, edges: {edges[0]:.3f}, {edges[1]:.3f}")
+print()
+
+# Test 3: Minimum length search
+print("Test 3: dzminlen")
+n, rf, info = dzminlen(8, 0.01, 0.01, ptype='ex', ftype='pm', dt=4e-6, b1max=0.15,
+                       workers=2, return_info=True)
+metrics = {m['n']: m for m in info['evaluated']}
+print(f"n = {n} (estimate {info['n0']}), peak B1 {info['metrics']['b1']:.3f} G")
+step_below = max(m for m in metrics if m < n)
+print(f"Meets spec: {info['metrics']['ok']}, n - 1 evaluated and fails: "
+      f"{step_below == n - 1 and not metrics[step_below]['ok']}")
+print(f"Duration of n samples: {np.isclose(info['metrics']['duration'], len(rf) * 4e-6)} "
+      f"({len(rf)} samples)")
+print(f"Candidates evaluated: {len(metrics)}")
+n1, rf1 = dzminlen(8, 0.01, 0.01, b1max=0.15)
+print(f"Serial search agrees: {n1 == n}")
+print()
+
+# Test 4: Default limits, and infeasible ones
+print("Test 4: Defaults and infeasible specifications")
+for tb in [2, 4, 8, 16]:
+    n4, rf4 = dzminlen(tb)
+    print(f"tb={tb}: defaults met with n = {n4}")
+try:
+    dzminlen(8, 0.01, 0.01, b1max=0.15, tmax=1e-3)
+    print("No error raised")
+except ValueError as e:
+    print(f"ValueError: {e}")
+try:
+    dzminlen(8, 0.01, 0.01, b1max=0.15, rtol=0.0)
+    print("No error raised")
+except ValueError as e:
+    print(f"Ripples held to d1 and d2 with rtol=0: {e}")
+print()
+
+print("All tests completed.")
@@ -0,0 +1,55 @@
+
+
+# Test program for fft_backend.py
+
+import numpy as np
+from fft_backend import fft, ifft, rfft, irfft, set_workers, get_workers, scratch
+from mag2mp import mag2mp
+
+rng = np.random.default_rng(0)
+
+# Test 1: Transforms match numpy, with padding
+print("Test 1: Agreement with numpy.fft")
+x = rng.normal(size=100) + 1j * rng.normal(size=100)
+print(f"fft(x, 256) error: {np.max(np.abs(fft(x, 256) - np.fft.fft(x, 256))):.2e}")
+print(f"ifft error: {np.max(np.abs(ifft(x) - np.fft.ifft(x))):.2e}")
+xr = x.real
+print(f"rfft/irfft round trip error: {np.max(np.abs(irfft(rfft(xr), 100) - xr)):.2e}")
+print()
+
+# Test 2: Batching along an axis, with worker threads
+print("Test 2: Batched transforms")
+X = rng.normal(size=(64, 8))
+previous = set_workers(2)
+batched = fft(X, 128, axis=0)
+set_workers(previous)
+single = np.stack([np.fft.fft(X[:, i], 128) for i in range(8)], axis=1)
+print(f"Workers restored: {get_workers() == previous}")
+print(f"Batched error: {np.max(np.abs(batched - single)):.2e}")
+print()
+
+# Test 3: mag2mp real path matches the complex path
+print("Test 3: mag2mp real-input path")
+m = np.abs(np.fft.fft(rng.normal(size=32), 256)) + 0.01
+xl = np.log(m)
+xlf = np.fft.fft(xl)
+xlfp = np.zeros(256, dtype=complex)
+xlfp[0] = xlf[0]
+xlfp[1:128] = 2 * xlf[1:128]
+xlfp[128] = xlf[128]
+reference = np.exp(np.fft.ifft(xlfp))
+print(f"Error: {np.max(np.abs(mag2mp(m) - reference)):.2e}")
+M = np.stack([m, m[::-1]])
+print(f"Batched along axis 1 matches: {np.allclose(mag2mp(M, axis=1)[1], mag2mp(m[::-1]))}")
+print()
+
+# Test 4: Scratch buffers are reused and zeroed
+print("Test 4: Scratch buffers")
+s1 = scratch(16)
+s1[:] = 1
+s2 = scratch(16)
+print(f"Reused: {s1 is s2}, zeroed: {np.all(s2 == 0)}")
+print(f"Different dtype gives a new buffer: {scratch(16, float) is not s2}")
+print()
+
+print("All tests completed.")
@@ -0,0 +1,91 @@
+
+
+# Test program for fmp.py
+
+import numpy as np
+from scipy.signal import remez
+from fmp import fmp
+from dzmp import dzmp
+from mag2mp import mag2mp
+
+
+def linear_phase(n, tb, d):
+    # The linear phase filter dzmp factors
+    w = 0.5 * 1.5 / tb
+    f = np.array([0, (1 - w) * (tb / 2), (1 + w) * (tb / 2), n / 2]) / (n / 2)
+    return remez(2 * n - 1, f, [1, 0], weight=[1, 2 * d / (0.5 * d * d)], fs=2)
+
+
+def fmp_m(h):
+    # Line by line translation of fmp.m, with its centered fft, fftc
+    l = len(h)
+    lp = int(8 * 2 ** np.ceil(np.log2(l)))
+    hp = np.concatenate([np.zeros(int(np.ceil((lp - l) / 2))), h, np.zeros((lp - l) // 2)])
+    hpf = np.fft.fftshift(np.fft.fft(np.fft.fftshift(hp)))
+    hpfs = hpf - np.min(np.real(hpf)) * 1.000001
+    hpfmp = mag2mp(np.sqrt(np.abs(hpfs)))
+    hpmp = np.fft.ifft(np.fft.fftshift(np.conj(hpfmp)))
+    return hpmp[:(l + 1) // 2]
+
+
+# Test 1: Minimum phase factor has the right magnitude
+print("Test 1: Magnitude of the factor")
+h = linear_phase(64, 6, 0.01)
+hmp, pad = fmp(h, return_pad=True, check=True)
+H = np.real(np.fft.fft(np.roll(np.pad(h, (0, 4096 - len(h))), -(len(h) // 2))))
+Hmp = np.abs(np.fft.fft(hmp, 4096))**2
+print(f"Length: {len(hmp)} (expected {(len(h) + 1) // 2}), pad used: {pad}")
+print(f"|Hmp|^2 vs shifted H, max error: {np.max(np.abs(Hmp - (H - H.min()))):.2e}")
+print(f"Largest zero radius: {np.max(np.abs(np.roots(hmp))):.4f}")
+print()
+
+# Test 2: Fixed pad reproduces the original factor of 8
+print("Test 2: Fixed pad")
+print(f"Matches the factor of 8 of fmp.m: {np.allclose(fmp(h, pad=8), fmp_m(h), atol=1e-10)}")
+print()
+
+# Test 3: Batch along an axis
+print("Test 3: Batched factorization")
+H = np.stack([linear_phase(64, tb, 0.01) for tb in [4, 6, 8]], axis=1)
+batch, pads = fmp(H, axis=0, return_pad=True)
+single = np.stack([fmp(H[:, i], pad=pads[i]) for i in range(3)], axis=1)
+print(f"Batch shape: {batch.shape}, pads: {pads}")
+print(f"Matches one at a time: {np.allclose(batch, single)}")
+print()
+
+# Test 4: Minimum phase check
+print("Test 4: Minimum phase check")
+r = np.max(np.abs(np.roots(hmp[::-1])))
+print(f"Reversed (maximum phase) factor has a zero at radius {r:.2f}, "
+      f"rejected: {r > 1 + 4 * np.pi / (pad * 128)}")
+batch = fmp(H, axis=0, check=True)
+print(f"Batch passes the default tolerance of two FFT bins: {batch.shape}")
+try:
+    fmp(h, check=True, root_tol=1e-6)
+    print("No error raised")
+except ValueError as e:
+    print(f"With root_tol=1e-6 the split unit circle zeros fail: {e}")
+print()
+
+# Test 5: dzmp still meets its ripples
+print("Test 5: dzmp")
+b = dzmp(64, 4, 0.01, 0.01)
+B = np.abs(np.fft.fftshift(np.fft.fft(b, 2048)))
+x = (np.arange(2048) - 1024) * 64 / 2048
+print(f"Passband max deviation: {np.max(np.abs(B[np.abs(x) < 1.2] - 1)):.4f}")
+print(f"Stopband max: {np.max(B[np.abs(x) > 3.0]):.4f}")
+print()
+
+# Test 6: The filter is centered at lp/2 and transformed with the
+# centered fft, as in fmp.m. With a plain fft the spectrum of the
+# symmetric filter has a linear phase, and the factor is an all-pass.
+print("Test 6: Centered fft, as fmp.m")
+for n, tb in [(64, 6), (33, 4)]:
+    h = linear_phase(n, tb, 0.01)
+    ref = fmp_m(h)
+    Href = np.abs(np.fft.fft(ref, 4096))
+    print(f"n={n}: matches fmp.m: {np.allclose(fmp(h, pad=8), ref, atol=1e-10)}, "
+          f"|H| from {Href.min():.4f} to {Href.max():.4f}")
+print()
+
+print("All tests completed.")
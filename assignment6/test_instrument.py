@@ -0,0 +1,111 @@
+
+
+# Test program for instrument.py
+
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import instrument
+from instrument import enable, disable, reset, records, counters, span, summary, export_jsonl
+from cache import cache_config
+from dzpm import dzpm
+from b2a import b2a
+from ab2rf import ab2rf
+from abrm import abrm_vectorized
+
+cache_enabled = cache_config()['enabled']
+cache_config(enabled=False)
+
+# Test 1: Nothing is recorded while disabled
+print("Test 1: Disabled by default")
+reset()
+b = dzpm(64, 4, 0.01, 0.01) * np.sin(np.pi / 4)
+print(f"Enabled: {instrument.enabled()}, records: {len(records())}")
+print()
+
+# Test 2: Spans of a design chain
+print("Test 2: Spans around kernels and their inner steps")
+enable()
+a = b2a(b)
+rf = ab2rf(a, b)
+b = dzpm(64, 4, 0.01, 0.01) * np.sin(np.pi / 4)
+a_sim, b_sim = abrm_vectorized(rf, x=np.linspace(-3, 3, 64))
+disable()
+names = [r['name'] for r in records()]
+print(f"Names: {sorted(set(names))}")
+remez = [r for r in records() if r['name'] == 'dzpm.remez'][0]
+print(f"dzpm.remez nested in dzpm: {remez['parent'] == 'dzpm' and remez['depth'] == 1}")
+print(f"ab2rf.steps counter: {counters().get('ab2rf.steps')} (expected {len(a)})")
+vec = [r for r in records() if r['name'] == 'abrm_vectorized'][0]
+print(f"abrm_vectorized argument sizes: {vec['sizes']}")
+print(f"Memory high-water recorded: {vec['peak_bytes'] > 0}")
+print()
+
+# Test 3: Nested peaks propagate outwards
+print("Test 3: Memory high-water of nested spans")
+reset()
+enable()
+with span('outer'):
+    with span('inner'):
+        x = np.ones(2**20)
+        del x
+    y = np.ones(2**10)
+disable()
+peaks = {r['name']: r['peak_bytes'] for r in records()}
+print(f"inner >= 8 MB: {peaks['inner'] >= 8 * 2**20}, outer >= inner: {peaks['outer'] >= peaks['inner']}")
+print()
+
+# Test 4: Summary table and JSON-lines export
+print("Test 4: Summary and export")
+print(summary())
+tmp = tempfile.mkdtemp()
+path = os.path.join(tmp, 'log.jsonl')
+export_jsonl(path)
+with open(path) as f:
+    lines = [json.loads(line) for line in f]
+print(f"Exported lines: {len(lines)} (expected {len(records()) + len(counters())})")
+log = os.path.join(tmp, 'stream.jsonl')
+reset()
+enable(log=log, memory=False)
+with span('streamed', n=3):
+    pass
+disable()
+with open(log) as f:
+    streamed = [json.loads(line) for line in f]
+print(f"Streamed record: {streamed[0]['name']}, sizes {streamed[0]['sizes']}, no memory: {'peak_bytes' not in streamed[0]}")
+os.remove(path)
+os.remove(log)
+os.rmdir(tmp)
+print()
+
+# Test 5: Overhead when disabled
+print("Test 5: Disabled overhead")
+reset()
+n = 100000
+t0 = time.perf_counter()
+for _ in range(n):
+    with span('x'):
+        pass
+t1 = time.perf_counter()
+print(f"Disabled span: {1e9 * (t1 - t0) / n:.0f} ns per use, records: {len(records())}")
+print()
+
+# Test 6: tracemalloc started by the caller is left running
+print("Test 6: Caller's tracemalloc")
+tracemalloc.start()
+enable()
+disable()
+print(f"Still tracing after disable: {tracemalloc.is_tracing()}")
+tracemalloc.stop()
+enable()
+disable()
+print(f"Tracing started by enable is stopped: {not tracemalloc.is_tracing()}")
+print()
+
+cache_config(enabled=cache_enabled)
+
+print("All tests completed.")
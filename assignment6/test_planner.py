@@ -0,0 +1,57 @@
+
+
+# Test program for planner.py
+
+import os
+import tempfile
+import time
+
+import numpy as np
+from planner import plan, calibrate
+from abrm import abrm_vectorized
+
+# Test 1: Calibration is cached per host
+print("Test 1: Calibration")
+path = os.path.join(tempfile.mkdtemp(), 'planner.json')
+t0 = time.perf_counter()
+rates = calibrate(force=True, path=path)
+t1 = time.perf_counter()
+rates2 = calibrate(path=path)
+t2 = time.perf_counter()
+print(f"Rates: { {k: f'{v:.3g}' for k, v in rates.items() if k != 'key'} }")
+print(f"Benchmark: {t1 - t0:.2f} s, cached: {1e3 * (t2 - t1):.2f} ms")
+print(f"Cache file written: {os.path.exists(path)}")
+print()
+
+# Test 2: Estimate for abrm_vectorized is within a small factor of the run
+print("Test 2: abrm_vectorized estimate")
+nt, npos = 1000, 2000
+est = plan('abrm', nt=nt, npos=npos)
+rf = np.ones(nt) * 1e-3
+x = np.linspace(-1, 1, npos)
+t0 = time.perf_counter()
+abrm_vectorized.uncached(rf, x=x)
+elapsed = time.perf_counter() - t0
+print(f"Estimated: {est['seconds']:.3f} s, {est['bytes'] / 2**20:.0f} MB")
+print(f"Measured: {elapsed:.3f} s")
+print(f"Within 5x: {elapsed / 5 < est['seconds'] < elapsed * 5}")
+print()
+
+# Test 3: simulate plan switches to time blocks over budget
+print("Test 3: simulate plan with a memory budget")
+est = plan('simulate', nt=2000, npos=10**6, mem_budget=2**28)
+print(f"Engine: {est['engine']}, block: {est['block']}, chunk: {est['chunk']}")
+print(f"Peak bytes within budget: {est['bytes'] <= 2**28}")
+print()
+
+# Test 4: Other kernels
+print("Test 4: Other kernels")
+for kernel, sizes in [('voronoidens', {'npoints': 100000}),
+                      ('slr', {'n': 512, 'ftype': 'pm'}),
+                      ('cgsense', {'im_size': (220, 220), 'ncoil': 12,
+                                   'nsamples': 500000, 'nsub': 5})]:
+    est = plan(kernel, calibrated=False, **sizes)
+    print(f"{kernel}: {est['flops']:.3g} flops, {est['bytes'] / 2**20:.1f} MB, {est['seconds']:.3g} s")
+print()
+
+print("All tests completed.")
@@ -0,0 +1,60 @@
+
+
+# Test program for simulate.py
+
+import numpy as np
+from abrm import abrm_vectorized
+from simulate import simulate
+
+n = 200
+t = np.linspace(-2, 2, n)
+rf = np.sinc(t) / np.sum(np.sinc(t)) * np.pi / 2
+x = np.linspace(-3, 3, 41)
+y = np.linspace(-2, 2, 9)
+
+# Test 1: 1D pulse matches abrm_vectorized
+print("Test 1: 1D pulse")
+a, b, info = simulate(rf, x=x, return_info=True)
+a0, b0 = abrm_vectorized(rf, x=x)
+print(f"Engine: {info['engine']}, reasons: {info['reasons']}")
+print(f"Match: {np.allclose(a, a0) and np.allclose(b, b0)}")
+print()
+
+# Test 2: Real gradient on a 2D grid only simulates the x positions
+print("Test 2: Fixed gradient direction on a 2D grid")
+g = np.ones(n) * 2 * np.pi / n
+a, b, info = simulate(rf, g, x, y, return_info=True)
+a0, b0 = abrm_vectorized(rf, g, x, y)
+print(f"Positions: {info['npos']} -> {info['npos_reduced']}")
+print(f"Match: {np.allclose(a, a0) and np.allclose(b, b0)}")
+print()
+
+# Test 3: Zero-rf stretches are merged
+print("Test 3: Zero-rf stretches")
+rf2 = np.concatenate([rf, np.zeros(300), rf])
+g2 = np.concatenate([g, -g, -g[:100], g])
+a, b, info = simulate(rf2, g2, x, return_info=True)
+a0, b0 = abrm_vectorized(rf2, g2, x)
+print(f"Samples: {info['nt']} -> {info['nt_reduced']}")
+print(f"Match: {np.allclose(a, a0) and np.allclose(b, b0)}")
+print()
+
+# Test 4: 2D spiral-like gradient over the memory budget uses time blocks
+print("Test 4: 2D gradient with a small memory budget")
+g3 = 2 * np.pi / n * np.exp(1j * np.linspace(0, 6 * np.pi, n)) * np.linspace(1, 0, n)
+a, b, info = simulate(rf, g3, x, y, mem_budget=2**20, return_info=True)
+a0, b0 = abrm_vectorized(rf, g3, x, y)
+print(f"Engine: {info['engine']}, reasons: {info['reasons']}")
+print(f"Estimated bytes within budget: {info['bytes'] <= 2**20}")
+print(f"Match: {np.allclose(a, a0) and np.allclose(b, b0)}")
+print()
+
+# Test 5: Forcing the scalar engine
+print("Test 5: Scalar abrm engine")
+a, b, info = simulate(rf[:50], g3[:50], x[:5], y[:3], engine='abrm', return_info=True)
+a0, b0 = abrm_vectorized(rf[:50], g3[:50], x[:5], y[:3])
+print(f"Engine: {info['engine']}")
+print(f"Match: {np.allclose(a, a0) and np.allclose(b, b0)}")
+print()
+
+print("All tests completed.")
@@ -0,0 +1,59 @@
+
+
+# Test program for sweep.py
+
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from sweep import sweep, load_sweep
+from dzminlen import pulse_metrics
+
+tmp = tempfile.mkdtemp()
+grid = dict(n=128, tb=[4, 8], d1=[0.01, 0.005], d2=0.01, flip=[np.pi / 2, np.pi / 6],
+            ftype=['pm', 'ls', 'min'])
+
+# Test 1: Parallel sweep into columns
+print("Test 1: Parallel sweep")
+t0 = time.perf_counter()
+done = sweep(tmp, chunk=5, workers=2, **grid)
+t1 = time.perf_counter()
+r = load_sweep(tmp)
+print(f"Chunks: {done}, points: {len(r['index'])} (expected 24), {1e3 * (t1 - t0):.0f} ms")
+print(f"Columns: {sorted(r)}")
+print(f"Index ordered: {np.array_equal(r['index'], np.arange(24))}")
+print()
+
+# Test 2: Results match direct designs
+print("Test 2: Results match pulse_metrics")
+i = 17
+m = pulse_metrics(int(r['n'][i]), r['tb'][i], r['d1'][i], r['d2'][i], r['flip'][i], 'ex',
+                  str(r['ftype'][i]))
+rf = r['rf'][i, :r['length'][i]]
+print(f"Point {i}: ftype {r['ftype'][i]}, b1 {r['b1'][i]:.4f} G vs {m['b1']:.4f} G")
+print(f"rf matches: {np.allclose(rf, m['rf'])}, ripple matches: {np.isclose(r['ripple1'][i], m['ripple1'])}")
+print()
+
+# Test 3: Resume after an interruption
+print("Test 3: Resume")
+os.remove(os.path.join(tmp, 'chunk_000002.npz'))
+done = sweep(tmp, chunk=5, workers=1, **grid)
+print(f"Chunks recomputed: {done} (expected 1)")
+print(f"All points loaded: {len(load_sweep(tmp)['index']) == 24}")
+print(f"Nothing left to do: {sweep(tmp, chunk=5, workers=1, **grid) == 0}")
+print()
+
+# Test 4: Different grid in the same directory
+print("Test 4: Mismatched grid")
+try:
+    sweep(tmp, chunk=5, workers=1, **dict(grid, tb=[4]))
+    print("No error raised")
+except ValueError as e:
+    print(f"ValueError: {e}")
+print()
+
+shutil.rmtree(tmp)
+
+print("All tests completed.")